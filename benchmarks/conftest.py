@@ -12,13 +12,17 @@ from pathlib import Path
 import pytest
 
 from benchmarks.generators.data_factory import DataFactory
-from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
+from benchmarks.memory import measure_memory
+from benchmarks.sparql_endpoint import LocalSPARQLEndpoint
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
+from oc_ocdm.storer import Storer
 
-REDIS_HOST = os.environ["REDIS_HOST"]
-REDIS_PORT = int(os.environ["REDIS_PORT"])
-REDIS_DB = int(os.environ["REDIS_DB"])
+# Redis is used only when REDIS_HOST is set, as in docker-compose.yml
+REDIS_HOST = os.environ.get("REDIS_HOST")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", "6379"))
+REDIS_DB = int(os.environ.get("REDIS_DB", "0"))
 
 BASE_IRI = "https://w3id.org/oc/meta/"
 RESP_AGENT = "https://orcid.org/0000-0002-8420-0696"
@@ -26,11 +30,42 @@ SUPPLIER_PREFIX = "060"
 
 BENCHMARK_ROUNDS = 5
 
+# Number of records benchmarked by the "scale" group for each value of BENCHMARK_SCALE
+SCALE_TIERS = {
+    "small": (1_000,),
+    "medium": (1_000, 10_000),
+    "large": (1_000, 10_000, 100_000),
+    "xlarge": (1_000, 10_000, 100_000, 1_000_000),
+}
+BENCHMARK_SCALE = os.environ.get("BENCHMARK_SCALE", "small")
+if BENCHMARK_SCALE not in SCALE_TIERS:
+    raise ValueError(
+        f"Given BENCHMARK_SCALE '{BENCHMARK_SCALE}' is not supported. Available tiers: {list(SCALE_TIERS)}."
+    )
+SCALE_RECORD_COUNTS = SCALE_TIERS[BENCHMARK_SCALE]
+# Records generated at once by iter_populated_graph_sets, which bounds the memory used by large tiers
+CHUNK_SIZE = 5_000
+
+# Filled by the record_throughput fixture, since test modules import this file under another name
+THROUGHPUT_RESULTS = pytest.StashKey[list]()
+MEMORY_RESULTS = pytest.StashKey[list]()
+
 
 @pytest.fixture(scope="session")
-def redis_counter_handler():
-    """Session-scoped RedisCounterHandler instance."""
-    return RedisCounterHandler(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+def counter_handler():
+    """Session-scoped counter handler: a RedisCounterHandler if REDIS_HOST is set, an InMemoryCounterHandler otherwise."""
+    if REDIS_HOST:
+        from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
+
+        return RedisCounterHandler(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    return InMemoryCounterHandler()
+
+
+@pytest.fixture
+def sparql_endpoint():
+    """In-process SPARQL endpoint with an empty store, stopped at the end of the test."""
+    with LocalSPARQLEndpoint() as endpoint:
+        yield endpoint
 
 
 def create_populated_graph_set(handler, entity_count):
@@ -38,7 +73,7 @@ def create_populated_graph_set(handler, entity_count):
     Create a fresh GraphSet populated with test entities.
 
     Args:
-        handler: RedisCounterHandler instance
+        handler: Counter handler instance
         entity_count: Number of bibliographic records to create
 
     Returns:
@@ -52,13 +87,146 @@ def create_populated_graph_set(handler, entity_count):
     return graph_set, entities
 
 
+def iter_populated_graph_sets(handler, record_count, chunk_size=CHUNK_SIZE, records_per_issue=20):
+    """
+    Generate ``record_count`` bibliographic records in consecutive GraphSets of ``chunk_size`` records,
+    so that only one chunk has to be kept in memory at a time.
+
+    Args:
+        handler: Counter handler instance, shared by all the chunks
+        record_count: Total number of bibliographic records to create
+        chunk_size: Number of records of each GraphSet
+        records_per_issue: Number of records published in the same journal issue
+
+    Yields:
+        Tuple of (GraphSet, list of created BibliographicResource entities)
+    """
+    factory = DataFactory(seed=42)
+    for start in range(0, record_count, chunk_size):
+        graph_set = GraphSet(
+            base_iri=BASE_IRI, wanted_label=False, custom_counter_handler=handler, supplier_prefix=SUPPLIER_PREFIX
+        )
+        entities = factory.populate_graph_set(
+            graph_set,
+            RESP_AGENT,
+            min(chunk_size, record_count - start),
+            records_per_issue=records_per_issue,
+            start_index=start,
+        )
+        yield graph_set, entities
+
+
+def scale_rounds(record_count):
+    """Number of rounds of a "scale" benchmark: tiers above 10,000 records run once."""
+    return BENCHMARK_ROUNDS if record_count <= 10_000 else 1
+
+
+@pytest.fixture
+def record_throughput(request, benchmark):
+    """
+    Function attaching the throughput of each stage of a benchmark to its saved data and to the
+    terminal report. It must be called after the benchmarked function has run.
+
+    Args of the returned function:
+        stage_counts: Dictionary mapping each stage to a (records, entities, triples) tuple
+        stage_seconds: Dictionary mapping each stage to its total duration across all rounds
+    """
+
+    def record(stage_counts, stage_seconds):
+        rounds = benchmark.stats.stats.rounds if benchmark.stats else 1
+        throughput = {}
+        for stage, (records, entities, triples) in stage_counts.items():
+            seconds = stage_seconds[stage] / rounds
+            throughput[stage] = {
+                "seconds": seconds,
+                "records_per_second": records / seconds,
+                "entities_per_second": entities / seconds,
+                "triples_per_second": triples / seconds,
+            }
+        benchmark.extra_info["throughput"] = throughput
+        request.config.stash.setdefault(THROUGHPUT_RESULTS, []).append((request.node.name, throughput))
+
+    return record
+
+
+@pytest.fixture
+def record_memory(request, benchmark):
+    """
+    Function measuring the memory of a benchmarked function with ``benchmarks.memory.measure_memory``.
+    The measurements are saved in the ``memory`` entry of the benchmark extra info, which is stored
+    in the pytest-benchmark JSON, and they are printed in the terminal report.
+
+    Args of the returned function:
+        function: The function to be measured
+        setup: Optional function returning the (args, kwargs) of ``function``
+        entity_count: Number of entities handled by the function
+    """
+
+    def record(function, setup=None, entity_count=None):
+        memory = measure_memory(function, setup, entity_count)
+        benchmark.extra_info["memory"] = memory
+        request.config.stash.setdefault(MEMORY_RESULTS, []).append((request.node.name, memory))
+        return memory
+
+    return record
+
+
+def _format_bytes(value):
+    return f"{value / 1024:,.1f}" if value is not None else "n/a"
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the values recorded by ``record_throughput`` and ``record_memory`` after the pytest-benchmark tables."""
+    memory_results = terminalreporter.config.stash.get(MEMORY_RESULTS, [])
+    if memory_results:
+        terminalreporter.section("memory (KiB per entity)")
+        terminalreporter.write_line(f"{'Name':<50} {'Peak':>10} {'Retained':>10} {'RSS peak':>10} {'RSS retained':>13}")
+        for name, memory in memory_results:
+            terminalreporter.write_line(
+                f"{name:<50} {_format_bytes(memory['peak_bytes_per_entity']):>10} "
+                f"{_format_bytes(memory['retained_bytes_per_entity']):>10} "
+                f"{_format_bytes(memory['rss_peak_bytes_per_entity']):>10} "
+                f"{_format_bytes(memory['rss_retained_bytes_per_entity']):>13}"
+            )
+    results = terminalreporter.config.stash.get(THROUGHPUT_RESULTS, [])
+    if not results:
+        return
+    terminalreporter.section("throughput")
+    terminalreporter.write_line(
+        f"{'Name':<40} {'Stage':<12} {'Seconds':>10} {'Records/s':>12} {'Entities/s':>12} {'Triples/s':>12}"
+    )
+    for name, throughput in results:
+        for stage, values in throughput.items():
+            terminalreporter.write_line(
+                f"{name:<40} {stage:<12} {values['seconds']:>10.3f} {values['records_per_second']:>12,.0f} "
+                f"{values['entities_per_second']:>12,.0f} {values['triples_per_second']:>12,.0f}"
+            )
+
+
+def store_zip_dump(abstract_set, directory):
+    """
+    Store a GraphSet or a ProvSet as zipped JSON-LD files, as in the dumps produced by OpenCitations Meta.
+
+    Args:
+        abstract_set: GraphSet or ProvSet to store
+        directory: Directory where the files are created
+
+    Returns:
+        List of the paths of the stored zip files
+    """
+    storer = Storer(abstract_set, output_format="json-ld", zip_output=True, dir_split=10000, n_file_item=1000)
+    # store_all returns the paths of the JSON files, which are stored in zip archives with the same name
+    paths = storer.store_all(str(directory) + os.sep, BASE_IRI)
+    return [os.path.splitext(path)[0] + ".zip" for path in paths]
+
+
 def create_prov_set(graph_set, handler):
     """
     Create a ProvSet linked to a GraphSet.
 
     Args:
         graph_set: GraphSet instance to track provenance for
-        handler: RedisCounterHandler instance
+        handler: Counter handler instance
 
     Returns:
         ProvSet instance
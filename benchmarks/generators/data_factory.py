@@ -416,7 +416,12 @@ class DataFactory:
         return journal_br, volume_br, issue_br
 
     def create_complete_bibliographic_record(
-        self, graph_set: GraphSet, resp_agent: str, index: int = 0, num_authors: int = 2
+        self,
+        graph_set: GraphSet,
+        resp_agent: str,
+        index: int = 0,
+        num_authors: int = 2,
+        issue_br: Optional[BibliographicResource] = None,
     ) -> BibliographicResource:
         """
         Create a complete bibliographic record with full hierarchy.
@@ -436,6 +441,8 @@ class DataFactory:
             resp_agent: The responsible agent URI.
             index: Index for unique generation.
             num_authors: Number of authors to create.
+            issue_br: Existing journal issue of the article. If given, the journal hierarchy
+                and the publisher are not created.
 
         Returns:
             BibliographicResource for the article.
@@ -444,17 +451,23 @@ class DataFactory:
             graph_set, resp_agent, index, num_authors, with_identifiers=True, with_pages=True
         )
 
-        journal_br, _, issue_br = self.create_journal_hierarchy(graph_set, resp_agent, index)
+        if issue_br is None:
+            journal_br, _, issue_br = self.create_journal_hierarchy(graph_set, resp_agent, index)
+            ar = self.create_publisher(graph_set, resp_agent)
+            journal_br.has_contributor(ar)
 
         article_br.is_part_of(issue_br)
 
-        ar = self.create_publisher(graph_set, resp_agent)
-        journal_br.has_contributor(ar)
-
         return article_br
 
     def populate_graph_set(
-        self, graph_set: GraphSet, resp_agent: str, num_records: int, num_authors_per_record: int = 2
+        self,
+        graph_set: GraphSet,
+        resp_agent: str,
+        num_records: int,
+        num_authors_per_record: int = 2,
+        records_per_issue: int = 1,
+        start_index: int = 0,
     ) -> List[BibliographicResource]:
         """
         Populate a GraphSet with multiple bibliographic records.
@@ -464,12 +477,24 @@ class DataFactory:
             resp_agent: The responsible agent URI.
             num_records: Number of records to create.
             num_authors_per_record: Authors per record.
+            records_per_issue: Number of consecutive records published in the same journal issue.
+                Values above 1 reduce the entities per record, as in real data.
+            start_index: Index of the first record, to generate unique identifiers across GraphSets.
 
         Returns:
             List of created article BibliographicResources.
         """
+        if records_per_issue <= 0:
+            raise ValueError("records_per_issue must be a positive integer.")
         articles = []
-        for i in range(num_records):
-            article = self.create_complete_bibliographic_record(graph_set, resp_agent, i, num_authors_per_record)
+        issue_br = None
+        for i in range(start_index, start_index + num_records):
+            if (i - start_index) % records_per_issue == 0:
+                issue_br = None
+            article = self.create_complete_bibliographic_record(
+                graph_set, resp_agent, i, num_authors_per_record, issue_br
+            )
+            if issue_br is None:
+                issue_br = article.get_is_part_of()
             articles.append(article)
         return articles
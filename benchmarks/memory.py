@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Memory measurements for benchmarks.
+
+The triples of TripleLite graphs are stored by a native extension, whose allocations are
+invisible to tracemalloc. Each measurement therefore runs the benchmarked function twice:
+
+- once under tracemalloc, which gives the exact peak and retained size of the Python heap;
+- once without it, reading the resident set size (RSS) of the process from ``/proc/self/status``.
+  The peak RSS is reset before the run through ``/proc/self/clear_refs``, so it refers to the
+  function alone, and the memory freed by the setup is returned to the operating system with
+  ``malloc_trim`` where glibc is available. RSS values include native memory, but they are coarser,
+  since freed pages can be reused without growing the RSS. They are None on systems without procfs.
+
+The "retained" values are measured after a garbage collection, while the result of the function
+is still referenced, so they include the size of the returned objects.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import tracemalloc
+
+_STATUS_PATH = "/proc/self/status"
+_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        libc.malloc_trim.argtypes = [ctypes.c_size_t]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_LIBC = _load_libc()
+
+
+def _read_rss():
+    """Return the current and peak RSS of the process in bytes, or (None, None) without procfs."""
+    values = {}
+    try:
+        with open(_STATUS_PATH) as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) * 1024
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS of the process to its current RSS. Return False if it is not supported."""
+    try:
+        with open(_CLEAR_REFS_PATH, "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _release_free_memory():
+    """Return the memory freed by previous allocations to the operating system, where glibc allows it."""
+    gc.collect()
+    if _LIBC is not None:
+        _LIBC.malloc_trim(0)
+
+
+def _prepare(setup):
+    args, kwargs = setup() if setup is not None else ((), {})
+    _release_free_memory()
+    return args, kwargs
+
+
+def measure_memory(function, setup=None, entity_count=None):
+    """
+    Measure the peak and retained memory of a function.
+
+    Args:
+        function: The function to be measured
+        setup: Optional function returning the (args, kwargs) of ``function``, as in ``benchmark.pedantic``.
+            It is called before each run, outside of the measurement
+        entity_count: Number of entities handled by the function, used to compute per-entity values
+
+    Returns:
+        Dictionary with the peak and retained bytes of the Python heap (``peak_bytes``, ``retained_bytes``)
+        and of the process (``rss_peak_bytes``, ``rss_retained_bytes``), plus the same values divided by
+        ``entity_count`` (with a ``_per_entity`` suffix) when it is given
+    """
+    args, kwargs = _prepare(setup)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = function(*args, **kwargs)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    del result, args, kwargs
+
+    memory = {"peak_bytes": peak - baseline, "retained_bytes": current - baseline}
+
+    args, kwargs = _prepare(setup)
+    rss_baseline, _ = _read_rss()
+    if rss_baseline is not None and _reset_peak_rss():
+        result = function(*args, **kwargs)
+        gc.collect()
+        rss_current, rss_peak = _read_rss()
+        del result
+        memory["rss_peak_bytes"] = rss_peak - rss_baseline
+        memory["rss_retained_bytes"] = rss_current - rss_baseline
+    else:
+        memory["rss_peak_bytes"] = memory["rss_retained_bytes"] = None
+
+    if entity_count:
+        for key, value in list(memory.items()):
+            memory[f"{key[:-6]}_bytes_per_entity"] = value / entity_count if value is not None else None
+        memory["entities"] = entity_count
+    return memory
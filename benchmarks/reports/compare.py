@@ -0,0 +1,239 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Regression gate for benchmark results.
+
+Compares a run of the benchmarks with a baseline run, both saved by pytest-benchmark, and exits
+with status 1 if any benchmark got slower (or uses more memory) beyond the configured thresholds.
+
+Usage:
+    python -m benchmarks.reports.compare BASELINE CURRENT [--threshold 0.1] [--noise-factor 2]
+
+BASELINE and CURRENT are pytest-benchmark JSON files or directories. For a directory, the latest
+run of every storage directory below it is used (e.g. one per group in .benchmarks/<group>/).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BenchmarkKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+# Memory values compared when both runs recorded them (see benchmarks/memory.py).
+# RSS values are left out, since they depend on the state of the allocator.
+MEMORY_METRICS = ("peak_bytes_per_entity", "retained_bytes_per_entity")
+
+
+def find_result_files(path: str) -> List[Path]:
+    """
+    Find the pytest-benchmark JSON files to compare.
+
+    Args:
+        path: A JSON file, or a directory whose storage directories contain JSON files.
+
+    Returns:
+        The given file, or the latest file of every directory containing JSON files.
+    """
+    root = Path(path)
+    if root.is_file():
+        return [root]
+    latest: Dict[Path, Path] = {}
+    for json_path in root.rglob("*.json"):
+        current = latest.get(json_path.parent)
+        # Autosaved runs are named after an increasing counter
+        if current is None or json_path.name > current.name:
+            latest[json_path.parent] = json_path
+    return sorted(latest.values())
+
+
+def load_benchmarks(path: str) -> Dict[BenchmarkKey, Dict[str, Any]]:
+    """
+    Load the benchmarks of one or more pytest-benchmark JSON files.
+
+    Args:
+        path: A JSON file or a directory, see ``find_result_files``.
+
+    Returns:
+        Dictionary mapping (group, test, parameters) to the benchmark data.
+    """
+    benchmarks = {}
+    for json_path in find_result_files(path):
+        with open(json_path) as f:
+            data = json.load(f)
+        for benchmark in data.get("benchmarks", []):
+            benchmarks[benchmark_key(benchmark)] = benchmark
+    return benchmarks
+
+
+def benchmark_key(benchmark: Dict[str, Any]) -> BenchmarkKey:
+    """Key matching the same benchmark across runs: its group, its test and its parameters."""
+    test = benchmark["fullname"].split("[")[0]
+    params = tuple(sorted((name, str(value)) for name, value in (benchmark.get("params") or {}).items()))
+    return benchmark.get("group") or "", test, params
+
+
+class BenchmarkComparator:
+    """
+    Compares benchmark runs with noise-aware thresholds.
+
+    A benchmark regresses when its statistic grows by more than ``threshold`` (relative) and the
+    growth is also larger than ``noise_factor`` times the interquartile range of either run, so
+    that noisy benchmarks need a larger slowdown to fail the gate. Memory per entity is deterministic
+    and is only compared with ``memory_threshold``.
+    """
+
+    def __init__(
+        self, threshold: float = 0.1, noise_factor: float = 2.0, stat: str = "min", memory_threshold: float = 0.1
+    ):
+        """
+        Initialize the comparator.
+
+        Args:
+            threshold: Maximum accepted relative slowdown (0.1 means 10%).
+            noise_factor: Multiple of the interquartile range that a slowdown must exceed.
+            stat: Timing statistic to compare (min, mean or median).
+            memory_threshold: Maximum accepted relative growth of memory per entity.
+        """
+        if threshold < 0 or noise_factor < 0 or memory_threshold < 0:
+            raise ValueError("Thresholds must be non-negative numbers.")
+        if stat not in ("min", "mean", "median"):
+            raise ValueError(f"Given stat '{stat}' is not supported. Available stats: ['min', 'mean', 'median'].")
+        self.threshold = threshold
+        self.noise_factor = noise_factor
+        self.stat = stat
+        self.memory_threshold = memory_threshold
+
+    def compare(
+        self, baseline: Dict[BenchmarkKey, Dict[str, Any]], current: Dict[BenchmarkKey, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare every benchmark of the current run with the same benchmark of the baseline.
+
+        Args:
+            baseline: Benchmarks of the baseline run, as returned by ``load_benchmarks``.
+            current: Benchmarks of the current run.
+
+        Returns:
+            One row per compared value, with its key, metric, baseline and current values,
+            relative change and status ("regression", "improvement", "ok", "new" or "missing").
+        """
+        rows = []
+        for key in sorted(set(baseline) | set(current)):
+            if key not in baseline:
+                rows.append(self._row(key, "time", None, current[key]["stats"][self.stat], "new"))
+                continue
+            if key not in current:
+                rows.append(self._row(key, "time", baseline[key]["stats"][self.stat], None, "missing"))
+                continue
+            rows.append(self._compare_time(key, baseline[key]["stats"], current[key]["stats"]))
+            rows.extend(self._compare_memory(key, baseline[key], current[key]))
+        return rows
+
+    def _compare_time(self, key: BenchmarkKey, baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        old, new = baseline[self.stat], current[self.stat]
+        noise = self.noise_factor * max(baseline.get("iqr", 0.0), current.get("iqr", 0.0))
+        return self._row(key, "time", old, new, self._status(old, new, self.threshold, noise))
+
+    def _compare_memory(self, key: BenchmarkKey, baseline: Dict[str, Any], current: Dict[str, Any]):
+        old_memory = baseline.get("extra_info", {}).get("memory")
+        new_memory = current.get("extra_info", {}).get("memory")
+        if not old_memory or not new_memory:
+            return []
+        rows = []
+        for metric in MEMORY_METRICS:
+            old, new = old_memory.get(metric), new_memory.get(metric)
+            if old is not None and new is not None:
+                rows.append(self._row(key, metric, old, new, self._status(old, new, self.memory_threshold, 0.0)))
+        return rows
+
+    @staticmethod
+    def _status(old: float, new: float, threshold: float, noise: float) -> str:
+        delta = new - old
+        if delta > old * threshold and delta > noise:
+            return "regression"
+        if -delta > old * threshold and -delta > noise:
+            return "improvement"
+        return "ok"
+
+    @staticmethod
+    def _row(key: BenchmarkKey, metric: str, old: Optional[float], new: Optional[float], status: str):
+        change = (new - old) / old if old and new is not None else None
+        return {"key": key, "metric": metric, "baseline": old, "current": new, "change": change, "status": status}
+
+
+def format_value(metric: str, value: Optional[float]) -> str:
+    """Format a time in milliseconds or a memory value in KiB."""
+    if value is None:
+        return "-"
+    if metric == "time":
+        return f"{value * 1000:,.3f} ms"
+    return f"{value / 1024:,.2f} KiB"
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """
+    Build a readable report of a comparison, listing regressions first.
+
+    Args:
+        rows: Rows returned by ``BenchmarkComparator.compare``.
+
+    Returns:
+        The report as a string.
+    """
+    order = {"regression": 0, "improvement": 1, "missing": 2, "new": 3, "ok": 4}
+    lines = [f"{'Status':<12} {'Benchmark':<60} {'Metric':<26} {'Baseline':>16} {'Current':>16} {'Change':>9}"]
+    for row in sorted(rows, key=lambda r: (order[r["status"]], r["key"])):
+        group, test, params = row["key"]
+        name = f"{group}: {test.split('::')[-1]}"
+        if params:
+            name += "[" + ", ".join(f"{param}={value}" for param, value in params) + "]"
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        lines.append(
+            f"{row['status'].upper():<12} {name:<60} {row['metric']:<26} "
+            f"{format_value(row['metric'], row['baseline']):>16} {format_value(row['metric'], row['current']):>16} "
+            f"{change:>9}"
+        )
+    regressions = sum(1 for row in rows if row["status"] == "regression")
+    lines.append("")
+    lines.append(f"{regressions} regression(s) out of {len(rows)} compared values.")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compare two benchmark runs from command line. Return 1 on regressions, 2 if nothing can be compared."""
+
+    parser = argparse.ArgumentParser(description="Compare benchmark results with a baseline")
+    parser.add_argument("baseline", help="Baseline pytest-benchmark JSON file or directory")
+    parser.add_argument("current", help="Current pytest-benchmark JSON file or directory")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Maximum accepted relative slowdown")
+    parser.add_argument(
+        "--noise-factor",
+        type=float,
+        default=2.0,
+        help="Multiple of the interquartile range that a slowdown must exceed to be reported",
+    )
+    parser.add_argument("--stat", default="min", choices=["min", "mean", "median"], help="Timing statistic")
+    parser.add_argument(
+        "--memory-threshold", type=float, default=0.1, help="Maximum accepted relative growth of memory per entity"
+    )
+
+    args = parser.parse_args(argv)
+
+    baseline = load_benchmarks(args.baseline)
+    current = load_benchmarks(args.current)
+    if not set(baseline) & set(current):
+        print("No benchmark of the current run matches the baseline.")
+        return 2
+
+    comparator = BenchmarkComparator(args.threshold, args.noise_factor, args.stat, args.memory_threshold)
+    rows = comparator.compare(baseline, current)
+    print(format_report(rows))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
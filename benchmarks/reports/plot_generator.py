@@ -125,13 +125,16 @@ class BenchmarkPlotGenerator:
         benchmarks = groups[group]
         group_params = list(self._get_group_parameters(benchmarks))
 
-        # Determine layout: 1 row for comparison + 1 row for each parameter pair
+        # Determine layout: 1 row for comparison + 1 row for each parameter pair,
+        # plus 1 row for peak and retained memory if the benchmarks recorded it
         n_params = max(1, len(group_params))
         n_cols = n_params * 2  # scaling + throughput for each param
+        has_memory = any("memory" in bm.get("extra_info", {}) for bm in benchmarks)
+        n_rows = 3 if has_memory else 2
 
         # Create figure with GridSpec
-        fig = plt.figure(figsize=(6 * n_params, 10))
-        gs = fig.add_gridspec(2, n_cols, height_ratios=[1, 1])
+        fig = plt.figure(figsize=(6 * n_params, 5 * n_rows))
+        gs = fig.add_gridspec(n_rows, n_cols, height_ratios=[1] * n_rows)
 
         # Row 1: Comparison bar chart (spans all columns)
         ax_comparison = fig.add_subplot(gs[0, :])
@@ -144,6 +147,9 @@ class BenchmarkPlotGenerator:
                 ax_throughput = fig.add_subplot(gs[1, i * 2 + 1])
                 self._draw_scaling_subplot(ax_scaling, benchmarks, param)
                 self._draw_throughput_subplot(ax_throughput, benchmarks, param)
+                if has_memory:
+                    self._draw_memory_subplot(fig.add_subplot(gs[2, i * 2]), benchmarks, param, "peak")
+                    self._draw_memory_subplot(fig.add_subplot(gs[2, i * 2 + 1]), benchmarks, param, "retained")
 
         plt.tight_layout()
         output_path = self.output_dir / f"{output_name}.png"
@@ -256,6 +262,41 @@ class BenchmarkPlotGenerator:
         ax.grid(True, alpha=0.3)
         ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, _: format(int(x), ",")))
 
+    def _draw_memory_subplot(self, ax: Axes, benchmarks: List[Dict[str, Any]], param_name: str, kind: str):
+        """
+        Draw the peak or retained memory per entity recorded by benchmarks/memory.py on given axes.
+        Python heap values (tracemalloc) are drawn with solid lines, process RSS values with dashed lines.
+        """
+        test_data = {}
+        for bm in benchmarks:
+            memory = bm.get("extra_info", {}).get("memory")
+            param_value = self._get_param_value(bm, param_name)
+            if memory is None or param_value is None:
+                continue
+
+            base_name = self._get_benchmark_name(bm).split("[")[0]
+            if base_name not in test_data:
+                test_data[base_name] = {"x": [], "heap": [], "rss": []}
+
+            rss = memory.get(f"rss_{kind}_bytes_per_entity")
+            test_data[base_name]["x"].append(param_value)
+            test_data[base_name]["heap"].append(memory[f"{kind}_bytes_per_entity"] / 1024)
+            test_data[base_name]["rss"].append(rss / 1024 if rss is not None else None)
+
+        for i, (name, values) in enumerate(test_data.items()):
+            sorted_data = sorted(zip(values["x"], values["heap"], values["rss"]), key=lambda d: d[0])
+            x = [d[0] for d in sorted_data]
+            color = self.COLORS[i % len(self.COLORS)]
+            ax.plot(x, [d[1] for d in sorted_data], marker="o", label=name, color=color)
+            if all(d[2] is not None for d in sorted_data):
+                ax.plot(x, [d[2] for d in sorted_data], marker="x", linestyle="--", label=f"{name} (RSS)", color=color)
+
+        ax.set_xlabel(param_name.replace("_", " ").title())
+        ax.set_ylabel("Memory (KiB/entity)")
+        ax.set_title(f"{kind.title()} memory ({param_name})")
+        ax.legend(loc="best", fontsize=7)
+        ax.grid(True, alpha=0.3)
+
     def generate_all_plots(self, json_file: str):
         """
         Generate all standard plots from benchmark JSON file.
@@ -10,7 +10,13 @@
 #   ./run_benchmarks.sh              # Run all benchmarks
 #   ./run_benchmarks.sh --group NAME # Run specific benchmark group
 #
-# Available groups: graph_diff, context_caching
+# Available groups: graph_diff, context_caching, storer, find_paths, nt_serialization, triplestore, scale, memory,
+#                   provenance, reader, counter_handler
+#
+# Counters are kept in memory unless REDIS_HOST (and REDIS_PORT, REDIS_DB) are set.
+# If BENCHMARK_BASELINE points to a pytest-benchmark JSON file or directory, the results are compared
+# with it by benchmarks/reports/compare.py, and the script fails on regressions.
+# The record counts of the scale group are chosen by BENCHMARK_SCALE: small (default), medium, large or xlarge.
 
 set -e
 
@@ -53,4 +59,9 @@ if [ -n "$BENCHMARK_FILE" ]; then
         --output-dir benchmarks/output/plots
 else
     echo "No benchmark JSON file found in .benchmarks/"
-fi
\ No newline at end of file
+fi
+
+if [ -n "$BENCHMARK_BASELINE" ] && [ -n "$BENCHMARK_FILE" ]; then
+    echo "Comparing with baseline: $BENCHMARK_BASELINE"
+    poetry run python -m benchmarks.reports.compare "$BENCHMARK_BASELINE" "$BENCHMARK_FILE"
+fi
@@ -9,6 +9,11 @@
 # Usage: ./run_single_benchmark.sh <benchmark_group>
 # Example: ./run_single_benchmark.sh context_caching
 #
+# Counters are kept in memory unless REDIS_HOST (and REDIS_PORT, REDIS_DB) are set.
+# If BENCHMARK_BASELINE points to a pytest-benchmark JSON file or directory, the results are compared
+# with it by benchmarks/reports/compare.py, and the script fails on regressions.
+# The record counts of the scale group are chosen by BENCHMARK_SCALE: small (default), medium, large or xlarge.
+#
 # Results stored in .benchmarks/<group>/
 # Plots stored in benchmarks/output/plots/<group>.png
 
@@ -21,6 +26,13 @@ if [ -z "$1" ]; then
     echo "  - context_caching"
     echo "  - storer"
     echo "  - find_paths"
+    echo "  - nt_serialization"
+    echo "  - triplestore"
+    echo "  - scale"
+    echo "  - memory"
+    echo "  - provenance"
+    echo "  - reader"
+    echo "  - counter_handler"
     exit 1
 fi
 
@@ -40,9 +52,30 @@ case "$GROUP" in
     find_paths)
         TEST_FILE="benchmarks/test_find_paths.py"
         ;;
+    nt_serialization)
+        TEST_FILE="benchmarks/test_nt_serialization.py"
+        ;;
+    triplestore)
+        TEST_FILE="benchmarks/test_triplestore.py"
+        ;;
+    scale)
+        TEST_FILE="benchmarks/test_scale.py"
+        ;;
+    memory)
+        TEST_FILE="benchmarks/test_memory.py"
+        ;;
+    provenance)
+        TEST_FILE="benchmarks/test_provenance.py"
+        ;;
+    reader)
+        TEST_FILE="benchmarks/test_reader.py"
+        ;;
+    counter_handler)
+        TEST_FILE="benchmarks/test_counter_handler.py"
+        ;;
     *)
         echo "Unknown benchmark group: $GROUP"
-        echo "Available groups: graph_diff, context_caching, storer, find_paths"
+        echo "Available groups: graph_diff, context_caching, storer, find_paths, nt_serialization, triplestore, scale, memory, provenance, reader, counter_handler"
         exit 1
         ;;
 esac
@@ -75,3 +108,8 @@ if [ -n "$BENCHMARK_FILE" ]; then
 else
     echo "No benchmark JSON file found in .benchmarks/$GROUP/"
 fi
+
+if [ -n "$BENCHMARK_BASELINE" ] && [ -n "$BENCHMARK_FILE" ]; then
+    echo "Comparing with baseline: $BENCHMARK_BASELINE"
+    poetry run python -m benchmarks.reports.compare "$BENCHMARK_BASELINE" "$BENCHMARK_FILE"
+fi
@@ -0,0 +1,801 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+In-process SPARQL endpoint used to benchmark uploads and imports without a triplestore.
+
+The endpoint is served over HTTP by a background thread, so requests go through the same
+client code used with a real triplestore. Data is kept in an in-memory quad store made of
+one TripleLite graph per named graph; the default graph of queries is the union of all graphs.
+
+Only the subset of SPARQL 1.1 emitted by oc_ocdm is supported:
+
+- ``SELECT`` (with ``DISTINCT``, ``*``, ``LIMIT`` and ``OFFSET``), ``CONSTRUCT`` and ``ASK`` queries
+  whose patterns are made of triple patterns, ``VALUES``, ``BIND``, ``FILTER``, ``OPTIONAL``,
+  ``UNION`` and ``GRAPH`` blocks;
+- ``INSERT DATA`` and ``DELETE DATA`` updates, also chained with ``;``.
+
+Anything else is answered with HTTP 400. Latency and server errors can be injected to
+reproduce the behaviour of a loaded triplestore.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from triplelite import RDFTerm, TripleLite
+
+from oc_ocdm.constants import XSD_STRING
+from oc_ocdm.support.query_utils import _triples_to_nt_lines
+from oc_ocdm.support.rdf_patch import _parse_object
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+|\#[^\n]*)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<literal>(?:"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+        (?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^(?:<[^<>\s]*>|[A-Za-z][\w-]*:(?:[\w-]|\.(?=[\w-]))*))?)
+    |(?P<var>[?$]\w+)
+    |(?P<number>[+-]?\d+(?:\.\d+)?)
+    |(?P<pname>(?:[A-Za-z][\w-]*)?:(?:[\w-]|\.(?=[\w-]))*)
+    |(?P<op>&&|\|\||!=|[{}().;,=!*])
+    |(?P<word>[A-Za-z_]\w*)
+    """,
+    re.VERBOSE,
+)
+_FUNCTIONS = {
+    "ISIRI": lambda term: term.type == "uri",
+    "ISURI": lambda term: term.type == "uri",
+    "ISLITERAL": lambda term: term.type == "literal",
+    "ISBLANK": lambda term: term.type == "bnode",
+    "STR": lambda term: RDFTerm("literal", term.value, XSD_STRING),
+    "LANG": lambda term: RDFTerm("literal", term.lang, XSD_STRING),
+    "DATATYPE": lambda term: RDFTerm("uri", term.datatype or XSD_STRING),
+}
+
+
+class SPARQLSyntaxError(ValueError):
+    """Raised for requests outside the SPARQL subset supported by the endpoint."""
+
+
+class _Var(object):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise SPARQLSyntaxError(f"Unexpected character at position {position}: {text[position : position + 20]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        value = match.group()
+        if kind == "word":
+            tokens.append(("word", value.upper()) if value != "a" else ("word", "a"))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+class _Parser(object):
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.prefixes = {}
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise SPARQLSyntaxError("Unexpected end of request.")
+        self.position += 1
+        return token
+
+    def accept(self, *values):
+        kind, value = self.peek()
+        if kind in ("word", "op") and value in values:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.accept(value):
+            raise SPARQLSyntaxError(f"Expected '{value}', found {self.peek()[1]!r}.")
+
+    def at_end(self):
+        return self.position >= len(self.tokens)
+
+    def prologue(self):
+        while True:
+            if self.accept("PREFIX"):
+                kind, name = self.next()
+                iri_kind, iri = self.next()
+                if kind != "pname" or iri_kind != "iri" or not name.endswith(":"):
+                    raise SPARQLSyntaxError("Invalid PREFIX declaration.")
+                self.prefixes[name[:-1]] = iri[1:-1]
+            elif self.accept("BASE"):
+                self.next()
+            else:
+                return
+
+    # Terms
+
+    def term(self, allow_var=True):
+        kind, value = self.next()
+        if kind == "var" and allow_var:
+            return _Var(value[1:])
+        if kind == "iri":
+            return RDFTerm("uri", value[1:-1])
+        if kind == "pname":
+            return RDFTerm("uri", self.expand(value))
+        if kind == "literal":
+            return self.literal(value)
+        if kind == "number":
+            datatype = "decimal" if "." in value else "integer"
+            return RDFTerm("literal", value, XSD + datatype)
+        if kind == "word" and value in ("TRUE", "FALSE"):
+            return RDFTerm("literal", value.lower(), XSD + "boolean")
+        if kind == "word" and value == "a":
+            return RDFTerm("uri", RDF_TYPE)
+        raise SPARQLSyntaxError(f"Unexpected token {value!r}.")
+
+    def expand(self, pname):
+        prefix, _, local = pname.partition(":")
+        if prefix not in self.prefixes:
+            raise SPARQLSyntaxError(f"Undeclared prefix '{prefix}:'.")
+        return self.prefixes[prefix] + local
+
+    def literal(self, token):
+        quote = token[0]
+        end = token.rindex(quote)
+        suffix = token[end + 1 :]
+        if suffix.startswith("^^") and not suffix.startswith("^^<"):
+            suffix = f"^^<{self.expand(suffix[2:])}>"
+        body = token[1:end]
+        if quote == "'":
+            body = body.replace("\\'", "'").replace('"', '\\"')
+        try:
+            return _parse_object(f'"{body}"{suffix}')
+        except ValueError as e:
+            raise SPARQLSyntaxError(str(e)) from e
+
+    # Graph patterns
+
+    def triples_block(self, allow_vars=True):
+        patterns = []
+        while True:
+            kind, value = self.peek()
+            if kind is None or (kind == "op" and value == "}") or kind == "word" and value != "a":
+                return patterns
+            subject = self.term(allow_vars)
+            while True:
+                predicate = self.term(allow_vars)
+                while True:
+                    patterns.append((subject, predicate, self.term(allow_vars)))
+                    if not self.accept(","):
+                        break
+                if not self.accept(";") or self.peek()[1] in (".", "}"):
+                    break
+            if not self.accept("."):
+                return patterns
+
+    def group(self):
+        self.expect("{")
+        elements = []
+        while not self.accept("}"):
+            kind, value = self.peek()
+            if kind == "op" and value == "{":
+                branches = [self.group()]
+                while self.accept("UNION"):
+                    branches.append(self.group())
+                elements.append(("union", branches))
+            elif self.accept("OPTIONAL"):
+                elements.append(("optional", self.group()))
+            elif self.accept("GRAPH"):
+                elements.append(("graph", self.term(), self.group()))
+            elif self.accept("VALUES"):
+                elements.append(self.values())
+            elif self.accept("BIND"):
+                self.expect("(")
+                expression = self.expression()
+                self.expect("AS")
+                variable = self.term()
+                self.expect(")")
+                if not isinstance(variable, _Var):
+                    raise SPARQLSyntaxError("BIND must assign a variable.")
+                elements.append(("bind", expression, variable.name))
+            elif self.accept("FILTER"):
+                elements.append(("filter", self.constraint()))
+            else:
+                patterns = self.triples_block()
+                if not patterns:
+                    raise SPARQLSyntaxError(f"Unexpected token {value!r}.")
+                elements.append(("triples", patterns))
+            self.accept(".")
+        return elements
+
+    def values(self):
+        if self.accept("("):
+            names = []
+            while not self.accept(")"):
+                names.append(self.term().name)
+            rows = []
+            self.expect("{")
+            while not self.accept("}"):
+                self.expect("(")
+                row = []
+                while not self.accept(")"):
+                    row.append(None if self.accept("UNDEF") else self.term(allow_var=False))
+                rows.append(row)
+        else:
+            variable = self.term()
+            if not isinstance(variable, _Var):
+                raise SPARQLSyntaxError("VALUES must bind a variable.")
+            names = [variable.name]
+            rows = []
+            self.expect("{")
+            while not self.accept("}"):
+                rows.append([None if self.accept("UNDEF") else self.term(allow_var=False)])
+        return ("values", names, rows)
+
+    # Expressions
+
+    def constraint(self):
+        kind, value = self.peek()
+        if kind == "op" and value == "(":
+            self.next()
+            expression = self.expression()
+            self.expect(")")
+            return expression
+        return self.primary()
+
+    def expression(self):
+        left = self.conjunction()
+        while self.accept("||"):
+            left = ("or", left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.relation()
+        while self.accept("&&"):
+            left = ("and", left, self.relation())
+        return left
+
+    def relation(self):
+        left = self.unary()
+        if self.accept("="):
+            return ("=", left, self.unary())
+        if self.accept("!="):
+            return ("!=", left, self.unary())
+        return left
+
+    def unary(self):
+        if self.accept("!"):
+            return ("not", self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.peek()
+        if kind == "op" and value == "(":
+            self.next()
+            expression = self.expression()
+            self.expect(")")
+            return expression
+        if kind == "word" and (value in _FUNCTIONS or value in ("BOUND", "SAMETERM")):
+            self.next()
+            self.expect("(")
+            arguments = [self.expression()]
+            while self.accept(","):
+                arguments.append(self.expression())
+            self.expect(")")
+            return ("call", value, arguments)
+        return ("term", self.term())
+
+    # Queries and updates
+
+    def query(self):
+        self.prologue()
+        if self.accept("SELECT"):
+            distinct = self.accept("DISTINCT", "REDUCED")
+            variables = None
+            if not self.accept("*"):
+                variables = []
+                while self.peek()[0] == "var":
+                    variables.append(self.term().name)
+                if not variables:
+                    raise SPARQLSyntaxError("SELECT requires at least one variable.")
+            self.accept("WHERE")
+            where = self.group()
+            limit, offset = self.modifiers()
+            return ("select", variables, distinct, where, limit, offset)
+        if self.accept("CONSTRUCT"):
+            if self.accept("WHERE"):
+                self.expect("{")
+                template = self.triples_block()
+                self.expect("}")
+                where = [("triples", template)]
+            else:
+                self.expect("{")
+                template = self.triples_block()
+                self.expect("}")
+                self.accept("WHERE")
+                where = self.group()
+            limit, offset = self.modifiers()
+            return ("construct", template, where, limit, offset)
+        if self.accept("ASK"):
+            self.accept("WHERE")
+            where = self.group()
+            self.modifiers()
+            return ("ask", where)
+        raise SPARQLSyntaxError("Only SELECT, CONSTRUCT and ASK queries are supported.")
+
+    def modifiers(self):
+        limit = offset = None
+        while True:
+            if self.accept("LIMIT"):
+                limit = int(self.next()[1])
+            elif self.accept("OFFSET"):
+                offset = int(self.next()[1])
+            elif self.at_end():
+                return limit, offset
+            else:
+                raise SPARQLSyntaxError(f"Unsupported solution modifier {self.peek()[1]!r}.")
+
+    def update(self):
+        operations = []
+        while True:
+            self.prologue()
+            if self.at_end():
+                return operations
+            if self.accept("INSERT"):
+                operation = "insert"
+            elif self.accept("DELETE"):
+                operation = "delete"
+            else:
+                raise SPARQLSyntaxError("Only INSERT DATA and DELETE DATA updates are supported.")
+            self.expect("DATA")
+            operations.append((operation, self.quads()))
+            if not self.accept(";"):
+                if not self.at_end():
+                    raise SPARQLSyntaxError(f"Unexpected token {self.peek()[1]!r}.")
+                return operations
+
+    def quads(self):
+        quads = []
+        self.expect("{")
+        while not self.accept("}"):
+            if self.accept("GRAPH"):
+                graph = self.term(allow_var=False).value
+                self.expect("{")
+                quads.extend((triple, graph) for triple in self.triples_block(allow_vars=False))
+                self.expect("}")
+            else:
+                triples = self.triples_block(allow_vars=False)
+                if not triples:
+                    raise SPARQLSyntaxError(f"Unexpected token {self.peek()[1]!r}.")
+                quads.extend((triple, None) for triple in triples)
+            self.accept(".")
+        return [((s.value, p.value, o), graph) for (s, p, o), graph in quads]
+
+
+def _resolve(term, solution):
+    if isinstance(term, _Var):
+        return solution.get(term.name)
+    return term
+
+
+def _evaluate(expression, solution):
+    operator = expression[0]
+    if operator == "term":
+        value = _resolve(expression[1], solution)
+        if value is None:
+            raise LookupError(expression[1].name)
+        return value
+    if operator == "or":
+        return _effective_boolean(expression[1], solution) or _effective_boolean(expression[2], solution)
+    if operator == "and":
+        return _effective_boolean(expression[1], solution) and _effective_boolean(expression[2], solution)
+    if operator == "not":
+        return not _effective_boolean(expression[1], solution)
+    if operator in ("=", "!="):
+        equal = _evaluate(expression[1], solution) == _evaluate(expression[2], solution)
+        return equal if operator == "=" else not equal
+    name, arguments = expression[1], expression[2]
+    if name == "BOUND":
+        return _resolve(arguments[0][1], solution) is not None
+    values = [_evaluate(argument, solution) for argument in arguments]
+    if name == "SAMETERM":
+        return values[0] == values[1]
+    return _FUNCTIONS[name](values[0])
+
+
+def _effective_boolean(expression, solution):
+    try:
+        value = _evaluate(expression, solution)
+    except (LookupError, AttributeError):
+        # Unbound variables and type errors make a filter fail
+        return False
+    if isinstance(value, bool):
+        return value
+    if value.type == "literal":
+        if value.datatype == XSD + "boolean":
+            return value.value == "true"
+        return value.value not in ("", "0")
+    return True
+
+
+def _join(left, right):
+    if left == [{}]:
+        return right
+    if right == [{}]:
+        return left
+    joined = []
+    for left_solution in left:
+        for right_solution in right:
+            if all(left_solution[k] == v for k, v in right_solution.items() if k in left_solution):
+                joined.append({**left_solution, **right_solution})
+    return joined
+
+
+def _match(pattern, solutions, graphs):
+    matched = []
+    for solution in solutions:
+        s, p, o = (_resolve(term, solution) for term in pattern)
+        s_value = s.value if s is not None else None
+        p_value = p.value if p is not None else None
+        for graph in graphs:
+            for ts, tp, to in graph.triples((s_value, p_value, o)):
+                new_solution = dict(solution)
+                bindings = ((pattern[0], RDFTerm("uri", ts)), (pattern[1], RDFTerm("uri", tp)), (pattern[2], to))
+                for term, value in bindings:
+                    if isinstance(term, _Var):
+                        # The same variable may appear twice in a pattern
+                        if new_solution.setdefault(term.name, value) != value:
+                            break
+                else:
+                    matched.append(new_solution)
+    return matched
+
+
+class LocalSPARQLEndpoint(object):
+    """
+    A SPARQL endpoint served over HTTP by a background thread and backed by an in-memory quad store.
+
+    Args:
+        latency: Seconds to wait before answering every request
+        error_rate: Probability of answering a request with ``error_status`` instead of executing it
+        error_status: HTTP status code of the injected errors
+        seed: Seed of the random generator used for error injection
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=503, seed=None):
+        if latency < 0:
+            raise ValueError("latency must be a non-negative number.")
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.request_counts = Counter()
+        self._random = random.Random(seed)
+        self._failures = []
+        self._graphs = {}
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+        self.url = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Start serving requests on a free local port.
+
+        Returns:
+            The URL of the endpoint
+        """
+        if self._server is None:
+            self._server = ThreadingHTTPServer(("127.0.0.1", 0), _RequestHandler)
+            self._server.daemon_threads = True
+            self._server.endpoint = self
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+            host, port = self._server.server_address[:2]
+            self.url = f"http://{host}:{port}/sparql"
+        return self.url
+
+    def stop(self):
+        """Stop serving requests. The content of the store is kept."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    # Store
+
+    def add(self, triples, graph=None):
+        """
+        Add triples to a graph of the store.
+
+        Args:
+            triples: Iterable of (subject, predicate, object) triples, as in TripleLite
+            graph: IRI of the named graph, or None for the default graph
+        """
+        with self._lock:
+            self._get_graph(graph).add_many(triples)
+
+    def load(self, abstract_set):
+        """
+        Add the triples of every entity of a GraphSet or a ProvSet to the store.
+
+        Args:
+            abstract_set: The set whose entities are loaded, each in its own named graph
+        """
+        with self._lock:
+            for entity in abstract_set.res_to_entity.values():
+                self._get_graph(entity.g.identifier).add_many(entity.g)
+
+    def triples(self, graph=None):
+        """
+        Return a snapshot of the triples of the store.
+
+        Args:
+            graph: IRI of a named graph. If None, the triples of all the graphs are returned
+
+        Returns:
+            A set of (subject, predicate, object) triples
+        """
+        with self._lock:
+            if graph is not None:
+                return set(self._graphs[graph]) if graph in self._graphs else set()
+            return {triple for g in self._graphs.values() for triple in g}
+
+    def graph_names(self):
+        """Return the IRIs of the non-empty named graphs of the store."""
+        with self._lock:
+            return {name for name, g in self._graphs.items() if name is not None and len(g)}
+
+    def clear(self):
+        """Remove every triple from the store and reset the request counters."""
+        with self._lock:
+            self._graphs.clear()
+            self.request_counts.clear()
+
+    def fail_next(self, count=1, status_code=None):
+        """
+        Answer the next ``count`` requests with an HTTP error.
+
+        Args:
+            count: Number of requests to fail
+            status_code: HTTP status code of the errors, ``error_status`` if None
+        """
+        with self._lock:
+            self._failures.extend([status_code or self.error_status] * count)
+
+    def _get_graph(self, name):
+        graph = self._graphs.get(name)
+        if graph is None:
+            graph = TripleLite(identifier=name)
+            self._graphs[name] = graph
+        return graph
+
+    # Execution
+
+    def query(self, text):
+        """
+        Execute a query against the store, without going through HTTP.
+
+        Args:
+            text: A SELECT, CONSTRUCT or ASK query
+
+        Returns:
+            The SPARQL JSON results of SELECT and ASK queries as a dictionary,
+            the set of constructed triples for CONSTRUCT queries
+
+        Raises:
+            SPARQLSyntaxError: If the query is outside the supported subset
+        """
+        parsed = _Parser(text).query()
+        with self._lock:
+            graphs = [g for g in self._graphs.values() if len(g)]
+            kind = parsed[0]
+            if kind == "ask":
+                return {"head": {}, "boolean": bool(self._group(parsed[1], [{}], graphs))}
+            if kind == "construct":
+                _, template, where, limit, offset = parsed
+                solutions = self._slice(self._group(where, [{}], graphs), limit, offset)
+                return self._construct(template, solutions)
+            _, variables, distinct, where, limit, offset = parsed
+            solutions = self._group(where, [{}], graphs)
+        if variables is None:
+            variables = list(dict.fromkeys(name for solution in solutions for name in solution))
+        rows = [tuple(solution.get(name) for name in variables) for solution in solutions]
+        if distinct:
+            rows = list(dict.fromkeys(rows))
+        bindings = [
+            {name: _term_to_json(value) for name, value in zip(variables, row) if value is not None}
+            for row in self._slice(rows, limit, offset)
+        ]
+        return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+    def update(self, text):
+        """
+        Execute INSERT DATA and DELETE DATA operations against the store, in order.
+
+        Args:
+            text: The SPARQL update
+
+        Raises:
+            SPARQLSyntaxError: If the update is outside the supported subset
+        """
+        operations = _Parser(text).update()
+        with self._lock:
+            for operation, quads in operations:
+                for triple, graph in quads:
+                    if operation == "insert":
+                        self._get_graph(graph).add(triple)
+                    elif graph in self._graphs:
+                        self._graphs[graph].remove(triple)
+
+    @staticmethod
+    def _slice(items, limit, offset):
+        start = offset or 0
+        return items[start : start + limit] if limit is not None else items[start:]
+
+    @staticmethod
+    def _construct(template, solutions):
+        triples = set()
+        for solution in solutions:
+            for pattern in template:
+                s, p, o = (_resolve(term, solution) for term in pattern)
+                if s is not None and p is not None and o is not None and s.type == "uri" and p.type == "uri":
+                    triples.add((s.value, p.value, o))
+        return triples
+
+    def _group(self, elements, solutions, graphs):
+        filters = []
+        for element in elements:
+            kind = element[0]
+            if kind == "triples":
+                for pattern in element[1]:
+                    solutions = _match(pattern, solutions, graphs)
+            elif kind == "values":
+                _, names, rows = element
+                table = [{name: value for name, value in zip(names, row) if value is not None} for row in rows]
+                solutions = _join(solutions, table)
+            elif kind == "bind":
+                _, expression, name = element
+                bound = []
+                for solution in solutions:
+                    try:
+                        bound.append({**solution, name: _evaluate(expression, solution)})
+                    except (LookupError, AttributeError):
+                        bound.append(solution)
+                solutions = bound
+            elif kind == "union":
+                union = [result for branch in element[1] for result in self._group(branch, [{}], graphs)]
+                solutions = _join(solutions, union)
+            elif kind == "optional":
+                optional = self._group(element[1], [{}], graphs)
+                extended = []
+                for solution in solutions:
+                    matches = _join([solution], optional)
+                    extended.extend(matches or [solution])
+                solutions = extended
+            elif kind == "graph":
+                solutions = self._graph(element[1], element[2], solutions)
+            else:
+                filters.append(element[1])
+        for expression in filters:
+            solutions = [solution for solution in solutions if _effective_boolean(expression, solution)]
+        return solutions
+
+    def _graph(self, name, elements, solutions):
+        matched = []
+        for graph_name, graph in self._graphs.items():
+            if graph_name is None or not len(graph):
+                continue
+            graph_term = RDFTerm("uri", graph_name)
+            if isinstance(name, _Var):
+                inner = self._group(elements, [{name.name: graph_term}], [graph])
+                matched.extend(_join(solutions, inner))
+            elif name == graph_term:
+                matched.extend(_join(solutions, self._group(elements, [{}], [graph])))
+        return matched
+
+
+def _term_to_json(term):
+    if term.type == "uri":
+        return {"type": "uri", "value": term.value}
+    if term.type == "bnode":
+        return {"type": "bnode", "value": term.value}
+    result = {"type": "literal", "value": term.value}
+    if term.lang:
+        result["xml:lang"] = term.lang
+    elif term.datatype:
+        result["datatype"] = term.datatype
+    return result
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8")
+        params = parse_qs(urlparse(self.path).query)
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        if content_type == "application/sparql-query":
+            params["query"] = [body]
+        elif content_type == "application/sparql-update":
+            params["update"] = [body]
+        else:
+            params.update(parse_qs(body))
+        self._handle(params)
+
+    def _handle(self, params):
+        endpoint = self.server.endpoint
+        if endpoint.latency:
+            time.sleep(endpoint.latency)
+        with endpoint._lock:
+            if endpoint._failures:
+                status = endpoint._failures.pop(0)
+            elif endpoint.error_rate and endpoint._random.random() < endpoint.error_rate:
+                status = endpoint.error_status
+            else:
+                status = None
+            endpoint.request_counts["error" if status else "update" if "update" in params else "query"] += 1
+        if status is not None:
+            return self._reply(status, "text/plain", b"Injected error")
+        try:
+            if "update" in params:
+                endpoint.update(params["update"][0])
+                return self._reply(200, "text/plain", b"")
+            if "query" not in params:
+                return self._reply(400, "text/plain", b"Missing query or update parameter")
+            result = endpoint.query(params["query"][0])
+        except SPARQLSyntaxError as e:
+            return self._reply(400, "text/plain", str(e).encode("utf-8"))
+        if isinstance(result, set):
+            self._reply(200, "text/turtle", "\n".join(_triples_to_nt_lines(result)).encode("utf-8"))
+        else:
+            self._reply(200, "application/sparql-results+json", json.dumps(result).encode("utf-8"))
+
+    def _reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -12,6 +12,7 @@ import pytest
 from rdflib import Dataset
 
 from benchmarks.conftest import BENCHMARK_ROUNDS, create_populated_graph_set
+from oc_ocdm.storer import Storer
 
 CONTEXT_URL = "https://raw.githubusercontent.com/opencitations/corpus/master/context.json"
 
@@ -37,18 +38,23 @@ CONTEXT_DATA = {
 }
 
 
+def create_dataset(graph_set):
+    dataset = Dataset()
+    storer = Storer(graph_set)
+    for entity in graph_set.res_to_entity.values():
+        dataset.addN(storer._entity_triples_as_rdflib_quads(entity))  # type: ignore[arg-type]
+    return dataset
+
+
 class TestContextCaching:
     @pytest.mark.benchmark(group="context_caching")
     @pytest.mark.parametrize("entity_count", [10, 50, 100])
-    def test_serialize_with_local_context(self, benchmark, redis_counter_handler, entity_count):
+    def test_serialize_with_local_context(self, benchmark, counter_handler, entity_count):
         """Benchmark with local context dict (current hack approach)."""
 
         def setup():
-            graph_set, _ = create_populated_graph_set(redis_counter_handler, entity_count)
-            dataset = Dataset()
-            for g in graph_set.graphs():
-                dataset.addN((s, p, o, g.identifier) for s, p, o in g)  # type: ignore[arg-type]
-            return (dataset,), {}
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (create_dataset(graph_set),), {}
 
         def serialize(dataset):
             return dataset.serialize(format="json-ld", context=CONTEXT_DATA)
@@ -58,15 +64,12 @@ class TestContextCaching:
 
     @pytest.mark.benchmark(group="context_caching")
     @pytest.mark.parametrize("entity_count", [10, 50, 100])
-    def test_serialize_with_remote_context(self, benchmark, redis_counter_handler, entity_count):
+    def test_serialize_with_remote_context(self, benchmark, counter_handler, entity_count):
         """Benchmark with remote context URL (fetches from network)."""
 
         def setup():
-            graph_set, _ = create_populated_graph_set(redis_counter_handler, entity_count)
-            dataset = Dataset()
-            for g in graph_set.graphs():
-                dataset.addN((s, p, o, g.identifier) for s, p, o in g)  # type: ignore[arg-type]
-            return (dataset,), {}
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (create_dataset(graph_set),), {}
 
         def serialize(dataset):
             return dataset.serialize(format="json-ld", context=CONTEXT_URL)
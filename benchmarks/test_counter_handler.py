@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import pytest
+
+from benchmarks.conftest import BENCHMARK_ROUNDS
+from oc_ocdm.counter_handler.binary_filesystem_counter_handler import BinaryFilesystemCounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+# Snapshots created by each round, one for each of the last entities
+SNAPSHOT_COUNT = 200
+
+
+class TestCounterHandlerLeases:
+    @pytest.mark.benchmark(group="counter_handler")
+    @pytest.mark.parametrize("handler_class", [FilesystemCounterHandler, BinaryFilesystemCounterHandler])
+    @pytest.mark.parametrize("entity_count", [1_000, 10_000, 100_000])
+    def test_snapshot_counters(self, benchmark, tmp_path, handler_class, entity_count):
+        """
+        Snapshot counters are never leased, so each increment takes the file lock. The text format
+        also rewrites the whole provenance file every time, hence its cost grows with the number
+        of entities, while the binary format updates the counter in place.
+        """
+        info_dir = str(tmp_path) + "/"
+        existing = handler_class(info_dir)
+        existing.set_counters_batch({("br", "se"): dict.fromkeys(range(1, entity_count + 1), 1)}, "")
+        existing.flush()
+        counter_handler = handler_class(info_dir, lease_size=1000)
+        identifiers = range(entity_count - SNAPSHOT_COUNT + 1, entity_count + 1)
+
+        def create_snapshots():
+            return [counter_handler.increment_counter("br", "se", identifier) for identifier in identifiers]
+
+        result = benchmark.pedantic(create_snapshots, rounds=BENCHMARK_ROUNDS)
+        assert len(result) == SNAPSHOT_COUNT
@@ -3,35 +3,22 @@
 # SPDX-License-Identifier: ISC
 
 import pytest
-from rdflib import Graph
 
 from benchmarks.conftest import BENCHMARK_ROUNDS, create_populated_graph_set
 from oc_ocdm.support.query_utils import _compute_graph_changes
 
 
-class MockEntity:
-    def __init__(self, current_graph, preexisting_graph):
-        self.g = current_graph
-        self.preexisting_graph = preexisting_graph
-        self.to_be_deleted = False
-
-
 class TestGraphDiff:
     @pytest.mark.benchmark(group="graph_diff")
     @pytest.mark.parametrize("entity_count", [50, 100, 150])
-    def test_compute_graph_changes_modified(self, benchmark, redis_counter_handler, entity_count):
+    def test_compute_graph_changes_modified(self, benchmark, counter_handler, entity_count):
         def setup():
-            graph_set, brs = create_populated_graph_set(redis_counter_handler, entity_count)
-            entities = []
-            for entity in graph_set.res_to_entity.values():
-                preexisting = Graph()
-                for triple in entity.g:
-                    preexisting.add(triple)  # type: ignore[arg-type]
-                mock = MockEntity(entity.g, preexisting)
-                entities.append(mock)
+            graph_set, brs = create_populated_graph_set(counter_handler, entity_count)
+            # The current state becomes the preexisting state of every entity
+            graph_set.commit_changes()
             for i, br in enumerate(brs):
                 br.has_title(f"Modified Title {i}")
-            return (entities,), {}
+            return (list(graph_set.res_to_entity.values()),), {}
 
         def compute_changes(entities):
             results = []
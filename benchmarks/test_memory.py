@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Benchmarks of the memory footprint of the main operations of the library.
+
+Besides the usual timings, every benchmark records the peak and retained memory per entity
+(see benchmarks/memory.py), which are saved in the "memory" entry of the extra info of the
+pytest-benchmark JSON and plotted by benchmarks/reports/plot_generator.py.
+"""
+
+import os
+import tempfile
+
+import pytest
+from triplelite import TripleLite
+
+from benchmarks.conftest import (
+    BASE_IRI,
+    BENCHMARK_ROUNDS,
+    RESP_AGENT,
+    SUPPLIER_PREFIX,
+    create_populated_graph_set,
+    create_prov_set,
+    store_zip_dump,
+)
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.reader import Reader
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as directory:
+        yield directory
+
+
+class TestMemory:
+    @pytest.mark.benchmark(group="memory")
+    @pytest.mark.parametrize("entity_count", [100, 500])
+    def test_graph_set_construction(self, benchmark, counter_handler, record_memory, entity_count):
+        def build():
+            return create_populated_graph_set(counter_handler, entity_count)
+
+        graph_set, _ = benchmark.pedantic(build, rounds=BENCHMARK_ROUNDS)
+        memory = record_memory(build, entity_count=len(graph_set.res_to_entity))
+        assert memory["retained_bytes"] > 0
+
+    @pytest.mark.benchmark(group="memory")
+    @pytest.mark.parametrize("entity_count", [100, 500])
+    def test_generate_provenance(self, benchmark, counter_handler, record_memory, entity_count):
+        def setup():
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (graph_set,), {}
+
+        def generate_provenance(graph_set):
+            prov_set = create_prov_set(graph_set, counter_handler)
+            prov_set.generate_provenance()
+            return prov_set
+
+        prov_set = benchmark.pedantic(generate_provenance, setup=setup, rounds=BENCHMARK_ROUNDS)
+        memory = record_memory(generate_provenance, setup, len(prov_set.res_to_entity))
+        assert memory["retained_bytes"] > 0
+
+    @pytest.mark.benchmark(group="memory")
+    @pytest.mark.parametrize("entity_count", [100, 500])
+    def test_store_all(self, benchmark, counter_handler, record_memory, temp_dir, entity_count):
+        def setup():
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (graph_set, tempfile.mkdtemp(dir=temp_dir)), {}
+
+        paths = benchmark.pedantic(store_zip_dump, setup=setup, rounds=BENCHMARK_ROUNDS)
+        graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+        record_memory(store_zip_dump, setup, len(graph_set.res_to_entity))
+        assert all(os.path.isfile(path) for path in paths)
+
+    @pytest.mark.benchmark(group="memory")
+    @pytest.mark.parametrize("entity_count", [100, 500])
+    def test_reader_load(self, benchmark, counter_handler, record_memory, temp_dir, entity_count):
+        graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+        paths = store_zip_dump(graph_set, temp_dir)
+
+        def load(paths):
+            reader = Reader()
+            return [reader.load(path) for path in paths]
+
+        datasets = benchmark.pedantic(load, args=(paths,), rounds=BENCHMARK_ROUNDS)
+        record_memory(load, lambda: ((paths,), {}), len(graph_set.res_to_entity))
+        assert all(dataset is not None for dataset in datasets)
+
+    @pytest.mark.benchmark(group="memory")
+    @pytest.mark.parametrize("entity_count", [100, 500])
+    def test_import_entities_from_graph(self, benchmark, counter_handler, record_memory, entity_count):
+        source, _ = create_populated_graph_set(counter_handler, entity_count)
+        graph = TripleLite()
+        for entity in source.res_to_entity.values():
+            graph.add_many(entity.g)
+
+        def setup():
+            graph_set = GraphSet(base_iri=BASE_IRI, wanted_label=False, supplier_prefix=SUPPLIER_PREFIX)
+            return (graph_set, graph, RESP_AGENT), {}
+
+        imported = benchmark.pedantic(Reader.import_entities_from_graph, setup=setup, rounds=BENCHMARK_ROUNDS)
+        record_memory(Reader.import_entities_from_graph, setup, len(source.res_to_entity))
+        assert len(imported) == len(source.res_to_entity)
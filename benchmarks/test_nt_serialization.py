@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import pytest
+from triplelite import XSD_STRING, RDFTerm
+
+from benchmarks.conftest import BASE_IRI, BENCHMARK_ROUNDS
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.support.query_utils import MAX_TRIPLES_PER_QUERY, get_insert_query
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+def create_triples(entity_count):
+    """
+    Create the triples of ``entity_count`` bibliographic resources: a type, a title and an identifier.
+    One title out of ten contains quotes, tabs, newlines and backslashes, and one out of a hundred
+    also contains a control character without a short escape sequence.
+    """
+    triples = set()
+    for i in range(1, entity_count + 1):
+        res = f"{BASE_IRI}br/060{i}"
+        if i % 100 == 0:
+            title = f'The "{i}" case:\tnotes\nand\\or remarks\x0b'
+        elif i % 10 == 0:
+            title = f'The "{i}" case:\tnotes\nand\\or remarks'
+        else:
+            title = f"A study of citation number {i}"
+        triples.add((res, RDF_TYPE, RDFTerm("uri", GraphEntity.iri_expression)))
+        triples.add((res, GraphEntity.iri_title, RDFTerm("literal", title, XSD_STRING)))
+        triples.add((res, GraphEntity.iri_has_identifier, RDFTerm("uri", f"{BASE_IRI}id/060{i}")))
+    return triples
+
+
+class TestNTriplesSerialization:
+    @pytest.mark.benchmark(group="nt_serialization")
+    @pytest.mark.parametrize("entity_count", [1000, 10000, 50000])
+    def test_get_insert_query(self, benchmark, entity_count):
+        triples = create_triples(entity_count)
+
+        queries, num_of_statements = benchmark.pedantic(
+            get_insert_query, args=(f"{BASE_IRI}br/", triples), rounds=BENCHMARK_ROUNDS
+        )
+        assert num_of_statements == entity_count * 3
+        assert len(queries) == -(-num_of_statements // MAX_TRIPLES_PER_QUERY)
+        all_queries = "".join(queries)
+        assert "\\t" in all_queries and "\\u000B" in all_queries
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Benchmarks of ProvSet.generate_provenance on creation, modification, merge and deletion scenarios.
+
+Apart from creation, every scenario starts from entities whose creation snapshots were already
+generated and committed, as in a second run of a pipeline.
+"""
+
+import pytest
+
+from benchmarks.conftest import BENCHMARK_ROUNDS, create_populated_graph_set, create_prov_set
+
+
+def create_committed_graph_set(handler, entity_count):
+    """Create a populated GraphSet whose creation snapshots have been generated and committed."""
+    graph_set, brs = create_populated_graph_set(handler, entity_count)
+    create_prov_set(graph_set, handler).generate_provenance()
+    graph_set.commit_changes()
+    return graph_set, brs
+
+
+def generate_provenance(prov_set):
+    return prov_set.generate_provenance()
+
+
+class TestProvenance:
+    @pytest.mark.benchmark(group="provenance")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_creation(self, benchmark, counter_handler, entity_count):
+        def setup():
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (create_prov_set(graph_set, counter_handler),), {}
+
+        modified = benchmark.pedantic(generate_provenance, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert len(modified) >= entity_count * 14
+
+    @pytest.mark.benchmark(group="provenance")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_modification(self, benchmark, counter_handler, entity_count):
+        def setup():
+            graph_set, brs = create_committed_graph_set(counter_handler, entity_count)
+            for i, br in enumerate(brs):
+                br.has_title(f"Modified Title {i}")
+                br.remove_pub_date()
+            return (create_prov_set(graph_set, counter_handler),), {}
+
+        modified = benchmark.pedantic(generate_provenance, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert len(modified) == entity_count
+
+    @pytest.mark.benchmark(group="provenance")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_merge(self, benchmark, counter_handler, entity_count):
+        def setup():
+            graph_set, brs = create_committed_graph_set(counter_handler, entity_count)
+            # Every article absorbs the following one, which is deleted
+            for br, other in zip(brs[::2], brs[1::2]):
+                br.merge(other)
+            return (create_prov_set(graph_set, counter_handler),), {}
+
+        modified = benchmark.pedantic(generate_provenance, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert len(modified) == entity_count // 2 * 2
+
+    @pytest.mark.benchmark(group="provenance")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_deletion(self, benchmark, counter_handler, entity_count):
+        def setup():
+            graph_set, brs = create_committed_graph_set(counter_handler, entity_count)
+            for br in brs:
+                br.mark_as_to_be_deleted()
+            return (create_prov_set(graph_set, counter_handler),), {}
+
+        modified = benchmark.pedantic(generate_provenance, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert len(modified) == entity_count
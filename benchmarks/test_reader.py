@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Benchmarks of the Reader on zipped JSON-LD dumps of DataFactory records and their provenance.
+"""
+
+import pytest
+
+from benchmarks.conftest import (
+    BASE_IRI,
+    BENCHMARK_ROUNDS,
+    RESP_AGENT,
+    SUPPLIER_PREFIX,
+    create_populated_graph_set,
+    create_prov_set,
+    store_zip_dump,
+)
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.reader import Reader
+
+
+@pytest.fixture
+def zip_dump(tmp_path, counter_handler, entity_count):
+    """Zipped JSON-LD dump of ``entity_count`` records: (data file paths, provenance file paths, entities)."""
+    graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+    prov_set = create_prov_set(graph_set, counter_handler)
+    prov_set.generate_provenance()
+    data_paths = store_zip_dump(graph_set, tmp_path)
+    prov_paths = store_zip_dump(prov_set, tmp_path)
+    return data_paths, prov_paths, len(graph_set.res_to_entity)
+
+
+def load_all(paths):
+    reader = Reader()
+    return [reader.load(path) for path in paths]
+
+
+def load_all_jsonld_dicts(paths):
+    reader = Reader()
+    return [reader.load_jsonld_dict(path) for path in paths]
+
+
+class TestReader:
+    @pytest.mark.benchmark(group="reader")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_load(self, benchmark, zip_dump, entity_count):
+        data_paths, prov_paths, _ = zip_dump
+        paths = data_paths + prov_paths
+
+        datasets = benchmark.pedantic(load_all, args=(paths,), rounds=BENCHMARK_ROUNDS)
+        assert all(dataset is not None and len(dataset) > 0 for dataset in datasets)
+
+    @pytest.mark.benchmark(group="reader")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_load_jsonld_dict(self, benchmark, zip_dump, entity_count):
+        data_paths, prov_paths, entities = zip_dump
+        paths = data_paths + prov_paths
+
+        documents = benchmark.pedantic(load_all_jsonld_dicts, args=(paths,), rounds=BENCHMARK_ROUNDS)
+        data_documents = documents[: len(data_paths)]
+        assert sum(len(graph["@graph"]) for document in data_documents for graph in document) == entities
+
+    @pytest.mark.benchmark(group="reader")
+    @pytest.mark.parametrize("entity_count", [100, 250, 500])
+    def test_import_entities_from_graph(self, benchmark, zip_dump, entity_count):
+        data_paths, _, entities = zip_dump
+        datasets = load_all(data_paths)
+
+        def setup():
+            graph_set = GraphSet(base_iri=BASE_IRI, wanted_label=False, supplier_prefix=SUPPLIER_PREFIX)
+            return (graph_set,), {}
+
+        def import_entities(graph_set):
+            for dataset in datasets:
+                Reader.import_entities_from_graph(graph_set, dataset, RESP_AGENT)
+            return graph_set
+
+        graph_set = benchmark.pedantic(import_entities, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert len(graph_set.res_to_entity) == entities
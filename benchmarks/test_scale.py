@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Throughput of the whole pipeline (data generation, provenance, storage) at increasing scale.
+
+The record counts depend on the BENCHMARK_SCALE environment variable (see SCALE_TIERS in conftest.py).
+Records are processed in chunks of CHUNK_SIZE, so memory does not grow with the tier.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import pytest
+
+from benchmarks.conftest import (
+    BASE_IRI,
+    SCALE_RECORD_COUNTS,
+    create_prov_set,
+    iter_populated_graph_sets,
+    scale_rounds,
+)
+from oc_ocdm.storer import Storer
+
+STAGES = ("populate", "provenance", "store")
+
+
+class TestScale:
+    @pytest.mark.benchmark(group="scale")
+    @pytest.mark.parametrize("record_count", SCALE_RECORD_COUNTS)
+    def test_pipeline(self, benchmark, counter_handler, record_throughput, record_count):
+        stage_seconds = dict.fromkeys(STAGES, 0.0)
+        stage_counts = {}
+
+        def setup():
+            return (tempfile.mkdtemp(),), {}
+
+        def run_pipeline(temp_dir):
+            entities = triples = prov_entities = prov_triples = 0
+            chunks = iter_populated_graph_sets(counter_handler, record_count)
+            while True:
+                start = time.perf_counter()
+                chunk = next(chunks, None)
+                stage_seconds["populate"] += time.perf_counter() - start
+                if chunk is None:
+                    break
+                graph_set, _ = chunk
+                entities += len(graph_set.res_to_entity)
+                triples += sum(len(entity.g) for entity in graph_set.res_to_entity.values())
+
+                start = time.perf_counter()
+                prov_set = create_prov_set(graph_set, counter_handler)
+                prov_set.generate_provenance()
+                stage_seconds["provenance"] += time.perf_counter() - start
+                prov_entities += len(prov_set.res_to_entity)
+                prov_triples += sum(len(entity.g) for entity in prov_set.res_to_entity.values())
+
+                start = time.perf_counter()
+                for abstract_set in (graph_set, prov_set):
+                    storer = Storer(abstract_set, output_format="json-ld", zip_output=True, n_file_item=1000)
+                    storer.store_all(temp_dir + os.sep, BASE_IRI)
+                stage_seconds["store"] += time.perf_counter() - start
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            stage_counts["populate"] = (record_count, entities, triples)
+            stage_counts["provenance"] = (record_count, entities, prov_triples)
+            stage_counts["store"] = (record_count, entities + prov_entities, triples + prov_triples)
+            return entities
+
+        entities = benchmark.pedantic(run_pipeline, setup=setup, rounds=scale_rounds(record_count))
+        record_throughput(stage_counts, stage_seconds)
+        # Journal hierarchies and publishers are shared by 20 records, so a record has 9.3 entities
+        assert entities == record_count * 9 + -(-record_count // 20) * 6
@@ -16,9 +16,9 @@ from oc_ocdm.storer import Storer
 class TestStorer:
     @pytest.mark.benchmark(group="storer")
     @pytest.mark.parametrize("entity_count", [50, 100, 200])
-    def test_store_all(self, benchmark, redis_counter_handler, entity_count):
+    def test_store_all(self, benchmark, counter_handler, entity_count):
         def setup():
-            graph_set, _ = create_populated_graph_set(redis_counter_handler, entity_count)
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
             prov_set = ProvSet(prov_subj_graph_set=graph_set, base_iri=BASE_IRI, wanted_label=False)
             prov_set.generate_provenance()
             temp_dir = tempfile.mkdtemp()
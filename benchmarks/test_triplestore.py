@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import asyncio
+
+import pytest
+
+from benchmarks.conftest import (
+    BASE_IRI,
+    BENCHMARK_ROUNDS,
+    RESP_AGENT,
+    SUPPLIER_PREFIX,
+    create_populated_graph_set,
+)
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.reader import Reader
+from oc_ocdm.storer import Storer
+
+# Round-trip time of a triplestore on the same network
+LATENCY = 0.002
+
+
+def count_triples(graph_set):
+    return sum(len(entity.g) for entity in graph_set.res_to_entity.values())
+
+
+def create_empty_graph_set():
+    return GraphSet(base_iri=BASE_IRI, wanted_label=False, supplier_prefix=SUPPLIER_PREFIX)
+
+
+class TestTriplestore:
+    @pytest.mark.benchmark(group="triplestore")
+    @pytest.mark.parametrize("entity_count", [50, 200])
+    def test_upload_all(self, benchmark, counter_handler, sparql_endpoint, entity_count):
+        sparql_endpoint.latency = LATENCY
+
+        def setup():
+            sparql_endpoint.clear()
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (Storer(graph_set),), {}
+
+        def upload(storer):
+            return storer.upload_all(sparql_endpoint.url, batch_size=10)
+
+        assert benchmark.pedantic(upload, setup=setup, rounds=BENCHMARK_ROUNDS)
+        graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+        assert len(sparql_endpoint.triples()) == count_triples(graph_set)
+
+    @pytest.mark.benchmark(group="triplestore")
+    @pytest.mark.parametrize("entity_count", [50, 200])
+    def test_upload_all_async(self, benchmark, counter_handler, sparql_endpoint, entity_count):
+        sparql_endpoint.latency = LATENCY
+
+        def setup():
+            sparql_endpoint.clear()
+            graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+            return (Storer(graph_set),), {}
+
+        def upload(storer):
+            return asyncio.run(storer.upload_all_async(sparql_endpoint.url, batch_size=10))
+
+        assert benchmark.pedantic(upload, setup=setup, rounds=BENCHMARK_ROUNDS)
+        graph_set, _ = create_populated_graph_set(counter_handler, entity_count)
+        assert len(sparql_endpoint.triples()) == count_triples(graph_set)
+
+    @pytest.mark.benchmark(group="triplestore")
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    @pytest.mark.parametrize("entity_count", [200])
+    def test_import_entities_from_triplestore(
+        self, benchmark, counter_handler, sparql_endpoint, entity_count, max_workers
+    ):
+        source, _ = create_populated_graph_set(counter_handler, entity_count)
+        sparql_endpoint.load(source)
+        sparql_endpoint.latency = LATENCY
+        entities = list(source.res_to_entity)
+
+        def setup():
+            return (create_empty_graph_set(),), {}
+
+        def import_entities(graph_set):
+            Reader.import_entities_from_triplestore(
+                graph_set, sparql_endpoint.url, entities, RESP_AGENT, batch_size=50, max_workers=max_workers
+            )
+            return graph_set
+
+        graph_set = benchmark.pedantic(import_entities, setup=setup, rounds=BENCHMARK_ROUNDS)
+        assert set(graph_set.res_to_entity) == set(entities)
+        assert count_triples(graph_set) == count_triples(source)
+
+    @pytest.mark.benchmark(group="triplestore")
+    @pytest.mark.parametrize("entity_count", [50, 200])
+    def test_remove_orphans_from_triplestore(self, benchmark, counter_handler, sparql_endpoint, entity_count):
+        source, _ = create_populated_graph_set(counter_handler, entity_count)
+        sparql_endpoint.load(source)
+        sparql_endpoint.latency = LATENCY
+        identifiers = [identifier.res for identifier in source.get_id()]
+
+        def setup():
+            graph_set = create_empty_graph_set()
+            Reader.import_entities_from_triplestore(graph_set, sparql_endpoint.url, identifiers, RESP_AGENT)
+            for res in identifiers:
+                graph_set.get_entity(res).mark_as_to_be_deleted()
+            return (graph_set,), {}
+
+        def remove_orphans(graph_set):
+            graph_set.remove_orphans_from_triplestore(sparql_endpoint.url, RESP_AGENT, batch_size=50)
+            return graph_set
+
+        graph_set = benchmark.pedantic(remove_orphans, setup=setup, rounds=BENCHMARK_ROUNDS)
+        deleted = set(identifiers)
+        referrers = [entity for entity in graph_set.res_to_entity.values() if not entity.to_be_deleted]
+        assert referrers
+        assert not any(o.value in deleted for entity in referrers for _, _, o in entity.g)
@@ -24,6 +24,7 @@ export default defineConfig({
 						{ label: 'Storing data', slug: 'guides/storing' },
 						{ label: 'Provenance', slug: 'guides/provenance' },
 						{ label: 'Counter handlers', slug: 'guides/counter_handlers' },
+						{ label: 'Instrumentation', slug: 'guides/instrumentation' },
 					],
 				},
 				{
@@ -4,7 +4,8 @@
 
 from __future__ import annotations
 
-from typing import TypeAlias, TypedDict
+from types import TracebackType
+from typing import Protocol, TypeAlias, TypedDict
 
 from rdflib import Literal, URIRef
 from rdflib.term import Node
@@ -23,6 +24,27 @@ SparqlResultRow: TypeAlias = dict[str, SparqlBinding]
 SparqlResultRows: TypeAlias = list[SparqlResultRow]
 TripleSet: TypeAlias = set[Triple]
 FrozenTripleSet: TypeAlias = frozenset[Triple]
+CounterKey: TypeAlias = tuple[str, str, int, str]
+
+
+class Lock(Protocol):
+    def __enter__(self) -> object: ...
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+        /,
+    ) -> object: ...
+
+    def acquire(self) -> object: ...
+
+    def release(self) -> object: ...
+
+
+class InterprocessLock(Lock, Protocol):
+    def acquire(self, timeout: float | None = None) -> object: ...
 
 
 class SparqlResults(TypedDict):
@@ -6,8 +6,16 @@
 
 # -*- coding: utf-8 -*-
 
+from oc_ocdm.counter_handler.binary_filesystem_counter_handler import BinaryFilesystemCounterHandler
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.shared_memory_counter_handler import SharedMemoryCounterHandler
 
-__all__ = ["CounterHandler", "FilesystemCounterHandler", "InMemoryCounterHandler"]
+__all__ = [
+    "BinaryFilesystemCounterHandler",
+    "CounterHandler",
+    "FilesystemCounterHandler",
+    "InMemoryCounterHandler",
+    "SharedMemoryCounterHandler",
+]
@@ -0,0 +1,197 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+_MAGIC = b"OCDMCNT\x01"
+_HEADER_SIZE = len(_MAGIC)
+_SLOT = struct.Struct("<Q")
+# Files grow geometrically, but never by more than this amount of slots at once (8 MiB)
+_MAX_GROWTH = 1 << 20
+
+
+class BinaryFilesystemCounterHandler(FilesystemCounterHandler):
+    """A variant of ``FilesystemCounterHandler`` that stores each counter file as a fixed-width
+    binary array accessed through ``mmap``.
+
+    Every file starts with an 8-byte magic header followed by one little-endian unsigned 64-bit
+    integer per line of the equivalent text file, so the counter identified by ``n`` lives at
+    offset ``8 + (n - 1) * 8``. Files are mapped lazily on first access and updated in place:
+    nothing is loaded into Python lists and ``flush()`` only has to ``msync`` the dirty mappings.
+
+    Counter files written by ``FilesystemCounterHandler`` (``info_file_br.txt``, ``prov_file_br.txt``,
+    ``metadata_di.txt``) are converted automatically the first time they are accessed: the binary
+    file (``info_file_br.bin``, ...) replaces the text file, which is removed.
+
+    Since mappings are shared, the multi-process safe mode (``lease_size``) never has to read a file again
+    after another process changed it, which makes this format the better choice for that mode."""
+
+    def __init__(self, info_dir: str | None, supplier_prefix: str = "", lease_size: int | None = None) -> None:
+        """
+        Constructor of the ``BinaryFilesystemCounterHandler`` class.
+
+        :param info_dir: The path to the folder that does/will contain the counter values.
+        :type info_dir: str
+        :param supplier_prefix: The default supplier prefix.
+        :type supplier_prefix: str
+        :param lease_size: If not None, enables the multi-process safe mode. It's the amount of graph entity
+          counter values reserved by each process at once.
+        :type lease_size: int | None
+        :raises ValueError: if ``info_dir`` is None or an empty string, or ``lease_size`` is less than or equal to zero.
+        """
+        self._maps: Dict[str, mmap.mmap] = {}
+        super().__init__(info_dir, supplier_prefix, lease_size)
+        self.info_files = {key: ("info_file_" + key + ".bin") for key in self.short_names}
+        self.prov_files = {key: ("prov_file_" + key + ".bin") for key in self.short_names}
+
+    def __getstate__(self):
+        """
+        Support for pickle serialization.
+
+        Dirty mappings are synchronized first. Memory maps are not picklable, so the unpickled
+        copy maps the counter files again on first access.
+        """
+        self.flush()
+        state = super().__getstate__()
+        state["_maps"] = {}
+        return state
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        """Support for pickle deserialization."""
+        vars(self).update(state)
+
+    def _ensure_loaded(self, supplier_prefix: str) -> None:
+        # Files are mapped one by one, the first time they are accessed
+        return
+
+    def _get_metadata_path(self, short_name: str, dataset_name: str) -> str:
+        return self.datasets_dir + dataset_name + os.sep + "metadata_" + short_name + ".bin"
+
+    def _migrate(self, text_path: str, file_path: str) -> None:
+        with open(text_path, "r") as f:
+            values = [int(line.rstrip("\n")) if line.rstrip("\n") else 0 for line in f]
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack(f"<{max(len(values), 1)}Q", *(values or [0])))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        os.remove(text_path)
+
+    def _map(self, file_path: str, create: bool) -> Optional[mmap.mmap]:
+        mm = self._maps.get(file_path)
+        if mm is not None:
+            return mm
+        if not os.path.exists(file_path):
+            text_path = file_path[: -len(".bin")] + ".txt"
+            if os.path.exists(text_path):
+                if self.lease_size is None:
+                    self._migrate(text_path, file_path)
+                else:
+                    with self._locked(file_path):
+                        if not os.path.exists(file_path):
+                            self._migrate(text_path, file_path)
+            elif create:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                try:
+                    with open(file_path, "xb") as f:
+                        f.write(_MAGIC + bytes(_SLOT.size))
+                except FileExistsError:
+                    pass
+            else:
+                return None
+        with open(file_path, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+        if mm[:_HEADER_SIZE] != _MAGIC:
+            mm.close()
+            raise ValueError(f"{file_path} is not a binary counter file!")
+        self._maps[file_path] = mm
+        return mm
+
+    def _reserve(self, mm: mmap.mmap, line_number: int) -> None:
+        capacity = (len(mm) - _HEADER_SIZE) // _SLOT.size
+        if line_number > capacity:
+            new_capacity = max(line_number, capacity + min(capacity, _MAX_GROWTH))
+            mm.resize(_HEADER_SIZE + new_capacity * _SLOT.size)
+
+    def flush(self) -> None:
+        """
+        It synchronizes every modified counter file with the disk (``msync``).
+
+        :return: None
+        """
+        for file_path in self._dirty:
+            self._maps[file_path].flush()
+        self._dirty.clear()
+
+    def _reload(self, file_path: str, force: bool = False) -> None:
+        # Shared mappings always show the latest values, but another process may have grown the file
+        mm = self._maps.get(file_path)
+        if mm is not None and os.path.getsize(file_path) != len(mm):
+            if file_path in self._dirty:
+                mm.flush()
+                self._dirty.discard(file_path)
+            mm.close()
+            del self._maps[file_path]
+
+    def _persist(self, file_path: str) -> None:
+        self._maps[file_path].flush()
+        self._dirty.discard(file_path)
+
+    def close(self) -> None:
+        """
+        It flushes every pending change and unmaps all the counter files.
+
+        :return: None
+        """
+        self.flush()
+        for mm in self._maps.values():
+            mm.close()
+        self._maps.clear()
+
+    def _read_number(self, file_path: str, line_number: int) -> int:
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+        mm = self._map(file_path, create=False)
+        if mm is None:
+            return 0
+        offset = _HEADER_SIZE + (line_number - 1) * _SLOT.size
+        if offset + _SLOT.size > len(mm):
+            return 0
+        return _SLOT.unpack_from(mm, offset)[0]
+
+    def _set_number(self, new_value: int, file_path: str, line_number: int = 1) -> None:
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+        mm = self._map(file_path, create=True)
+        assert mm is not None
+        self._reserve(mm, line_number)
+        _SLOT.pack_into(mm, _HEADER_SIZE + (line_number - 1) * _SLOT.size, new_value)
+        self._dirty.add(file_path)
+
+    def _set_numbers(self, file_path: str, updates: Dict[int, int]) -> None:
+        if not updates:
+            return
+        mm = self._map(file_path, create=True)
+        assert mm is not None
+        self._reserve(mm, max(updates.keys()))
+        for line_number, new_value in updates.items():
+            _SLOT.pack_into(mm, _HEADER_SIZE + (line_number - 1) * _SLOT.size, new_value)
+        self._dirty.add(file_path)
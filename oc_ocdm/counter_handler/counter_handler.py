@@ -6,12 +6,27 @@
 # SPDX-License-Identifier: ISC
 
 # -*- coding: utf-8 -*-
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from oc_ocdm.support.metrics import NULL_METRICS, MetricsSink
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from typing import List
+
+    from oc_ocdm._types import CounterKey
 
 
 class CounterHandler(ABC):
     """Abstract class representing the interface for every concrete counter handler."""
 
+    # Sink of the time spent waiting for the locks of the handler (see oc_ocdm.support.metrics).
+    # It can be replaced on each instance.
+    metrics: MetricsSink = NULL_METRICS
+
     @abstractmethod
     def set_counter(
         self,
@@ -85,6 +100,45 @@ class CounterHandler(ABC):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def read_counters(self, keys: Sequence[CounterKey]) -> List[int]:
+        """
+        It allows to read the counter values of several graph and provenance entities at once.
+
+        Each key is a tuple ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        whose items have the same meaning as the homonymous parameters of ``read_counter``.
+        This default implementation simply calls ``read_counter`` once per key: concrete handlers
+        backed by an external storage should override it in order to fetch every value with
+        a single round-trip.
+
+        :param keys: The counters to be read
+        :type keys: Sequence[CounterKey]
+        :return: The requested counter values, in the same order as ``keys``.
+        """
+        return [
+            self.read_counter(entity_short_name, prov_short_name, identifier, supplier_prefix)
+            for entity_short_name, prov_short_name, identifier, supplier_prefix in keys
+        ]
+
+    def set_counters(self, updates: Mapping[CounterKey, int]) -> None:
+        """
+        It allows to set the counter values of several graph and provenance entities at once.
+
+        Each key is a tuple ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        whose items have the same meaning as the homonymous parameters of ``set_counter``.
+        This default implementation simply calls ``set_counter`` once per key: concrete handlers
+        backed by an external storage should override it in order to write every value with
+        a single round-trip.
+
+        :param updates: A mapping from each counter to its new value
+        :type updates: Mapping[CounterKey, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        if any(new_value < 0 for new_value in updates.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        for (entity_short_name, prov_short_name, identifier, supplier_prefix), new_value in updates.items():
+            self.set_counter(new_value, entity_short_name, prov_short_name, identifier, supplier_prefix)
+
     @abstractmethod
     def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str | None) -> None:
         """
@@ -9,10 +9,13 @@
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
+from filelock import FileLock
+
 if TYPE_CHECKING:
-    from typing import Dict, List, Tuple
+    from typing import Dict, Generator, List, Tuple
 
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.support.support import is_string_empty
@@ -21,18 +24,34 @@ from oc_ocdm.support.support import is_string_empty
 class FilesystemCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores the counter values within the filesystem.
 
-    Counter data is loaded into RAM on first access per supplier prefix (lazy loading) and written back to disk only when ``flush()`` is called."""
+    Counter data is loaded into RAM on first access per supplier prefix (lazy loading) and written back to disk only when ``flush()`` is called.
+
+    When ``lease_size`` is given, the handler can be shared by several processes working on the same ``info_dir``.
+    Every write is then performed while holding a lock on the counter file and persisted before the lock is released.
+    Graph entity counters are not incremented one by one: each process reserves a range of ``lease_size`` values
+    under the lock and hands them out locally until the range is exhausted. Values left unused when the process
+    exits are simply skipped. Provenance and metadata counters are always allocated one at a time, since snapshot
+    numbers must not have gaps. Each snapshot therefore reads and rewrites the whole provenance counter file,
+    whose size grows with the number of entities: for provenance-heavy runs, ``BinaryFilesystemCounterHandler``
+    should be used instead, since it updates counters in place."""
 
-    def __init__(self, info_dir: str | None, supplier_prefix: str = "") -> None:
+    def __init__(self, info_dir: str | None, supplier_prefix: str = "", lease_size: int | None = None) -> None:
         """
         Constructor of the ``FilesystemCounterHandler`` class.
 
         :param info_dir: The path to the folder that does/will contain the counter values.
         :type info_dir: str
-        :raises ValueError: if ``info_dir`` is None or an empty string.
+        :param supplier_prefix: The default supplier prefix.
+        :type supplier_prefix: str
+        :param lease_size: If not None, enables the multi-process safe mode. It's the amount of graph entity
+          counter values reserved by each process at once.
+        :type lease_size: int | None
+        :raises ValueError: if ``info_dir`` is None or an empty string, or ``lease_size`` is less than or equal to zero.
         """
         if info_dir is None or is_string_empty(info_dir):
             raise ValueError("info_dir parameter is required!")
+        if lease_size is not None and lease_size <= 0:
+            raise ValueError("lease_size must be a positive non-zero integer number!")
 
         if info_dir[-1] != os.sep:
             info_dir += os.sep
@@ -45,12 +64,30 @@ class FilesystemCounterHandler(CounterHandler):
         self.info_files: Dict[str, str] = {key: ("info_file_" + key + ".txt") for key in self.short_names}
         self.prov_files: Dict[str, str] = {key: ("prov_file_" + key + ".txt") for key in self.short_names}
 
+        self.lease_size: int | None = lease_size
+
         self._cache: Dict[str, List[int]] = {}
         self._dirty: set[str] = set()
         self._loaded_dirs: set[str] = set()
+        self._stamps: Dict[str, Tuple[int, int, int]] = {}
+        self._locks: Dict[str, FileLock] = {}
+        # (file_path, line_number) -> (next value to hand out, last leased value)
+        self._leases: Dict[Tuple[str, int], Tuple[int, int]] = {}
 
         self._ensure_loaded(supplier_prefix)
 
+    def __getstate__(self):
+        """
+        Support for pickle serialization.
+
+        File locks are not picklable and are recreated on first use. Leased ranges are not transferred:
+        otherwise, the original handler and its copy would hand out the same values.
+        """
+        state = self.__dict__.copy()
+        state["_locks"] = {}
+        state["_leases"] = {}
+        return state
+
     def _get_prefix_dir(self, supplier_prefix: str | None) -> str:
         sp = "" if supplier_prefix is None else supplier_prefix
         if sp == self.supplier_prefix or not self.supplier_prefix:
@@ -69,21 +106,93 @@ class FilesystemCounterHandler(CounterHandler):
                 continue
             if not (filename.startswith("info_file_") or filename.startswith("prov_file_")):
                 continue
-            filepath = prefix_dir + filename
-            with open(filepath, "r") as f:
-                self._cache[filepath] = [int(line.rstrip("\n")) if line.rstrip("\n") else 0 for line in f]
+            self._load_file(prefix_dir + filename)
         self._loaded_dirs.add(prefix_dir)
 
+    def _load_file(self, file_path: str) -> None:
+        with open(file_path, "r") as f:
+            stat = os.fstat(f.fileno())
+            self._cache[file_path] = [int(line.rstrip("\n")) if line.rstrip("\n") else 0 for line in f]
+        self._stamps[file_path] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _write_file(self, file_path: str) -> None:
+        dir_path = os.path.dirname(file_path)
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        cache_list = self._cache[file_path]
+        # Written aside and then renamed, so that other processes never read a truncated file
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(f"{v}\n" if v else "\n" for v in cache_list)
+        os.replace(tmp_path, file_path)
+        stat = os.stat(file_path)
+        self._stamps[file_path] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
     def flush(self) -> None:
         for file_path in self._dirty:
-            dir_path = os.path.dirname(file_path)
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path)
-            cache_list = self._cache[file_path]
-            with open(file_path, "w") as f:
-                f.writelines(f"{v}\n" if v else "\n" for v in cache_list)
+            self._write_file(file_path)
         self._dirty.clear()
 
+    @contextmanager
+    def _locked(self, file_path: str) -> Generator[None]:
+        lock = self._locks.get(file_path)
+        if lock is None:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            lock = self._locks[file_path] = FileLock(file_path + ".lock")
+        with self.metrics.locked(lock, "counter_handler.lock_wait"):
+            yield
+
+    def _reload(self, file_path: str, force: bool = False) -> None:
+        """
+        It refreshes the in-memory copy of a counter file that may have been changed by another process.
+        Unless ``force`` is True, the file is read again only if its inode, modification time or size changed.
+        """
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return
+        if force or self._stamps.get(file_path) != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            self._load_file(file_path)
+
+    def _persist(self, file_path: str) -> None:
+        self._write_file(file_path)
+        self._dirty.discard(file_path)
+
+    def _allocate(self, file_path: str, line_number: int, lease_size: int) -> int:
+        key = (file_path, line_number)
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] <= lease[1]:
+            self._leases[key] = (lease[0] + 1, lease[1])
+            return lease[0]
+        with self._locked(file_path):
+            self._reload(file_path, force=True)
+            first_value = self._read_number(file_path, line_number) + 1
+            last_value = first_value + lease_size - 1
+            self._set_number(last_value, file_path, line_number)
+            self._persist(file_path)
+        self._leases[key] = (first_value + 1, last_value)
+        return first_value
+
+    def _set_shared(self, new_value: int, file_path: str, line_number: int, leased: bool) -> None:
+        with self._locked(file_path):
+            self._reload(file_path, force=True)
+            stored_value = new_value
+            if leased:
+                # Lower values may have already been leased by other processes
+                stored_value = max(new_value, self._read_number(file_path, line_number))
+            self._set_number(stored_value, file_path, line_number)
+            self._persist(file_path)
+        self._update_lease(new_value, file_path, line_number, leased)
+
+    def _update_lease(self, new_value: int, file_path: str, line_number: int, leased: bool) -> None:
+        key = (file_path, line_number)
+        lease = self._leases.get(key)
+        if lease is not None:
+            if leased and new_value < lease[1]:
+                self._leases[key] = (max(lease[0], new_value + 1), lease[1])
+            else:
+                del self._leases[key]
+
     def set_counter(
         self,
         new_value: int,
@@ -95,6 +204,9 @@ class FilesystemCounterHandler(CounterHandler):
         """
         It allows to set the counter value of graph and provenance entities.
 
+        In the multi-process safe mode, a graph entity counter is never lowered below its value on disk,
+        since lower values may have already been handed out by other processes.
+
         :param new_value: The new counter value to be set
         :type new_value: int
         :param entity_short_name: The short name associated either to the type of the entity itself
@@ -116,13 +228,21 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name, supplier_prefix)
         else:
             file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
-        self._set_number(new_value, file_path, identifier)
+        if self.lease_size is not None:
+            if identifier <= 0:
+                raise ValueError("line_number must be a positive non-zero integer number!")
+            self._set_shared(new_value, file_path, identifier, prov_short_name != "se")
+        else:
+            self._set_number(new_value, file_path, identifier)
 
     def set_counters_batch(self, updates: Dict[Tuple[str, str], Dict[int, int]], supplier_prefix: str) -> None:
         """
         Updates counters in batch for multiple files.
         `updates` is a dictionary where the key is a tuple (entity_short_name, prov_short_name)
         and the value is a dictionary of line numbers to new counter values.
+
+        As done by ``set_counter``, in the multi-process safe mode graph entity counters are never
+        lowered below their value on disk.
         """
         self._ensure_loaded(supplier_prefix)
         for (entity_short_name, prov_short_name), file_updates in updates.items():
@@ -131,7 +251,23 @@ class FilesystemCounterHandler(CounterHandler):
                 if prov_short_name == "se"
                 else self._get_info_path(entity_short_name, supplier_prefix)
             )
-            self._set_numbers(file_path, file_updates)
+            if self.lease_size is None:
+                self._set_numbers(file_path, file_updates)
+                continue
+            leased = prov_short_name != "se"
+            with self._locked(file_path):
+                self._reload(file_path, force=True)
+                stored_updates = file_updates
+                if leased:
+                    # Lower values may have already been leased by other processes
+                    stored_updates = {
+                        line_number: max(new_value, self._read_number(file_path, line_number))
+                        for line_number, new_value in file_updates.items()
+                    }
+                self._set_numbers(file_path, stored_updates)
+                self._persist(file_path)
+            for line_number, new_value in file_updates.items():
+                self._update_lease(new_value, file_path, line_number, leased)
 
     def _set_numbers(self, file_path: str, updates: Dict[int, int]) -> None:
         """
@@ -155,6 +291,9 @@ class FilesystemCounterHandler(CounterHandler):
         """
         It allows to read the counter value of graph and provenance entities.
 
+        In the multi-process safe mode, the value stored on disk is returned: for graph entities,
+        it includes the ranges leased by every process.
+
         :param entity_short_name: The short name associated either to the type of the entity itself
          or, in case of a provenance entity, to the type of the relative graph entity.
         :type entity_short_name: str
@@ -172,6 +311,8 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name, supplier_prefix)
         else:
             file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
+        if self.lease_size is not None:
+            self._reload(file_path)
         return self._read_number(file_path, identifier)
 
     def increment_counter(
@@ -197,6 +338,10 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name, supplier_prefix)
         else:
             file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
+        if self.lease_size is not None:
+            if identifier <= 0:
+                raise ValueError("line_number must be a positive non-zero integer number!")
+            return self._allocate(file_path, identifier, 1 if prov_short_name == "se" else self.lease_size)
         return self._add_number(file_path, identifier)
 
     def _get_info_path(self, short_name: str, supplier_prefix: str) -> str:
@@ -263,6 +408,8 @@ class FilesystemCounterHandler(CounterHandler):
         if entity_short_name not in self.metadata_short_names:
             raise ValueError("entity_short_name is not a known metadata short name!")
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
+        if self.lease_size is not None:
+            return self._set_shared(new_value, file_path, 1, False)
         return self._set_number(new_value, file_path, 1)
 
     def read_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
@@ -281,6 +428,8 @@ class FilesystemCounterHandler(CounterHandler):
         if entity_short_name not in self.metadata_short_names:
             raise ValueError("entity_short_name is not a known metadata short name!")
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
+        if self.lease_size is not None:
+            self._reload(file_path)
         return self._read_number(file_path, 1)
 
     def increment_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
@@ -299,4 +448,6 @@ class FilesystemCounterHandler(CounterHandler):
         if entity_short_name not in self.metadata_short_names:
             raise ValueError("entity_short_name is not a known metadata short name!")
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
+        if self.lease_size is not None:
+            return self._allocate(file_path, 1, 1)
         return self._add_number(file_path, 1)
@@ -0,0 +1,189 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, cast
+from zipfile import ZipFile
+
+import orjson
+from tqdm import tqdm
+
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from oc_ocdm.support.support import parse_uri
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Optional, Tuple
+
+    from oc_ocdm._types import CounterKey, JsonLdDocument, JsonObject
+    from oc_ocdm.counter_handler.counter_handler import CounterHandler
+
+    # supplier_prefix -> (entity_short_name, prov_short_name) -> identifier -> counter value
+    CounterUpdates = Dict[str, Dict[Tuple[str, str], Dict[int, int]]]
+
+_DUMP_EXTENSIONS = (".json", ".jsonld", ".nt", ".nq", ".zip")
+
+
+def _parse_subjects(file_name: str, content: bytes) -> Iterator[str]:
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in (".json", ".jsonld"):
+        data = cast("JsonObject | JsonLdDocument", orjson.loads(content))
+        graphs = [data] if isinstance(data, dict) else data
+        for graph in graphs:
+            nodes = cast("List[JsonObject]", graph["@graph"]) if "@graph" in graph else [graph]
+            for node in nodes:
+                subject = node.get("@id")
+                if isinstance(subject, str):
+                    yield subject
+    elif extension in (".nt", ".nq"):
+        for line in content.splitlines():
+            if line.startswith(b"<"):
+                yield line[1 : line.index(b">")].decode()
+
+
+def _iter_subjects(file_path: str) -> Iterator[str]:
+    if file_path.endswith(".zip"):
+        with ZipFile(file_path, mode="r") as archive:
+            for file_name in archive.namelist():
+                yield from _parse_subjects(file_name, archive.read(file_name))
+    else:
+        with open(file_path, "rb") as f:
+            yield from _parse_subjects(file_path, f.read())
+
+
+def _scan_file(file_path: str) -> Tuple[Dict[Tuple[str, str], int], Dict[Tuple[str, str, int], int]]:
+    entities: Dict[Tuple[str, str], int] = {}
+    snapshots: Dict[Tuple[str, str, int], int] = {}
+    for subject in _iter_subjects(file_path):
+        parsed = parse_uri(subject)
+        if parsed.is_prov:
+            if parsed.short_name != "se" or not parsed.prov_subject_count.isdigit():
+                continue
+            key = (parsed.prov_subject_prefix, parsed.prov_subject_short_name, int(parsed.prov_subject_count))
+            count = int(parsed.count)
+            if count > snapshots.get(key, 0):
+                snapshots[key] = count
+            # Deleted entities are only left in the provenance, but their numbers must not be reused
+            entity_key = (parsed.prov_subject_prefix, parsed.prov_subject_short_name)
+            if key[2] > entities.get(entity_key, 0):
+                entities[entity_key] = key[2]
+        elif parsed.count.isdigit():
+            entity_key = (parsed.prefix, parsed.short_name)
+            count = int(parsed.count)
+            if count > entities.get(entity_key, 0):
+                entities[entity_key] = count
+    return entities, snapshots
+
+
+def _find_dump_files(base_dir: str) -> List[str]:
+    file_paths: List[str] = []
+    for dir_path, _, file_names in os.walk(base_dir):
+        for file_name in file_names:
+            if file_name.endswith(_DUMP_EXTENSIONS):
+                file_paths.append(os.path.join(dir_path, file_name))
+    return file_paths
+
+
+def scan_dump(base_dir: str, max_workers: Optional[int] = None, show_progress: bool = False) -> CounterUpdates:
+    """
+    It scans every file of a dump in parallel and computes the counter values matching its content.
+
+    For each supplier prefix, the result contains the greatest counter of every entity type, stored under
+    the ``(entity_short_name, "")`` key with identifier ``1``, also considering deleted entities whose
+    snapshots are still in the dump, and the number of the last snapshot of every
+    entity, stored under the ``(entity_short_name, "se")`` key with the entity counter as identifier.
+    This is the same structure accepted by ``RedisCounterHandler.batch_update_counters``.
+
+    JSON-LD, N-Triples and N-Quads files are supported, optionally compressed within ZIP archives.
+    Metadata counters are not computed.
+
+    :param base_dir: The root folder of the dump
+    :type base_dir: str
+    :param max_workers: The number of worker processes. If None, the number of CPUs is used.
+    :type max_workers: Optional[int]
+    :param show_progress: Whether to display a progress bar
+    :type show_progress: bool
+    :return: The counter values, grouped by supplier prefix and counter type.
+    """
+    file_paths = _find_dump_files(base_dir)
+    result: CounterUpdates = {}
+    if not file_paths:
+        return result
+    chunk_size = max(1, len(file_paths) // ((max_workers or os.cpu_count() or 1) * 16))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        partial_results = executor.map(_scan_file, file_paths, chunksize=chunk_size)
+        for entities, snapshots in tqdm(
+            partial_results, total=len(file_paths), desc="Scanning dump", disable=not show_progress
+        ):
+            for (supplier_prefix, entity_short_name), count in entities.items():
+                counters = result.setdefault(supplier_prefix, {}).setdefault((entity_short_name, ""), {})
+                if count > counters.get(1, 0):
+                    counters[1] = count
+            for (supplier_prefix, entity_short_name, entity_count), count in snapshots.items():
+                counters = result.setdefault(supplier_prefix, {}).setdefault((entity_short_name, "se"), {})
+                if count > counters.get(entity_count, 0):
+                    counters[entity_count] = count
+    return result
+
+
+def rebuild_counters(
+    base_dir: str,
+    counter_handler: CounterHandler,
+    base_iri: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    batch_size: int = 100_000,
+    show_progress: bool = False,
+) -> CounterUpdates:
+    """
+    It recomputes the counter values from the files of a dump (see ``scan_dump``) and stores them
+    within the given counter handler, through ``set_counters`` calls of at most ``batch_size`` counters each.
+
+    Counters that do not appear in the dump are left untouched. Handlers that buffer their writes
+    (e.g. ``FilesystemCounterHandler``) still have to be flushed by the caller.
+
+    :param base_dir: The root folder of the dump
+    :type base_dir: str
+    :param counter_handler: The counter handler to be updated
+    :type counter_handler: CounterHandler
+    :param base_iri: The base IRI of the entities. It's only required by ``SqliteCounterHandler``,
+      which stores snapshot counters using the IRI of the entity as key.
+    :type base_iri: Optional[str]
+    :param max_workers: The number of worker processes. If None, the number of CPUs is used.
+    :type max_workers: Optional[int]
+    :param batch_size: The maximum number of counters set at once
+    :type batch_size: int
+    :param show_progress: Whether to display a progress bar
+    :type show_progress: bool
+    :raises ValueError: if ``batch_size`` is less than or equal to zero, or ``base_iri`` is missing
+      while ``counter_handler`` is a ``SqliteCounterHandler``.
+    :return: The counter values that were stored.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive non-zero integer number!")
+    iri_keys = isinstance(counter_handler, SqliteCounterHandler)
+    if iri_keys and base_iri is None:
+        raise ValueError("base_iri is required to rebuild the snapshot counters of a SqliteCounterHandler!")
+
+    result = scan_dump(base_dir, max_workers, show_progress)
+
+    batch: Dict[CounterKey, int] = {}
+    for supplier_prefix, prefix_counters in result.items():
+        for (entity_short_name, prov_short_name), counters in prefix_counters.items():
+            for identifier, value in counters.items():
+                if prov_short_name and iri_keys:
+                    key = (f"{base_iri}{entity_short_name}/{supplier_prefix}{identifier}", "", 1, "")
+                else:
+                    key = (entity_short_name, prov_short_name, identifier, supplier_prefix)
+                batch[key] = value
+                if len(batch) >= batch_size:
+                    counter_handler.set_counters(batch)
+                    batch = {}
+    if batch:
+        counter_handler.set_counters(batch)
+    return result
@@ -6,21 +6,55 @@
 
 # -*- coding: utf-8 -*-
 
-from collections.abc import Callable
-from typing import Dict, Optional, Tuple, Union, cast
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from typing import Dict, List, Optional, Tuple, Union, cast
 
 import redis
 from redis.client import Pipeline
 from tqdm import tqdm
 
+from oc_ocdm._types import CounterKey
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 
+# Raises each key to the given value, unless it already holds a greater one
+_MAX_UPDATE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local current = tonumber(redis.call('GET', key) or '0')
+    if tonumber(ARGV[i]) > current then
+        redis.call('SET', key, ARGV[i])
+    end
+end
+return #KEYS
+"""
+_MAX_KEYS_PER_SCRIPT = 1000
+
 
 class RedisCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
-    the counter values within a Redis database."""
+    the counter values within a Redis database.
+
+    Connections are taken from a ``BlockingConnectionPool`` of at most ``max_connections``
+    connections, so the handler can be shared by several threads: when every connection is busy,
+    callers wait for one to be released instead of opening new ones.
 
-    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None) -> None:
+    With ``write_behind=True``, counter values are cached locally once read, and
+    ``set_counter``/``set_counters`` only record the new value. Recorded values are sent at ``flush()``
+    time as a single pipeline of Lua scripts that raise each counter to the recorded value,
+    never lowering it, so that values already handed out to other processes are preserved.
+    Increments are still executed immediately on the server, preceded in the same round-trip
+    by the pending update of the same counter, if any. Call ``flush()`` (or ``close()``)
+    at the end of the run, otherwise the recorded values are lost."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        max_connections: int = 50,
+        write_behind: bool = False,
+    ) -> None:
         """
         Constructor of the ``RedisCounterHandler`` class.
 
@@ -32,27 +66,137 @@ class RedisCounterHandler(CounterHandler):
         :type db: int
         :param password: Redis password (if required)
         :type password: Optional[str]
+        :param max_connections: The size of the connection pool
+        :type max_connections: int
+        :param write_behind: Whether to cache counters locally and defer ``set_counter`` calls until ``flush()``
+        :type write_behind: bool
+        :raises ValueError: if ``max_connections`` is less than or equal to zero.
         """
+        if max_connections <= 0:
+            raise ValueError("max_connections must be a positive non-zero integer number!")
         self.host = host
         self.port = port
         self.db = db
         self.password = password
-        self.redis: redis.Redis = redis.Redis(host=host, port=port, db=db, password=password, decode_responses=True)
+        self.max_connections = max_connections
+        self.write_behind = write_behind
+        self._cache: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        self.pool = redis.BlockingConnectionPool(
+            host=self.host,
+            port=self.port,
+            db=self.db,
+            password=self.password,
+            decode_responses=True,
+            max_connections=self.max_connections,
+        )
+        self.redis: redis.Redis = redis.Redis(connection_pool=self.pool)
+        self._max_update = self.redis.register_script(_MAX_UPDATE_SCRIPT)
 
     def __getstate__(self):
-        """Support for pickle serialization."""
+        """
+        Support for pickle serialization.
+
+        Pending values are flushed first. The connection pool, the Redis client and the local
+        cache are not transferred: they are recreated upon unpickling.
+        """
+        self.flush()
         state = self.__dict__.copy()
-        # Remove Redis connection (not picklable)
-        del state["redis"]
+        for attribute in ("redis", "pool", "_max_update", "_lock"):
+            del state[attribute]
+        state["_cache"] = {}
+        state["_pending"] = {}
         return state
 
     def __setstate__(self, state: dict[str, object]) -> None:
         """Support for pickle deserialization."""
         vars(self).update(state)
-        # Recreate Redis connection
-        self.redis = redis.Redis(
-            host=self.host, port=self.port, db=self.db, password=self.password, decode_responses=True
-        )
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _pipeline(self) -> Pipeline:
+        pipeline_factory = cast(Callable[..., Pipeline], getattr(self.redis, "pipeline"))
+        return pipeline_factory(transaction=False)
+
+    def _queue_max_update(self, pipeline: Pipeline, items: Sequence[Tuple[str, int]]) -> None:
+        self._max_update(keys=[key for key, _ in items], args=[value for _, value in items], client=pipeline)
+
+    def _get(self, key: str) -> int:
+        if not self.write_behind:
+            value = cast(Optional[str], self.redis.get(key))
+            return int(value) if value is not None else 0
+        return self._get_many([key])[0]
+
+    def _get_many(self, keys: Sequence[str]) -> List[int]:
+        if not self.write_behind:
+            values = cast(List[Optional[str]], self.redis.mget(keys))
+            return [int(value) if value is not None else 0 for value in values]
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            missing = list(dict.fromkeys(key for key in keys if key not in self._cache))
+        if missing:
+            values = cast(List[Optional[str]], self.redis.mget(missing))
+            with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+                for key, value in zip(missing, values):
+                    self._cache.setdefault(key, int(value) if value is not None else 0)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            return [max(self._cache[key], self._pending.get(key, 0)) for key in keys]
+
+    def _set(self, key: str, new_value: int) -> None:
+        if not self.write_behind:
+            self.redis.set(key, new_value)
+            return
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self._pending[key] = max(self._pending.get(key, 0), new_value)
+
+    def _incr(self, key: str) -> int:
+        if not self.write_behind:
+            return self.redis.incr(key)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            pending = self._pending.pop(key, None)
+        if pending is None:
+            new_value = int(self.redis.incr(key))
+        else:
+            pipeline = self._pipeline()
+            self._queue_max_update(pipeline, [(key, pending)])
+            pipeline.incr(key)
+            new_value = int(pipeline.execute()[-1])
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self._cache[key] = new_value
+        return new_value
+
+    def flush(self) -> None:
+        """
+        It sends every value recorded by ``set_counter`` in write-behind mode, as a single pipeline.
+        Each counter is raised to the recorded value, unless it already holds a greater one.
+        Nothing happens when write-behind mode is disabled.
+
+        :return: None
+        """
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            pending, self._pending = self._pending, {}
+            for key, value in pending.items():
+                if key in self._cache:
+                    self._cache[key] = max(self._cache[key], value)
+        if not pending:
+            return
+        items = list(pending.items())
+        pipeline = self._pipeline()
+        for i in range(0, len(items), _MAX_KEYS_PER_SCRIPT):
+            self._queue_max_update(pipeline, items[i : i + _MAX_KEYS_PER_SCRIPT])
+        pipeline.execute()
+
+    def close(self) -> None:
+        """
+        It flushes the pending values and closes every connection of the pool.
+
+        :return: None
+        """
+        self.flush()
+        self.pool.disconnect()
 
     def set_counter(
         self,
@@ -85,7 +229,7 @@ class RedisCounterHandler(CounterHandler):
             raise ValueError("new_value must be a non negative integer!")
 
         key = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
-        self.redis.set(key, new_value)
+        self._set(key, new_value)
 
     def read_counter(
         self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
@@ -107,8 +251,7 @@ class RedisCounterHandler(CounterHandler):
         :return: The requested counter value.
         """
         key = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
-        value = cast(Optional[str], self.redis.get(key))
-        return int(value) if value is not None else 0
+        return self._get(key)
 
     def increment_counter(
         self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
@@ -130,7 +273,45 @@ class RedisCounterHandler(CounterHandler):
         :return: The newly-updated (already incremented) counter value.
         """
         key = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
-        return cast(int, self.redis.incr(key))
+        return self._incr(key)
+
+    def read_counters(self, keys: Sequence[CounterKey]) -> List[int]:
+        """
+        It allows to read the counter values of several graph and provenance entities
+        with a single ``MGET`` command.
+
+        :param keys: The counters to be read, as
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)`` tuples
+        :type keys: Sequence[CounterKey]
+        :return: The requested counter values, in the same order as ``keys``.
+        """
+        if not keys:
+            return []
+        return self._get_many([self._get_key(*key) for key in keys])
+
+    def set_counters(self, updates: Mapping[CounterKey, int]) -> None:
+        """
+        It allows to set the counter values of several graph and provenance entities
+        by sending every ``SET`` command in a single pipeline.
+
+        :param updates: A mapping from each counter, as a
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)`` tuple, to its new value
+        :type updates: Mapping[CounterKey, int]
+        :raises ValueError: if any of the new values is a negative integer
+        :return: None
+        """
+        if any(new_value < 0 for new_value in updates.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        if not updates:
+            return
+        if self.write_behind:
+            for key, new_value in updates.items():
+                self._set(self._get_key(*key), new_value)
+            return
+        pipeline = self._pipeline()
+        for key, new_value in updates.items():
+            pipeline.set(self._get_key(*key), new_value)
+        pipeline.execute()
 
     def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str | None) -> None:
         """
@@ -149,7 +330,7 @@ class RedisCounterHandler(CounterHandler):
             raise ValueError("new_value must be a non negative integer!")
 
         key = f"metadata:{dataset_name}:{entity_short_name}"
-        self.redis.set(key, new_value)
+        self._set(key, new_value)
 
     def read_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
         """
@@ -163,8 +344,7 @@ class RedisCounterHandler(CounterHandler):
         :return: The requested counter value.
         """
         key = f"metadata:{dataset_name}:{entity_short_name}"
-        value = cast(Optional[str], self.redis.get(key))
-        return int(value) if value is not None else 0
+        return self._get(key)
 
     def increment_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
         """
@@ -178,7 +358,7 @@ class RedisCounterHandler(CounterHandler):
         :return: The newly-updated (already incremented) counter value.
         """
         key = f"metadata:{dataset_name}:{entity_short_name}"
-        return cast(int, self.redis.incr(key))
+        return self._incr(key)
 
     def _get_key(
         self,
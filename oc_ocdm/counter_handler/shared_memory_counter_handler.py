@@ -0,0 +1,492 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING
+
+from filelock import FileLock
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from typing import Dict, Iterator, List, Optional, Tuple
+
+    from oc_ocdm._types import CounterKey
+
+from oc_ocdm.counter_handler.counter_handler import CounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.support.support import is_string_empty
+
+_MAGIC = b"OCDMSHM\x01"
+# magic, capacity, number of used slots
+_HEADER = struct.Struct("<8sQQ")
+_HEADER_SIZE = 32
+_VALUE = struct.Struct("<Q")
+# Each slot holds the counter value, the length of the key and the key itself
+_SLOT_SIZE = 96
+_MAX_KEY_SIZE = _SLOT_SIZE - _VALUE.size - 1
+_MAX_LOAD_FACTOR = 0.9
+_FIELD_SEPARATOR = "\x1f"
+_METADATA_MARKER = "\x1e"
+
+
+class SharedMemoryCounterHandler(CounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that keeps the counter values
+    within a ``multiprocessing.shared_memory`` segment, so that they can be shared by the processes of a pool.
+
+    The segment contains a fixed-capacity hash table with open addressing. Every operation is performed
+    while holding a file lock, which makes increments atomic across processes. Once pickled (e.g. when
+    passed as an argument to a ``multiprocessing.Pool`` task), the handler attaches to the same segment
+    in the receiving process.
+
+    The process that created the segment owns it: calling ``close()`` on the owner saves the counters
+    into ``info_dir`` (when provided) with the ``FilesystemCounterHandler`` format, and then releases
+    the segment. Copies living in other processes only detach from it.
+
+    Each slot stores its key in at most 87 bytes: the short names, the identifier and the supplier prefix
+    of a graph or provenance counter, or the dataset name and the short name of a metadata counter.
+    Since the short names take a few bytes, dataset names can be up to 83 bytes long."""
+
+    def __init__(self, capacity: int = 1 << 20, info_dir: str | None = None, supplier_prefix: str = "") -> None:
+        """
+        Constructor of the ``SharedMemoryCounterHandler`` class.
+
+        :param capacity: The maximum number of counters that can be stored. Each one takes 96 bytes.
+        :type capacity: int
+        :param info_dir: The path to a folder containing counters in the ``FilesystemCounterHandler`` format.
+          Graph and provenance counters found there are loaded when the segment is created, metadata counters
+          when they are first used, and every counter is saved back there by ``close()``.
+        :type info_dir: str | None
+        :param supplier_prefix: The supplier prefix of the counters stored within ``info_dir``. The counters
+          of other supplier prefixes are stored in separate folders, as described in ``persist()``.
+        :type supplier_prefix: str
+        :raises ValueError: if ``capacity`` is less than or equal to zero.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive non-zero integer number!")
+        self.capacity: int = capacity
+        self.info_dir: str | None = None if info_dir is None or is_string_empty(info_dir) else info_dir
+        self.supplier_prefix: str = supplier_prefix
+        self._owner: bool = True
+        self._shm: SharedMemory = SharedMemory(create=True, size=_HEADER_SIZE + capacity * _SLOT_SIZE)
+        self._buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+        _HEADER.pack_into(self._buf, 0, _MAGIC, capacity, 0)
+        self.name: str = self._shm.name
+        self.lock_path: str = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        self._lock: FileLock = FileLock(self.lock_path)
+        self._slots: Dict[bytes, int] = {}
+        if self.info_dir is not None:
+            self._load(self.info_dir)
+
+    def __getstate__(self):
+        """
+        Support for pickle serialization.
+
+        Only the name of the segment is transferred: the unpickled copy attaches to the same segment,
+        without owning it.
+        """
+        return {
+            "capacity": self.capacity,
+            "info_dir": self.info_dir,
+            "supplier_prefix": self.supplier_prefix,
+            "name": self.name,
+            "lock_path": self.lock_path,
+        }
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        """Support for pickle deserialization."""
+        vars(self).update(state)
+        self._owner = False
+        if sys.version_info >= (3, 13):
+            self._shm = SharedMemory(name=self.name, track=False)
+        else:
+            self._shm = SharedMemory(name=self.name)
+            # Otherwise, the resource tracker would destroy the segment when this process exits
+            resource_tracker.unregister(getattr(self._shm, "_name"), "shared_memory")
+        self._lock = FileLock(self.lock_path)
+        self._slots = {}
+
+    @property
+    def _buf(self) -> memoryview:
+        buf = self._shm.buf
+        assert buf is not None
+        return buf
+
+    @staticmethod
+    def _encode(entity_short_name: str, prov_short_name: str, identifier: int, supplier_prefix: str) -> bytes:
+        if identifier <= 0:
+            raise ValueError("identifier must be a positive non-zero integer number!")
+        return _FIELD_SEPARATOR.join((entity_short_name, prov_short_name, str(identifier), supplier_prefix)).encode()
+
+    @staticmethod
+    def _encode_metadata(entity_short_name: str, dataset_name: str | None) -> bytes:
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        return (_METADATA_MARKER + dataset_name + _FIELD_SEPARATOR + entity_short_name).encode()
+
+    def _find(self, key: bytes, insert: bool) -> Optional[int]:
+        # The lock must be held by the caller. Slots are never freed, so their position can be cached.
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if len(key) > _MAX_KEY_SIZE:
+            raise ValueError(f"The counter key is longer than {_MAX_KEY_SIZE} bytes!")
+        buf = self._buf
+        index = zlib.crc32(key) % self.capacity
+        for _ in range(self.capacity):
+            offset = _HEADER_SIZE + index * _SLOT_SIZE + _VALUE.size
+            length = buf[offset]
+            if length == 0:
+                if not insert:
+                    return None
+                _, _, used = _HEADER.unpack_from(buf, 0)
+                if used + 1 > self.capacity * _MAX_LOAD_FACTOR:
+                    raise ValueError("The shared memory segment is full: a greater capacity is required!")
+                buf[offset + 1 : offset + 1 + len(key)] = key
+                # The length is written last, since a non-zero length marks the slot as used
+                buf[offset] = len(key)
+                _HEADER.pack_into(buf, 0, _MAGIC, self.capacity, used + 1)
+                self._slots[key] = index
+                return index
+            if length == len(key) and buf[offset + 1 : offset + 1 + length].tobytes() == key:
+                self._slots[key] = index
+                return index
+            index = (index + 1) % self.capacity
+        raise ValueError("The shared memory segment is full: a greater capacity is required!")
+
+    def _read(self, key: bytes) -> int:
+        slot = self._find(key, insert=False)
+        if slot is None:
+            return 0
+        return _VALUE.unpack_from(self._buf, _HEADER_SIZE + slot * _SLOT_SIZE)[0]
+
+    def _write(self, key: bytes, new_value: int) -> None:
+        slot = self._find(key, insert=True)
+        assert slot is not None
+        _VALUE.pack_into(self._buf, _HEADER_SIZE + slot * _SLOT_SIZE, new_value)
+
+    def _increment(self, key: bytes, metadata_path: str | None = None) -> int:
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            if metadata_path is not None:
+                self._load_metadata(key, metadata_path)
+            new_value = self._read(key) + 1
+            self._write(key, new_value)
+        return new_value
+
+    def _items(self) -> Iterator[Tuple[str, int]]:
+        buf = self._buf
+        for index in range(self.capacity):
+            offset = _HEADER_SIZE + index * _SLOT_SIZE
+            length = buf[offset + _VALUE.size]
+            if length:
+                key = bytes(buf[offset + _VALUE.size + 1 : offset + _VALUE.size + 1 + length]).decode()
+                yield key, _VALUE.unpack_from(buf, offset)[0]
+
+    def _replaces_prefix(self, info_dir: str) -> bool:
+        # Like FilesystemCounterHandler, the folder of another supplier prefix is found by replacing
+        # the default one within info_dir. Otherwise, each supplier prefix gets a subfolder of info_dir,
+        # with "_" standing for the empty supplier prefix.
+        return bool(self.supplier_prefix) and self.supplier_prefix in info_dir
+
+    def _get_prefix_dir(self, info_dir: str, supplier_prefix: str) -> str:
+        if supplier_prefix == self.supplier_prefix:
+            return info_dir
+        if self._replaces_prefix(info_dir):
+            return info_dir.replace(self.supplier_prefix, supplier_prefix, 1)
+        return os.path.join(info_dir, supplier_prefix or "_") + os.sep
+
+    def _get_prefix_dirs(self, info_dir: str) -> Iterator[Tuple[str, str]]:
+        yield self.supplier_prefix, info_dir
+        if not self._replaces_prefix(info_dir):
+            for name in os.listdir(info_dir):
+                supplier_prefix = "" if name == "_" else name
+                if name != "datasets" and supplier_prefix != self.supplier_prefix:
+                    prefix_dir = self._get_prefix_dir(info_dir, supplier_prefix)
+                    if os.path.isdir(prefix_dir):
+                        yield supplier_prefix, prefix_dir
+            return
+        position = info_dir.index(self.supplier_prefix)
+        start = info_dir.rfind(os.sep, 0, position) + 1
+        end = info_dir.find(os.sep, position)
+        end = len(info_dir) if end == -1 else end
+        head, tail = info_dir[start:position], info_dir[position + len(self.supplier_prefix) : end]
+        parent = info_dir[:start] or os.curdir
+        supplier_prefixes = {""}
+        for name in os.listdir(parent):
+            if len(name) >= len(head) + len(tail) and name.startswith(head) and name.endswith(tail):
+                supplier_prefixes.add(name[len(head) : len(name) - len(tail)])
+        for supplier_prefix in sorted(supplier_prefixes):
+            prefix_dir = self._get_prefix_dir(info_dir, supplier_prefix)
+            if supplier_prefix != self.supplier_prefix and os.path.isdir(prefix_dir):
+                yield supplier_prefix, prefix_dir
+
+    def _load(self, info_dir: str) -> None:
+        if not os.path.isdir(info_dir):
+            return
+        updates: Dict[CounterKey, int] = {}
+        for supplier_prefix, prefix_dir in self._get_prefix_dirs(info_dir):
+            for filename in os.listdir(prefix_dir):
+                if not filename.endswith(".txt"):
+                    continue
+                if filename.startswith("info_file_"):
+                    entity_short_name, prov_short_name = filename[len("info_file_") : -len(".txt")], ""
+                elif filename.startswith("prov_file_"):
+                    entity_short_name, prov_short_name = filename[len("prov_file_") : -len(".txt")], "se"
+                else:
+                    continue
+                with open(os.path.join(prefix_dir, filename), "r") as f:
+                    for line_number, line in enumerate(f, start=1):
+                        if line.rstrip("\n"):
+                            key = (entity_short_name, prov_short_name, line_number, supplier_prefix)
+                            updates[key] = int(line.rstrip("\n"))
+        self.set_counters(updates)
+
+    def _get_metadata_path(self, entity_short_name: str, dataset_name: str | None) -> str | None:
+        if self.info_dir is None or dataset_name is None:
+            return None
+        return os.path.join(self.info_dir, "datasets", dataset_name, f"metadata_{entity_short_name}.txt")
+
+    def _load_metadata(self, key: bytes, metadata_path: str) -> None:
+        # The lock must be held by the caller. Dataset names may contain slashes, so they cannot be told
+        # from the folders holding their counters: each one is loaded the first time it is needed.
+        if self._find(key, insert=False) is not None:
+            return
+        try:
+            with open(metadata_path, "r") as f:
+                line = f.readline().rstrip("\n")
+        except FileNotFoundError:
+            return
+        if line:
+            self._write(key, int(line))
+
+    def persist(self, info_dir: str | None = None) -> None:
+        """
+        It saves every counter within a folder, using the ``FilesystemCounterHandler`` format.
+        The counters of the default supplier prefix are saved in the folder itself. As done by
+        ``FilesystemCounterHandler``, the counters of any other supplier prefix are saved in the folder
+        whose path is obtained by replacing the default supplier prefix within the given one. If the path
+        does not contain the default supplier prefix (e.g. because it is empty), they are saved in a subfolder
+        named after their supplier prefix, or ``_`` for the empty one. Metadata counters are saved in the
+        ``datasets`` subfolder.
+
+        :param info_dir: The destination folder. If None, the ``info_dir`` given to the constructor is used.
+        :type info_dir: str | None
+        :raises ValueError: if no destination folder is available.
+        :return: None
+        """
+        info_dir = info_dir if info_dir is not None else self.info_dir
+        if info_dir is None or is_string_empty(info_dir):
+            raise ValueError("info_dir parameter is required!")
+        if info_dir[-1] != os.sep:
+            info_dir += os.sep
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            items = list(self._items())
+        metadata_handler = FilesystemCounterHandler(info_dir, self.supplier_prefix)
+        updates: Dict[str, Dict[Tuple[str, str], Dict[int, int]]] = {}
+        for key, value in items:
+            if key.startswith(_METADATA_MARKER):
+                dataset_name, entity_short_name = key[1:].rsplit(_FIELD_SEPARATOR, 1)
+                metadata_handler.set_metadata_counter(value, entity_short_name, dataset_name)
+                continue
+            entity_short_name, prov_short_name, identifier, supplier_prefix = key.split(_FIELD_SEPARATOR)
+            file_updates = updates.setdefault(supplier_prefix, {}).setdefault((entity_short_name, prov_short_name), {})
+            file_updates[int(identifier)] = value
+        metadata_handler.flush()
+        for supplier_prefix, prefix_updates in updates.items():
+            prefix_handler = FilesystemCounterHandler(self._get_prefix_dir(info_dir, supplier_prefix), supplier_prefix)
+            prefix_handler.set_counters_batch(prefix_updates, supplier_prefix)
+            prefix_handler.flush()
+
+    def close(self) -> None:
+        """
+        It detaches from the shared memory segment. When called on the handler that created the segment,
+        the counters are first saved into ``info_dir`` (if provided) and the segment is then destroyed.
+
+        :return: None
+        """
+        if self._owner and self.info_dir is not None:
+            self.persist()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+
+    def set_counter(
+        self,
+        new_value: int,
+        entity_short_name: str,
+        prov_short_name: str = "",
+        identifier: int = 1,
+        supplier_prefix: str = "",
+    ) -> None:
+        """
+        It allows to set the counter value of graph and provenance entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``identifier`` is less than or equal to zero.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        key = self._encode(entity_short_name, prov_short_name, identifier, supplier_prefix)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self._write(key, new_value)
+
+    def read_counter(
+        self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
+    ) -> int:
+        """
+        It allows to read the counter value of graph and provenance entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
+        :return: The requested counter value.
+        """
+        key = self._encode(entity_short_name, prov_short_name, identifier, supplier_prefix)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            return self._read(key)
+
+    def increment_counter(
+        self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
+    ) -> int:
+        """
+        It allows to increment the counter value of graph and provenance entities by one unit.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        return self._increment(self._encode(entity_short_name, prov_short_name, identifier, supplier_prefix))
+
+    def read_counters(self, keys: Sequence[CounterKey]) -> List[int]:
+        """
+        It allows to read the counter values of several graph and provenance entities
+        while acquiring the lock only once.
+
+        :param keys: The counters to be read, as
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)`` tuples
+        :type keys: Sequence[CounterKey]
+        :raises ValueError: if any ``identifier`` is less than or equal to zero.
+        :return: The requested counter values, in the same order as ``keys``.
+        """
+        encoded_keys = [self._encode(*key) for key in keys]
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            return [self._read(key) for key in encoded_keys]
+
+    def set_counters(self, updates: Mapping[CounterKey, int]) -> None:
+        """
+        It allows to set the counter values of several graph and provenance entities
+        while acquiring the lock only once.
+
+        :param updates: A mapping from each counter, as a
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)`` tuple, to its new value
+        :type updates: Mapping[CounterKey, int]
+        :raises ValueError: if any of the new values is a negative integer or any ``identifier``
+          is less than or equal to zero.
+        :return: None
+        """
+        if any(new_value < 0 for new_value in updates.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        encoded_updates = [(self._encode(*key), new_value) for key, new_value in updates.items()]
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            for key, new_value in encoded_updates:
+                self._write(key, new_value)
+
+    def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str | None) -> None:
+        """
+        It allows to set the counter value of metadata entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``dataset_name`` is None or longer than 83 bytes.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        key = self._encode_metadata(entity_short_name, dataset_name)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self._write(key, new_value)
+
+    def read_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
+        """
+        It allows to read the counter value of metadata entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None or longer than 83 bytes.
+        :return: The requested counter value.
+        """
+        key = self._encode_metadata(entity_short_name, dataset_name)
+        metadata_path = self._get_metadata_path(entity_short_name, dataset_name)
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            if metadata_path is not None:
+                self._load_metadata(key, metadata_path)
+            return self._read(key)
+
+    def increment_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
+        """
+        It allows to increment the counter value of metadata entities by one unit.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None or longer than 83 bytes.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        return self._increment(
+            self._encode_metadata(entity_short_name, dataset_name),
+            self._get_metadata_path(entity_short_name, dataset_name),
+        )
@@ -7,114 +7,355 @@
 # -*- coding: utf-8 -*-
 
 import sqlite3
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Tuple, cast
 
+from oc_ocdm._types import CounterKey
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER, which is 999 on older SQLite builds
+_MAX_VARIABLES_PER_QUERY = 500
+
+_CREATE_TABLE = "CREATE TABLE IF NOT EXISTS info(entity TEXT PRIMARY KEY, count INTEGER)"
+_SELECT_COUNTER = "SELECT count FROM info WHERE entity = ?"
+_UPSERT_COUNTER = (
+    "INSERT INTO info (entity, count) VALUES (?, ?) ON CONFLICT(entity) DO UPDATE SET count = excluded.count"
+)
+_INCREMENT_COUNTER = (
+    "INSERT INTO info (entity, count) VALUES (?, 1) ON CONFLICT(entity) DO UPDATE SET count = count + 1"
+)
+# Graph entity counters used to be stored under their short name alone, whatever the supplier prefix:
+# as long as a counter has no key of its own, it continues from the legacy one
+_SELECT_COUNTER_WITH_LEGACY = (
+    "SELECT COALESCE((SELECT count FROM info WHERE entity = ?), (SELECT count FROM info WHERE entity = ?))"
+)
+_INCREMENT_COUNTER_WITH_LEGACY = (
+    "INSERT INTO info (entity, count) VALUES (?, COALESCE((SELECT count FROM info WHERE entity = ?), 0) + 1) "
+    "ON CONFLICT(entity) DO UPDATE SET count = count + 1"
+)
+# RETURNING is only available since SQLite 3.35.0
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
 
 class SqliteCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
-    the counter values within a SQLite database."""
+    the counter values within a SQLite database.
+
+    The database is opened in WAL mode, so that readers never block the writer, and every
+    increment is performed by a single ``INSERT ... ON CONFLICT DO UPDATE`` statement, which
+    makes it atomic even when several processes share the same database file.
 
-    def __init__(self, database: str) -> None:
+    Counters are stored in a single ``info(entity, count)`` table. Their keys follow the same layout
+    used by ``RedisCounterHandler``: ``br:060`` for the counter of the ``br`` entities having
+    supplier prefix ``060``, ``br:060:1:se`` for the snapshot counter of ``br/0601`` and
+    ``metadata:<dataset>:di`` for metadata entities. Since ``ProvSet`` keeps identifying the snapshot
+    counters stored in this handler through the IRI of the related entity, as previous versions of this
+    class did, existing databases remain valid. Previous versions stored graph entity counters under their
+    short name alone (e.g. ``br``), whatever the supplier prefix: a counter with a supplier prefix which
+    has no key of its own yet continues from that value."""
+
+    def __init__(self, database: str, commit_every: int = 1, timeout: float = 30.0) -> None:
         """
         Constructor of the ``SqliteCounterHandler`` class.
 
-        :param database: The name of the database
-        :type info_dir: str
+        :param database: The path of the database file
+        :type database: str
+        :param commit_every: The number of write operations after which pending changes are committed.
+          With the default value, every write is committed immediately. Greater values trade durability
+          for throughput: uncommitted changes are lost on crash and, since the write lock is held until
+          the next commit, other processes sharing the database wait for it. Call ``flush()`` to commit
+          pending changes.
+        :type commit_every: int
+        :param timeout: How many seconds a connection waits for the lock held by another process
+        :type timeout: float
+        :raises ValueError: if ``commit_every`` is less than or equal to zero.
         """
-        sqlite3.threadsafety = 3
-        self.database = database
-        self.con = sqlite3.connect(database)
+        if commit_every <= 0:
+            raise ValueError("commit_every must be a positive non-zero integer number!")
+        self.database: str = database
+        self.commit_every: int = commit_every
+        self.timeout: float = timeout
+        self._connect()
+
+    def _connect(self) -> None:
+        self._lock = threading.RLock()
+        self._pending_writes: int = 0
+        self.con = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute(_CREATE_TABLE)
+        self.con.commit()
         self.cur = self.con.cursor()
-        self.cur.execute("""CREATE TABLE IF NOT EXISTS info(
-            entity TEXT PRIMARY KEY,
-            count INTEGER)""")
+
+    @staticmethod
+    def _get_key(
+        entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
+    ) -> str:
+        key_parts = [entity_short_name, supplier_prefix]
+        if prov_short_name:
+            if identifier <= 0:
+                raise ValueError("identifier must be a positive non-zero integer number!")
+            key_parts.append(str(identifier))
+            key_parts.append(prov_short_name)
+        return ":".join(filter(None, key_parts))
+
+    @staticmethod
+    def _get_legacy_key(entity_short_name: str, prov_short_name: str = "", supplier_prefix: str = "") -> Optional[str]:
+        if prov_short_name or not supplier_prefix:
+            return None
+        return entity_short_name
+
+    @staticmethod
+    def _get_metadata_key(entity_short_name: str, dataset_name: Optional[str]) -> str:
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        return f"metadata:{dataset_name}:{entity_short_name}"
+
+    def _written(self, n_writes: int = 1) -> None:
+        self._pending_writes += n_writes
+        if self._pending_writes >= self.commit_every:
+            self.con.commit()
+            self._pending_writes = 0
+
+    def _read(self, key: str, legacy_key: Optional[str] = None) -> int:
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            if legacy_key is None:
+                row = cast(Optional[Tuple[int]], self.cur.execute(_SELECT_COUNTER, (key,)).fetchone())
+            else:
+                row = cast(
+                    Tuple[Optional[int]], self.cur.execute(_SELECT_COUNTER_WITH_LEGACY, (key, legacy_key)).fetchone()
+                )
+        return (row[0] or 0) if row is not None else 0
+
+    def _set(self, new_value: int, key: str) -> None:
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self.cur.execute(_UPSERT_COUNTER, (key, new_value))
+            self._written()
+
+    def _increment(self, key: str, legacy_key: Optional[str] = None) -> int:
+        statement, parameters = (
+            (_INCREMENT_COUNTER, (key,)) if legacy_key is None else (_INCREMENT_COUNTER_WITH_LEGACY, (key, legacy_key))
+        )
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            if _HAS_RETURNING:
+                row = cast(Tuple[int], self.cur.execute(statement + " RETURNING count", parameters).fetchone())
+            else:
+                # The write lock acquired by the upsert is kept until commit, so no other
+                # process can slip in between the two statements
+                self.cur.execute(statement, parameters)
+                row = cast(Tuple[int], self.cur.execute(_SELECT_COUNTER, (key,)).fetchone())
+            self._written()
+        return row[0]
+
+    def flush(self) -> None:
+        """
+        It commits every pending write. It's only needed when ``commit_every`` is greater than one.
+
+        :return: None
+        """
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self.con.commit()
+            self._pending_writes = 0
+
+    def close(self) -> None:
+        """
+        It commits every pending write and closes the connection to the database.
+
+        :return: None
+        """
+        self.flush()
+        self.con.close()
 
     def set_counter(
         self,
         new_value: int,
         entity_short_name: str,
-        prov_short_name: str = "",  # type: ignore[override]
+        prov_short_name: str = "",
         identifier: int = 1,
         supplier_prefix: str = "",
     ) -> None:
         """
-        It allows to set the counter value of provenance entities.
-
-        In this implementation, ``entity_short_name`` is used as a generic entity key
-        (which may be a URI string when called from ProvSet with a GraphEntity).
+        It allows to set the counter value of graph and provenance entities.
 
         :param new_value: The new counter value to be set
         :type new_value: int
-        :param entity_short_name: The entity name (used as lookup key)
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
         :type entity_short_name: str
-        :raises ValueError: if ``new_value`` is a negative integer.
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``identifier`` is less than or equal to zero.
         :return: None
         """
-        if new_value < 0:
-            raise ValueError("new_value must be a non negative integer!")
-        self.cur.execute(f"INSERT OR REPLACE INTO info (entity, count) VALUES ('{entity_short_name}', {new_value})")
-        self.con.commit()
+        self._set(new_value, self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix))
 
     def read_counter(
-        self,
-        entity_short_name: str,
-        prov_short_name: str = "",  # type: ignore[override]
-        identifier: int = 1,
-        supplier_prefix: str = "",
+        self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
     ) -> int:
         """
-        It allows to read the counter value of provenance entities.
+        It allows to read the counter value of graph and provenance entities.
 
-        :param entity_short_name: The entity name (used as lookup key)
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
         :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
         :return: The requested counter value.
         """
-        rows = self.cur.execute(f"SELECT count FROM info WHERE entity='{entity_short_name}'").fetchall()
-        if len(rows) == 1:
-            return rows[0][0]
-        elif len(rows) == 0:
-            return 0
-        else:
-            raise (Exception("There is more than one counter for this entity. The databse id broken"))
+        return self._read(
+            self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix),
+            self._get_legacy_key(entity_short_name, prov_short_name, supplier_prefix),
+        )
 
     def increment_counter(
-        self,
-        entity_short_name: str,
-        prov_short_name: str = "",  # type: ignore[override]
-        identifier: int = 1,
-        supplier_prefix: str = "",
+        self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = ""
     ) -> int:
         """
         It allows to increment the counter value of graph and provenance entities by one unit.
 
-        :param entity_short_name: The entity name (used as lookup key)
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
         :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
         :return: The newly-updated (already incremented) counter value.
         """
-        count = self.read_counter(entity_short_name) + 1
-        self.set_counter(count, entity_short_name)
-        return count
+        return self._increment(
+            self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix),
+            self._get_legacy_key(entity_short_name, prov_short_name, supplier_prefix),
+        )
 
-    def increment_metadata_counter(self, entity_short_name: str = "", dataset_name: str = "") -> int:  # type: ignore[override]
-        return 0
+    def read_counters(self, keys: Sequence[CounterKey]) -> List[int]:
+        """
+        It allows to read the counter values of several graph and provenance entities at once,
+        using ``IN`` queries instead of one query per entity.
 
-    def read_metadata_counter(self, entity_short_name: str = "", dataset_name: str = "") -> int:  # type: ignore[override]
-        return 0
+        :param keys: The counters to be read
+        :type keys: Sequence[CounterKey]
+        :return: The requested counter values, in the same order as ``keys``.
+        """
+        db_keys = [self._get_key(*key) for key in keys]
+        legacy_keys: Dict[str, str] = {}
+        for db_key, (entity_short_name, prov_short_name, _, supplier_prefix) in zip(db_keys, keys):
+            legacy_key = self._get_legacy_key(entity_short_name, prov_short_name, supplier_prefix)
+            if legacy_key is not None:
+                legacy_keys[db_key] = legacy_key
+        found: Dict[str, int] = {}
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self._select_counters(list(dict.fromkeys(db_keys)), found)
+            missing_keys = [db_key for db_key in legacy_keys if db_key not in found]
+            self._select_counters(list({legacy_keys[db_key] for db_key in missing_keys}), found)
+        values: List[int] = []
+        for db_key in db_keys:
+            if db_key not in found and db_key in legacy_keys:
+                db_key = legacy_keys[db_key]
+            values.append(found.get(db_key, 0))
+        return values
+
+    def _select_counters(self, db_keys: List[str], found: Dict[str, int]) -> None:
+        for i in range(0, len(db_keys), _MAX_VARIABLES_PER_QUERY):
+            chunk = db_keys[i : i + _MAX_VARIABLES_PER_QUERY]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.cur.execute(f"SELECT entity, count FROM info WHERE entity IN ({placeholders})", chunk)
+            found.update(cast(List[Tuple[str, int]], rows.fetchall()))
 
-    def set_metadata_counter(self, new_value: int = 0, entity_short_name: str = "", dataset_name: str = "") -> None:  # type: ignore[override]
-        pass
+    def set_counters(self, updates: Mapping[CounterKey, int]) -> None:
+        """
+        It allows to set the counter values of several graph and provenance entities at once,
+        with a single ``executemany`` call.
+
+        :param updates: A mapping from each counter to its new value
+        :type updates: Mapping[CounterKey, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        if any(new_value < 0 for new_value in updates.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        rows = [(self._get_key(*key), new_value) for key, new_value in updates.items()]
+        if not rows:
+            return
+        with self.metrics.locked(self._lock, "counter_handler.lock_wait"):
+            self.cur.executemany(_UPSERT_COUNTER, rows)
+            self._written(len(rows))
+
+    def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str | None) -> None:
+        """
+        It allows to set the counter value of metadata entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``dataset_name`` is None.
+        :return: None
+        """
+        self._set(new_value, self._get_metadata_key(entity_short_name, dataset_name))
+
+    def read_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
+        """
+        It allows to read the counter value of metadata entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The requested counter value.
+        """
+        return self._read(self._get_metadata_key(entity_short_name, dataset_name))
+
+    def increment_metadata_counter(self, entity_short_name: str, dataset_name: str | None) -> int:
+        """
+        It allows to increment the counter value of metadata entities by one unit.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        return self._increment(self._get_metadata_key(entity_short_name, dataset_name))
 
     def __getstate__(self):
         """
         Support for pickle serialization.
 
-        Exclude the SQLite connection and cursor objects, which are not picklable.
-        The database path is preserved and the connection will be recreated upon unpickling.
+        Pending writes are committed first, so that the unpickled copy sees them. The SQLite
+        connection, its cursor and the lock are excluded since they are not picklable:
+        they are recreated upon unpickling.
         """
+        self.flush()
         state = self.__dict__.copy()
         del state["con"]
         del state["cur"]
+        del state["_lock"]
+        del state["_pending_writes"]
         return state
 
     def __setstate__(self, state: dict[str, object]) -> None:
@@ -124,6 +365,4 @@ class SqliteCounterHandler(CounterHandler):
         Recreates the SQLite connection and cursor after unpickling.
         """
         vars(self).update(state)
-        sqlite3.threadsafety = 3
-        self.con = sqlite3.connect(self.database)
-        self.cur = self.con.cursor()
+        self._connect()
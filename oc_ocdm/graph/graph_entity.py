@@ -12,6 +12,8 @@ from triplelite import RDFTerm, SubgraphView, Triple, TripleLite
 
 from oc_ocdm.abstract_entity import AbstractEntity
 from oc_ocdm.constants import RDF_TYPE, Namespace
+from oc_ocdm.support.query_utils import get_change_log
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 if TYPE_CHECKING:
     from typing import ClassVar, Dict, List, Optional
@@ -204,6 +206,7 @@ class GraphEntity(AbstractEntity):
         self.short_name: str = short_name
         self.g_set: GraphSet = g_set
         self._preexisting_triples: frozenset[Triple] = frozenset()
+        self._reset_change_log()
         self._merge_list: tuple[GraphEntity, ...] = ()
         # FLAGS
         self._to_be_deleted: bool = False
@@ -232,6 +235,7 @@ class GraphEntity(AbstractEntity):
                 (self.res, p, o) for p, o in preexisting_graph.predicate_objects(self.res)
             )
             self.g.add_many(self._preexisting_triples)
+            self._reset_change_log()
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -259,6 +263,23 @@ class GraphEntity(AbstractEntity):
     def preexisting_triples(self) -> frozenset[Triple]:
         return self._preexisting_triples
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Indicates if the triples of this entity differ from its preexisting triples.
+
+        When the entity graph is a ``TrackedGraph``, this only inspects its change log,
+        without comparing the whole graph with the preexisting triples.
+        """
+        change_log = get_change_log(self)
+        if change_log is not None:
+            return change_log.is_dirty
+        return frozenset(self.g) != self._preexisting_triples
+
+    def _reset_change_log(self) -> None:
+        if isinstance(self.g, TrackedGraph):
+            self.g.reset_changes(self._preexisting_triples)
+
     @property
     def is_restored(self) -> bool:
         """Indicates if this entity was restored after being deleted."""
@@ -361,6 +382,7 @@ class GraphEntity(AbstractEntity):
             self.remove_every_triple()
         else:
             self._preexisting_triples = frozenset(self.g.triples((self.res, None, None)))
+        self._reset_change_log()
         self._is_restored = False
         self._to_be_deleted = False
         self._was_merged = False
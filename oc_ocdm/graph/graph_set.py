@@ -5,11 +5,11 @@
 
 from __future__ import annotations
 
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import TYPE_CHECKING, cast
 
-from rdflib import Graph
-from triplelite import RDFTerm, SubgraphView, TripleLite, from_rdflib
+from triplelite import SubgraphView, TripleLite
 
 from oc_ocdm.abstract_set import AbstractSet
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
@@ -27,8 +27,9 @@ from oc_ocdm.graph.entities.bibliographic.resource_embodiment import ResourceEmb
 from oc_ocdm.graph.entities.bibliographic.responsible_agent import ResponsibleAgent
 from oc_ocdm.graph.entities.identifier import Identifier
 from oc_ocdm.graph.graph_entity import GraphEntity
-from oc_ocdm.support.sparql import sparql_construct
-from oc_ocdm.support.support import get_count, get_prefix, get_short_name
+from oc_ocdm.support.sparql import sparql_query_iter
+from oc_ocdm.support.support import build_graph_from_results, get_count, get_prefix, get_short_name
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 if TYPE_CHECKING:
     from typing import ClassVar, Dict, List, Optional, Set
@@ -308,7 +309,7 @@ class GraphSet(AbstractSet[GraphEntity]):
     def _add(
         self, graph_url: str, short_name: str, res: str | None = None
     ) -> tuple[TripleLite, str | None, str | None]:
-        cur_g = TripleLite(identifier=graph_url)
+        cur_g = TrackedGraph(identifier=graph_url)
 
         count: Optional[str] = None
         label: Optional[str] = None
@@ -348,22 +349,60 @@ class GraphSet(AbstractSet[GraphEntity]):
 
         return result_list
 
-    def remove_orphans_from_triplestore(self, ts_url: str, resp_agent: str) -> None:
-        for entity_res, entity in self.res_to_entity.items():
-            if entity.to_be_deleted:
-                query: str = f"CONSTRUCT {{?s ?p ?o}} WHERE {{?s ?p ?o ; ?p_1 <{entity_res}>}}"
-                nt_bytes = sparql_construct(ts_url, query)
-                if nt_bytes:
-                    from oc_ocdm.reader import Reader
-
-                    rdflib_g = Graph()
-                    rdflib_g.parse(BytesIO(nt_bytes), format="nt")
-                    graphs = from_rdflib(rdflib_g)
-                    imported_entities: List[GraphEntity] = Reader.import_entities_from_graph(
-                        self, graphs[0], resp_agent
-                    )
-                    for imported_entity in imported_entities:
-                        imported_entity.g.remove((imported_entity.res, None, RDFTerm("uri", str(entity_res))))
+    def remove_orphans_from_triplestore(
+        self, ts_url: str, resp_agent: str, batch_size: int = 100, max_workers: int = 4
+    ) -> None:
+        """
+        It imports every entity of the triplestore that references an entity marked as to be deleted,
+        and removes such references from them.
+
+        The referrers are retrieved with one query per ``batch_size`` deleted entities (listed in
+        a ``VALUES`` block), and up to ``max_workers`` queries are sent concurrently.
+
+        :param ts_url: The URL of the SPARQL endpoint
+        :type ts_url: str
+        :param resp_agent: The responsible agent of the imported entities
+        :type resp_agent: str
+        :param batch_size: The number of deleted entities looked up by each query
+        :type batch_size: int
+        :param max_workers: The maximum number of concurrent queries
+        :type max_workers: int
+        :raises ValueError: if ``batch_size`` or ``max_workers`` is not positive
+        :return: None
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+        if max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer.")
+        deleted_res: List[str] = [res for res, entity in self.res_to_entity.items() if entity.to_be_deleted]
+        if not deleted_res:
+            return
+
+        batches = [deleted_res[i : i + batch_size] for i in range(0, len(deleted_res), batch_size)]
+        referrers = TripleLite()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            for batch_referrers in executor.map(partial(self._query_referrers, ts_url), batches):
+                referrers.add_many(batch_referrers)
+        if len(referrers) == 0:
+            return
+
+        from oc_ocdm.reader import Reader
+
+        Reader.import_entities_from_graph(self, referrers, resp_agent)
+        deleted_set: Set[str] = set(deleted_res)
+        dangling_triples = [
+            triple for triple in referrers if triple[2].type == "uri" and triple[2].value in deleted_set
+        ]
+        for s, p, o in dangling_triples:
+            entity = self.res_to_entity.get(s)
+            if entity is not None:
+                entity.g.remove((s, p, o))
+
+    @staticmethod
+    def _query_referrers(ts_url: str, deleted_res: List[str]) -> TripleLite:
+        values = " ".join(f"<{res}>" for res in deleted_res)
+        query: str = f"SELECT DISTINCT ?s ?p ?o WHERE {{ VALUES ?deleted {{ {values} }} ?s ?p_1 ?deleted . ?s ?p ?o }}"
+        return build_graph_from_results(sparql_query_iter(ts_url, query))
 
     def commit_changes(self):
         for res, entity in self.res_to_entity.items():
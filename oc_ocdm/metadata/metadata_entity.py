@@ -13,6 +13,8 @@ from triplelite import RDFTerm, SubgraphView, Triple, TripleLite, rdflib_to_rdft
 
 from oc_ocdm.abstract_entity import AbstractEntity
 from oc_ocdm.constants import Namespace
+from oc_ocdm.support.query_utils import get_change_log
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 if TYPE_CHECKING:
     from typing import ClassVar, Dict
@@ -69,6 +71,7 @@ class MetadataEntity(AbstractEntity):
         self.short_name: str = short_name
         self.m_set: MetadataSet = m_set
         self._preexisting_triples: frozenset[Triple] = frozenset()
+        self._reset_change_log()
         self._merge_list: tuple[MetadataEntity, ...] = ()
         # FLAGS
         self._to_be_deleted: bool = False
@@ -94,6 +97,7 @@ class MetadataEntity(AbstractEntity):
                 (self.res, p, rdflib_to_rdfterm(o)) for p, o in preexisting_graph.predicate_objects(self.res)
             )
             self.g.add_many(self._preexisting_triples)
+            self._reset_change_log()
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -124,6 +128,23 @@ class MetadataEntity(AbstractEntity):
     def preexisting_triples(self) -> frozenset[Triple]:
         return self._preexisting_triples
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Indicates if the triples of this entity differ from its preexisting triples.
+
+        When the entity graph is a ``TrackedGraph``, this only inspects its change log,
+        without comparing the whole graph with the preexisting triples.
+        """
+        change_log = get_change_log(self)
+        if change_log is not None:
+            return change_log.is_dirty
+        return frozenset(self.g) != self._preexisting_triples
+
+    def _reset_change_log(self) -> None:
+        if isinstance(self.g, TrackedGraph):
+            self.g.reset_changes(self._preexisting_triples)
+
     def mark_as_to_be_deleted(self) -> None:
         # Here we must REMOVE triples pointing
         # to 'self' [THIS CANNOT BE UNDONE]:
@@ -188,6 +209,7 @@ class MetadataEntity(AbstractEntity):
             self.remove_every_triple()
         else:
             self._preexisting_triples = frozenset(self.g.triples((self.res, None, None)))
+        self._reset_change_log()
         self._to_be_deleted = False
         self._was_merged = False
         self._merge_list = ()
@@ -15,6 +15,7 @@ from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHan
 from oc_ocdm.metadata.entities.dataset import Dataset
 from oc_ocdm.metadata.entities.distribution import Distribution
 from oc_ocdm.support.support import get_count, get_short_name, is_dataset
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 if TYPE_CHECKING:
     from typing import ClassVar, Dict, Tuple
@@ -109,7 +110,7 @@ class MetadataSet(AbstractSet[MetadataEntity]):
     def _add_metadata(
         self, short_name: str, dataset_name: str, res: str | None = None
     ) -> Tuple[TripleLite, str | None, str | None]:
-        cur_g = TripleLite()
+        cur_g = TrackedGraph()
 
         count: str | None = None
         label: str | None = None
@@ -17,6 +17,7 @@ from oc_ocdm.support.query_utils import get_update_query
 if TYPE_CHECKING:
     from typing import ClassVar, Dict, List, Optional, Tuple
 
+    from oc_ocdm._types import CounterKey
     from oc_ocdm.graph.graph_entity import GraphEntity
 
 from triplelite import TripleLite
@@ -27,6 +28,7 @@ from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHan
 from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_entity import ProvEntity
+from oc_ocdm.support.metrics import NULL_METRICS, MetricsSink
 from oc_ocdm.support.support import get_count, get_prefix, get_short_name
 
 
@@ -41,6 +43,7 @@ class ProvSet(AbstractSet[ProvEntity]):
         wanted_label: bool = True,
         custom_counter_handler: Optional[CounterHandler] = None,
         supplier_prefix: str = "",
+        metrics: Optional[MetricsSink] = None,
     ) -> None:
         super(ProvSet, self).__init__()
         self.prov_g: GraphSet = prov_subj_graph_set
@@ -49,12 +52,18 @@ class ProvSet(AbstractSet[ProvEntity]):
         self.wanted_label: bool = wanted_label
         self.info_dir = info_dir
         self.supplier_prefix = supplier_prefix
+        # Snapshot counters prefetched by generate_provenance, keyed by the URI of the prov subject
+        self._snapshot_counters: Dict[str, int] = {}
+        # Sink of the timings and counters of generate_provenance (see oc_ocdm.support.metrics)
+        self.metrics: MetricsSink = metrics if metrics is not None else NULL_METRICS
         if custom_counter_handler:
             self.counter_handler = custom_counter_handler
-        elif info_dir is not None and info_dir != "":
-            self.counter_handler = FilesystemCounterHandler(info_dir, supplier_prefix=supplier_prefix)
         else:
-            self.counter_handler = InMemoryCounterHandler()
+            if info_dir is not None and info_dir != "":
+                self.counter_handler = FilesystemCounterHandler(info_dir, supplier_prefix=supplier_prefix)
+            else:
+                self.counter_handler = InMemoryCounterHandler()
+            self.counter_handler.metrics = self.metrics
 
     def get_entity(self, res: str) -> Optional[ProvEntity]:
         if res in self.res_to_entity:
@@ -106,6 +115,18 @@ class ProvSet(AbstractSet[ProvEntity]):
         return merge_description
 
     def generate_provenance(self, c_time: Optional[float] = None) -> set[str]:
+        with self.metrics.span("prov.generate_provenance"):
+            with self.metrics.span("prov.prefetch_snapshot_counters"):
+                self._prefetch_snapshot_counters()
+            try:
+                modified_entities = self._generate_provenance(c_time)
+            finally:
+                self._snapshot_counters = {}
+        self.metrics.increment("prov.entities", len(self.prov_g.res_to_entity))
+        self.metrics.increment("prov.modified_entities", len(modified_entities))
+        return modified_entities
+
+    def _generate_provenance(self, c_time: Optional[float] = None) -> set[str]:
         modified_entities: set[str] = set()
 
         if c_time is None:
@@ -171,6 +192,9 @@ class ProvSet(AbstractSet[ProvEntity]):
                     cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time)
                     cur_snapshot.has_description(f"The entity '{cur_subj.res}' has been created.")
                     modified_entities.add(cur_subj.res)
+            elif not cur_subj.to_be_deleted and not cur_subj.is_restored and not cur_subj.is_dirty:
+                # Unchanged entities don't need a new snapshot, nor the computation of an update query.
+                continue
             else:
                 update_queries, _, _ = get_update_query(cur_subj, entity_type="graph")
                 was_modified: bool = len(update_queries) > 0
@@ -228,34 +252,23 @@ class ProvSet(AbstractSet[ProvEntity]):
             except ValueError:
                 res_count: int = -1
 
-            if isinstance(self.counter_handler, SqliteCounterHandler):
-                cur_count: int = self.counter_handler.read_counter(str(prov_subject))
+            counter_key = self._snapshot_counter_key(prov_subject.res)
+            if prov_subject.res in self._snapshot_counters:
+                cur_count: int = self._snapshot_counters[prov_subject.res]
             else:
-                cur_count: int = self.counter_handler.read_counter(
-                    prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix
-                )
+                cur_count: int = self.counter_handler.read_counter(*counter_key)
 
             if res_count > cur_count:
-                if isinstance(self.counter_handler, SqliteCounterHandler):
-                    self.counter_handler.set_counter(int(get_count(prov_subject.res)), str(prov_subject))
-                else:
-                    self.counter_handler.set_counter(
-                        res_count,
-                        prov_subject.short_name,
-                        "se",
-                        int(get_count(prov_subject.res)),
-                        supplier_prefix=supplier_prefix,
-                    )
+                entity_short_name, prov_short_name, identifier, key_prefix = counter_key
+                self.counter_handler.set_counter(res_count, entity_short_name, prov_short_name, identifier, key_prefix)
+                if prov_subject.res in self._snapshot_counters:
+                    self._snapshot_counters[prov_subject.res] = res_count
             return cur_g, count, label
 
-        if isinstance(self.counter_handler, SqliteCounterHandler):
-            count = str(self.counter_handler.increment_counter(str(prov_subject)))
-        else:
-            count = str(
-                self.counter_handler.increment_counter(
-                    prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix
-                )
-            )
+        new_count: int = self.counter_handler.increment_counter(*self._snapshot_counter_key(prov_subject.res))
+        if prov_subject.res in self._snapshot_counters:
+            self._snapshot_counters[prov_subject.res] = new_count
+        count = str(new_count)
 
         if self.wanted_label:
             cur_short_name = prov_subject.short_name
@@ -281,7 +294,6 @@ class ProvSet(AbstractSet[ProvEntity]):
         return cur_g, count, label
 
     def _retrieve_last_snapshot(self, prov_subject: str) -> Optional[str]:
-        subj_short_name: str = get_short_name(prov_subject)
         try:
             subj_count: str = get_count(prov_subject)
             if int(subj_count) <= 0:
@@ -292,21 +304,35 @@ class ProvSet(AbstractSet[ProvEntity]):
         except ValueError:
             raise ValueError("prov_subject is not a valid URIRef. Unable to extract the count value!")
 
-        supplier_prefix = get_prefix(prov_subject)
-
-        if isinstance(self.counter_handler, SqliteCounterHandler):
-            last_snapshot_count: str = str(self.counter_handler.read_counter(str(prov_subject)))
+        if prov_subject in self._snapshot_counters:
+            last_snapshot_count: int = self._snapshot_counters[prov_subject]
         else:
-            last_snapshot_count: str = str(
-                self.counter_handler.read_counter(
-                    subj_short_name, "se", int(subj_count), supplier_prefix=supplier_prefix
-                )
-            )
+            last_snapshot_count: int = self.counter_handler.read_counter(*self._snapshot_counter_key(prov_subject))
 
-        if int(last_snapshot_count) <= 0:
+        if last_snapshot_count <= 0:
             return None
         else:
-            return str(prov_subject) + "/prov/se/" + last_snapshot_count
+            return str(prov_subject) + "/prov/se/" + str(last_snapshot_count)
+
+    def _snapshot_counter_key(self, prov_subject: str) -> CounterKey:
+        # Snapshot counters in SqliteCounterHandler databases have always been keyed by the entity IRI
+        if isinstance(self.counter_handler, SqliteCounterHandler):
+            return str(prov_subject), "", 1, ""
+        return get_short_name(prov_subject), "se", int(get_count(prov_subject)), get_prefix(prov_subject)
+
+    def _prefetch_snapshot_counters(self) -> None:
+        counter_keys: Dict[str, CounterKey] = {}
+        for cur_subj in self.prov_g.res_to_entity.values():
+            for entity in (cur_subj, *cur_subj.merge_list):
+                if entity.res in counter_keys:
+                    continue
+                try:
+                    counter_keys[entity.res] = self._snapshot_counter_key(entity.res)
+                except ValueError:
+                    # Invalid IRIs are reported later on by _retrieve_last_snapshot
+                    continue
+        counter_values = self.counter_handler.read_counters(list(counter_keys.values()))
+        self._snapshot_counters = dict(zip(counter_keys.keys(), counter_values))
 
     def get_se(self) -> Tuple[SnapshotEntity, ...]:
         return tuple(entity for entity in self.res_to_entity.values() if isinstance(entity, SnapshotEntity))
@@ -8,9 +8,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from importlib import import_module
 from typing import TYPE_CHECKING, BinaryIO, TextIO, cast
 from zipfile import ZipFile
@@ -23,8 +27,9 @@ from triplelite import TripleLite, from_rdflib
 from oc_ocdm._types import ContextMap, JsonLdDocument, JsonObject, JsonValue, SparqlResultRows
 from oc_ocdm.constants import RDF_TYPE
 from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.support.metrics import NULL_METRICS, MetricsSink
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.sparql import SPARQLEndpointError, sparql_query
+from oc_ocdm.support.sparql import AsyncSPARQLClient, SPARQLEndpointError, sparql_query, sparql_query_iter
 from oc_ocdm.support.support import build_graph_from_results, normalize_graph_literals
 
 if TYPE_CHECKING:
@@ -104,6 +109,7 @@ class Reader(object):
         repok: Optional[Reporter] = None,
         reperr: Optional[Reporter] = None,
         context_map: Optional[ContextMap] = None,
+        metrics: Optional[MetricsSink] = None,
     ) -> None:
 
         if context_map is not None:
@@ -127,23 +133,34 @@ class Reader(object):
         else:
             self.reperr: Reporter = reperr
 
+        # Sink of the timings and counters of load and load_jsonld_dict (see oc_ocdm.support.metrics)
+        self.metrics: MetricsSink = metrics if metrics is not None else NULL_METRICS
+
+    def _count_file_read(self, file_path: str) -> None:
+        self.metrics.increment("reader.files_read")
+        if self.metrics.enabled:
+            self.metrics.increment("reader.bytes_read", os.path.getsize(file_path))
+
     def load(self, rdf_file_path: str) -> Optional[Dataset]:
         self.repok.new_article()
         self.reperr.new_article()
 
         loaded_graph: Optional[Dataset] = None
         if os.path.isfile(rdf_file_path):
+            self._count_file_read(rdf_file_path)
             try:
-                loaded_graph = self._load_graph(rdf_file_path)
+                with self.metrics.span("reader.load"):
+                    loaded_graph = self._load_graph(rdf_file_path)
             except Exception as e:
                 self.reperr.add_sentence(
                     "[1] "
                     "It was impossible to handle the format used for "
                     "storing the file (stored in the temporary path) "
-                    f"'{rdf_file_path}'. Additional details: {e}"
+                    f"'{rdf_file_path}'. Additional details: {e}",
+                    level=logging.ERROR,
                 )
         else:
-            self.reperr.add_sentence(f"[2] The file specified ('{rdf_file_path}') doesn't exist.")
+            self.reperr.add_sentence(f"[2] The file specified ('{rdf_file_path}') doesn't exist.", level=logging.ERROR)
 
         return loaded_graph
 
@@ -218,6 +235,12 @@ class Reader(object):
         return False
 
     def load_jsonld_dict(self, rdf_file_path: str) -> JsonLdDocument:
+        with self.metrics.span("reader.load_jsonld_dict"):
+            data = self._load_jsonld_dict(rdf_file_path)
+        self._count_file_read(rdf_file_path)
+        return data
+
+    def _load_jsonld_dict(self, rdf_file_path: str) -> JsonLdDocument:
         if rdf_file_path.endswith(".zip"):
             with ZipFile(file=rdf_file_path, mode="r") as archive:
                 for zf_name in archive.namelist():
@@ -381,6 +404,45 @@ class Reader(object):
             print(f"[3] Could not import entity due to communication problems: {e}")
             raise
 
+    @staticmethod
+    def _build_import_query(entities: List[str], include_neighbours: bool) -> str:
+        values = " ".join(f"<{entity}>" for entity in entities)
+        if include_neighbours:
+            # The entities linked by the requested ones (except their classes) are retrieved as well
+            return (
+                f"SELECT DISTINCT ?s ?p ?o WHERE {{ "
+                f"{{ VALUES ?s {{ {values} }} ?s ?p ?o }} UNION "
+                f"{{ VALUES ?entity {{ {values} }} ?entity ?link ?s . "
+                f"FILTER(isIRI(?s) && ?link != <{RDF_TYPE}>) ?s ?p ?o }} }}"
+            )
+        return f"SELECT ?s ?p ?o WHERE {{ VALUES ?s {{ {values} }} ?s ?p ?o }}"
+
+    @staticmethod
+    def _fetch_entities(ts_url: str, entities: List[str], include_neighbours: bool) -> TripleLite:
+        query = Reader._build_import_query(entities, include_neighbours)
+        return build_graph_from_results(sparql_query_iter(ts_url, query, max_retries=3, backoff_factor=2.5))
+
+    @staticmethod
+    def _import_fetched_batch(
+        g_set: GraphSet, batch: List[str], graph: TripleLite, resp_agent: str, enable_validation: bool
+    ) -> List[GraphEntity]:
+        not_found_entities = set(batch)
+
+        if len(graph) == 0:
+            entities_str = ", ".join(not_found_entities)
+            raise ValueError(f"The requested entities were not found in the triplestore: {entities_str}")
+
+        not_found_entities.difference_update(graph.subjects())
+
+        batch_entities = Reader.import_entities_from_graph(
+            g_set=g_set, results=graph, resp_agent=resp_agent, enable_validation=enable_validation
+        )
+
+        if not_found_entities:
+            entities_str = ", ".join(not_found_entities)
+            raise ValueError(f"The following entities were not recognized as proper OCDM entities: {entities_str}")
+        return batch_entities
+
     @staticmethod
     def import_entities_from_triplestore(
         g_set: GraphSet,
@@ -389,54 +451,156 @@ class Reader(object):
         resp_agent: str,
         enable_validation: bool = False,
         batch_size: int = 1000,
+        max_workers: int = 4,
+        include_neighbours: bool = False,
     ) -> List[GraphEntity]:
+        """
+        It imports the given entities from a triplestore into a ``GraphSet``.
+
+        The entities are requested ``batch_size`` at a time (listed in a ``VALUES`` block), and up to
+        ``max_workers`` batches are fetched concurrently. Batches are imported in order, and at most
+        ``max_workers`` fetched batches are kept in memory at the same time.
+
+        :param g_set: The ``GraphSet`` where the entities will be imported
+        :type g_set: GraphSet
+        :param ts_url: The URL of the SPARQL endpoint
+        :type ts_url: str
+        :param entities: The IRIs of the entities to be imported
+        :type entities: List[str]
+        :param resp_agent: The responsible agent of the imported entities
+        :type resp_agent: str
+        :param enable_validation: If True, the retrieved triples are validated against the OCDM SHACL shapes
+        :type enable_validation: bool
+        :param batch_size: The number of entities requested by each query
+        :type batch_size: int
+        :param max_workers: The maximum number of concurrent queries
+        :type max_workers: int
+        :param include_neighbours: If True, the entities directly linked by the requested ones are
+          retrieved by the same queries and imported as well
+        :type include_neighbours: bool
+        :raises ValueError: if no entities are given, if ``batch_size`` or ``max_workers`` is not positive,
+          or if some of the requested entities are not found in the triplestore
+        :return: The list of the imported entities
+        """
         if not entities:
             raise ValueError("No entities provided for import")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+        if max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer.")
 
         imported_entities: List[GraphEntity] = []
+        batches = iter([entities[i : i + batch_size] for i in range(0, len(entities), batch_size)])
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending: deque[tuple[List[str], Future[TripleLite]]] = deque()
+
+        def submit_next_batch() -> None:
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append((batch, executor.submit(Reader._fetch_entities, ts_url, batch, include_neighbours)))
 
         try:
-            for i in range(0, len(entities), batch_size):
-                batch = entities[i : i + batch_size]
-                not_found_entities = set(batch)
+            for _ in range(max_workers):
+                submit_next_batch()
+
+            while pending:
+                batch, future = pending.popleft()
+                graph = future.result()
+                submit_next_batch()
+                imported_entities.extend(
+                    Reader._import_fetched_batch(g_set, batch, graph, resp_agent, enable_validation)
+                )
 
-                union_patterns: list[str] = []
-                for entity in batch:
-                    union_patterns.append(f"{{ BIND(<{entity}> AS ?s) ?s ?p ?o }}")
+        except ValueError:
+            raise
+        except SPARQLEndpointError as e:
+            print(f"[3] Could not import batch due to communication problems: {e}")
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-                query = f"""
-                SELECT ?s ?p ?o
-                WHERE {{
-                    {" UNION ".join(union_patterns)}
-                }}
-                """
+        if not imported_entities:
+            raise ValueError("None of the requested entities were found or recognized as proper OCDM entities.")
 
-                results = sparql_query(ts_url, query, max_retries=3, backoff_factor=2.5)["results"]["bindings"]
+        return imported_entities
 
-                if not results:
-                    entities_str = ", ".join(not_found_entities)
-                    raise ValueError(f"The requested entities were not found in the triplestore: {entities_str}")
+    @staticmethod
+    async def import_entities_from_triplestore_async(
+        g_set: GraphSet,
+        ts_url: str,
+        entities: List[str],
+        resp_agent: str,
+        enable_validation: bool = False,
+        batch_size: int = 1000,
+        include_neighbours: bool = False,
+        client: Optional[AsyncSPARQLClient] = None,
+    ) -> List[GraphEntity]:
+        """
+        Asynchronous counterpart of ``import_entities_from_triplestore``, which does not block the event loop.
+
+        The batches are fetched by ``client``, which also bounds the number of concurrent queries
+        (and of fetched batches kept in memory at the same time), and they are imported in order.
+
+        :param g_set: The ``GraphSet`` where the entities will be imported
+        :type g_set: GraphSet
+        :param ts_url: The URL of the SPARQL endpoint
+        :type ts_url: str
+        :param entities: The IRIs of the entities to be imported
+        :type entities: List[str]
+        :param resp_agent: The responsible agent of the imported entities
+        :type resp_agent: str
+        :param enable_validation: If True, the retrieved triples are validated against the OCDM SHACL shapes
+        :type enable_validation: bool
+        :param batch_size: The number of entities requested by each query
+        :type batch_size: int
+        :param include_neighbours: If True, the entities directly linked by the requested ones are
+          retrieved by the same queries and imported as well
+        :type include_neighbours: bool
+        :param client: The client used to send the queries. If None, a temporary client is used.
+        :type client: Optional[AsyncSPARQLClient]
+        :raises ValueError: if no entities are given, if ``batch_size`` is not positive,
+          or if some of the requested entities are not found in the triplestore
+        :return: The list of the imported entities
+        """
+        if not entities:
+            raise ValueError("No entities provided for import")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+
+        own_client = client is None
+        if client is None:
+            client = AsyncSPARQLClient(max_retries=3, backoff_factor=2.5)
+        imported_entities: List[GraphEntity] = []
+        batches = iter([entities[i : i + batch_size] for i in range(0, len(entities), batch_size)])
+        pending: deque[tuple[List[str], asyncio.Task[TripleLite]]] = deque()
 
-                for result in results:
-                    if "s" in result and "value" in result["s"]:
-                        not_found_entities.discard(result["s"]["value"])
+        def submit_next_batch(client: AsyncSPARQLClient) -> None:
+            batch = next(batches, None)
+            if batch is not None:
+                query = Reader._build_import_query(batch, include_neighbours)
+                pending.append((batch, asyncio.ensure_future(client.query_graph(ts_url, query))))
 
-                batch_entities = Reader.import_entities_from_graph(
-                    g_set=g_set, results=results, resp_agent=resp_agent, enable_validation=enable_validation
+        try:
+            for _ in range(client.max_concurrency):
+                submit_next_batch(client)
+
+            while pending:
+                batch, task = pending.popleft()
+                graph = await task
+                submit_next_batch(client)
+                imported_entities.extend(
+                    Reader._import_fetched_batch(g_set, batch, graph, resp_agent, enable_validation)
                 )
-                imported_entities.extend(batch_entities)
-
-                if not_found_entities:
-                    entities_str = ", ".join(not_found_entities)
-                    raise ValueError(
-                        f"The following entities were not recognized as proper OCDM entities: {entities_str}"
-                    )
 
-        except ValueError:
-            raise
         except SPARQLEndpointError as e:
             print(f"[3] Could not import batch due to communication problems: {e}")
             raise
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if own_client:
+                # After a failure, waiting for the requests still running would block the event loop
+                client.close(wait=False)
 
         if not imported_entities:
             raise ValueError("None of the requested entities were found or recognized as proper OCDM entities.")
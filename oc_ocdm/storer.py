@@ -8,33 +8,49 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
+import logging
 import os
+import uuid
 from collections.abc import Iterable
+from contextlib import suppress
 from datetime import datetime
 from typing import TYPE_CHECKING, cast
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import orjson
-from filelock import FileLock
+from filelock import FileLock, Timeout
 from rdflib import Dataset, Graph, Literal, URIRef
 from rdflib.term import Node
 from triplelite import RDFTerm, TripleLite
 
-from oc_ocdm._types import ContextMap, JsonLdDocument, JsonObject, JsonValue, RdfLibObject, RdfLibQuad
+from oc_ocdm._types import (
+    ContextMap,
+    InterprocessLock,
+    JsonLdDocument,
+    JsonObject,
+    JsonValue,
+    Lock,
+    RdfLibObject,
+    RdfLibQuad,
+)
 from oc_ocdm.constants import RDF_TYPE, XSD_STRING
 from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.metadata.metadata_entity import MetadataEntity
 from oc_ocdm.prov.prov_entity import ProvEntity
 from oc_ocdm.reader import Reader, transform_jsonld_graphs
-from oc_ocdm.support.query_utils import get_update_query
+from oc_ocdm.support.manifest import Manifest, ManifestEntry
+from oc_ocdm.support.metrics import NULL_METRICS, MetricsSink
+from oc_ocdm.support.query_utils import MAX_TRIPLES_PER_QUERY, UPDATE_FORMATS, get_update_patch, get_update_query
+from oc_ocdm.support.rdf_patch import RDF_PATCH_EXTENSION, patch_to_sparql
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.sparql import SPARQLEndpointError, sparql_update
+from oc_ocdm.support.sparql import AsyncSPARQLClient, SPARQLEndpointError, sparql_update
 from oc_ocdm.support.support import find_paths
 
 if TYPE_CHECKING:
-    from typing import List, Tuple
+    from typing import Iterator, List, Tuple
 
     from oc_ocdm.abstract_entity import AbstractEntity
     from oc_ocdm.abstract_set import AbstractSet
@@ -83,8 +99,24 @@ def _add_quads(dataset: Dataset, quads: list[RdfLibQuad]) -> None:
     dataset.addN(cast(Iterable[tuple[Node, Node, Node, Graph]], quads))
 
 
+def _same_entity(existing: JsonObject, entity_dict: JsonObject) -> bool:
+    # The order of the values of a property carries no meaning, so it is ignored
+    if existing == entity_dict:
+        return True
+    if existing.keys() != entity_dict.keys():
+        return False
+    for key, value in entity_dict.items():
+        existing_value = existing[key]
+        if isinstance(value, list) and isinstance(existing_value, list):
+            if len(value) != len(existing_value) or any(v not in existing_value for v in value):
+                return False
+        elif value != existing_value:
+            return False
+    return True
+
+
 class _JsonLdDoc:
-    __slots__ = ("_entities",)
+    __slots__ = ("_entities", "changed")
 
     def __init__(self, data: JsonLdDocument) -> None:
         self._entities: dict[str, dict[str, JsonObject]] = {}
@@ -94,11 +126,24 @@ class _JsonLdDoc:
             for entity_dict in cast(list[JsonObject], graph_obj["@graph"]):
                 entity_index[cast(str, entity_dict["@id"])] = entity_dict
             self._entities[graph_iri] = entity_index
+        # Whether the entities differ from the ones of the data the document was created from
+        self.changed: bool = False
 
     def upsert_entity(self, graph_iri: str, entity_uri: str, entity_dict: JsonObject) -> None:
         if graph_iri not in self._entities:
             self._entities[graph_iri] = {}
-        self._entities[graph_iri][entity_uri] = entity_dict
+        existing = self._entities[graph_iri].get(entity_uri)
+        if existing is None or not _same_entity(existing, entity_dict):
+            self._entities[graph_iri][entity_uri] = entity_dict
+            self.changed = True
+
+    def replace_entity(self, graph_iri: str, entity_uri: str, entity_dict: JsonObject) -> None:
+        # Unlike upsert_entity, an entity whose content changed is moved to the end of its graph
+        existing = self._entities.get(graph_iri, {}).get(entity_uri)
+        if existing is not None and _same_entity(existing, entity_dict):
+            return
+        self.remove_entity(graph_iri, entity_uri)
+        self.upsert_entity(graph_iri, entity_uri, entity_dict)
 
     def merge_entity(self, graph_iri: str, entity_uri: str, entity_dict: JsonObject) -> None:
         if graph_iri not in self._entities:
@@ -106,21 +151,29 @@ class _JsonLdDoc:
         existing = self._entities[graph_iri].get(entity_uri)
         if existing is None:
             self._entities[graph_iri][entity_uri] = entity_dict
+            self.changed = True
             return
         for key, value in entity_dict.items():
             if key == "@id":
                 continue
             if key not in existing:
                 existing[key] = value
+                self.changed = True
             else:
                 existing_values = cast(list[JsonValue], existing[key])
                 for v in cast(list[JsonValue], value):
                     if v not in existing_values:
                         existing_values.append(v)
+                        self.changed = True
 
     def remove_entity(self, graph_iri: str, entity_uri: str) -> None:
         if graph_iri in self._entities and entity_uri in self._entities[graph_iri]:
             del self._entities[graph_iri][entity_uri]
+            self.changed = True
+
+    def entity_uris(self) -> Iterator[str]:
+        for entities in self._entities.values():
+            yield from entities
 
     def to_list(self) -> JsonLdDocument:
         return [
@@ -130,6 +183,139 @@ class _JsonLdDoc:
         ]
 
 
+# Directory, within the base directory of store_all, holding the journals of the atomic writes
+_JOURNAL_DIR = ".journal"
+_JOURNAL_EXTENSION = ".journal"
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directories(directories: Iterable[str]) -> None:
+    # Directories cannot be opened, and don't need to be synced, on Windows
+    if os.name == "posix":
+        for directory in directories:
+            _fsync_path(directory)
+
+
+def _read_journal(journal_path: str) -> Tuple[List[str], int]:
+    file_paths: List[str] = []
+    synced = 0
+    with open(journal_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("F "):
+                file_paths.append(line[2:])
+            elif line.startswith("S ") and line[2:].isdigit():
+                synced = int(line[2:])
+    return file_paths, synced
+
+
+class _Journal:
+    """
+    The journal of a store_all call with atomic writes. It lists the files that the call may write,
+    relative to the base directory, and, when their writes are made durable in batches, how many
+    of them have already been synced to disk ("F <path>" and "S <count>" lines). A journal left
+    behind by a crashed process tells Storer.recover which files may be in an inconsistent state.
+
+    Every file is written to a temporary file, which is synced to disk before replacing the original one.
+    With batches, the temporary files wait until the batch is full: they are then synced and renamed,
+    and their directories are synced once, which makes the renames durable. The lock of a waiting file
+    is held until it is renamed.
+    """
+
+    __slots__ = ("path", "token", "fsync_batch_size", "_lock", "_file", "_done", "_pending")
+
+    def __init__(self, base_dir: str, file_paths: Iterable[str], fsync_batch_size: int) -> None:
+        journal_dir = os.path.join(base_dir, _JOURNAL_DIR)
+        os.makedirs(journal_dir, exist_ok=True)
+        self.token: str = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self.path: str = os.path.join(journal_dir, self.token + _JOURNAL_EXTENSION)
+        self.fsync_batch_size: int = fsync_batch_size
+        # Held until the journal is closed, so that the journals of running processes are never recovered
+        self._lock = cast(Lock, FileLock(self.path + ".lock"))
+        self._lock.acquire()
+        self._file = open(self.path, "wt", encoding="utf-8")
+        self._file.writelines(f"F {os.path.relpath(file_path, base_dir)}\n" for file_path in file_paths)
+        self._flush()
+        if self.fsync_batch_size:
+            _fsync_directories([journal_dir])
+        self._done = 0
+        # The files waiting to be synced and renamed, with their locks
+        self._pending: List[Tuple[str, Lock]] = []
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self.fsync_batch_size:
+            os.fsync(self._file.fileno())
+
+    def temp_path(self, file_path: str) -> str:
+        return f"{file_path}.{self.token}.tmp"
+
+    def try_acquire(self, lock: InterprocessLock) -> bool:
+        # Waiting for a lock while holding the ones of the waiting files could deadlock with another process,
+        # so the waiting files are renamed first if the lock is busy
+        if not self._pending:
+            return False
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            self.sync()
+            return False
+        return True
+
+    def file_skipped(self) -> None:
+        self._done += 1
+
+    def file_written(self, file_path: str, lock: Lock) -> None:
+        self._done += 1
+        if not self.fsync_batch_size:
+            temp_path = self.temp_path(file_path)
+            try:
+                _fsync_path(temp_path)
+                os.replace(temp_path, file_path)
+            except BaseException:
+                with suppress(OSError):
+                    os.remove(temp_path)
+                raise
+            return
+        lock.acquire()
+        self._pending.append((file_path, lock))
+        if len(self._pending) >= self.fsync_batch_size:
+            self.sync()
+
+    def sync(self) -> None:
+        pending, self._pending = self._pending, []
+        try:
+            for file_path, _ in pending:
+                _fsync_path(self.temp_path(file_path))
+            for file_path, _ in pending:
+                os.replace(self.temp_path(file_path), file_path)
+            _fsync_directories({os.path.dirname(file_path) for file_path, _ in pending})
+        finally:
+            for _, lock in pending:
+                lock.release()
+        self._file.write(f"S {self._done}\n")
+        self._flush()
+
+    def close(self) -> None:
+        try:
+            if self._pending:
+                self.sync()
+            self._file.close()
+            os.remove(self.path)
+        finally:
+            self._file.close()
+            self._lock.release()
+        with suppress(OSError):
+            os.remove(self.path + ".lock")
+
+
 class Storer(object):
     def __init__(
         self,
@@ -143,6 +329,11 @@ class Storer(object):
         output_format: str = "json-ld",
         zip_output: bool = False,
         modified_entities: set[str] | None = None,
+        update_format: str = "sparql",
+        metrics: MetricsSink | None = None,
+        manifest: Manifest | None = None,
+        atomic_writes: bool = False,
+        fsync_batch_size: int = 0,
     ) -> None:
         # We only accept format strings that:
         # 1. are supported by rdflib
@@ -163,6 +354,12 @@ class Storer(object):
             )
         else:
             self.output_format: str = output_format
+        if update_format not in UPDATE_FORMATS:
+            raise ValueError(
+                f"Given update_format '{update_format}' is not supported. Available formats: {UPDATE_FORMATS}."
+            )
+        # Format of the change sets saved by upload_all: they are always converted to SPARQL before being uploaded
+        self.update_format: str = update_format
         self.zip_output = zip_output
         self.dir_split: int = dir_split
         self.n_file_item: int = n_file_item
@@ -193,6 +390,25 @@ class Storer(object):
         else:
             self.reperr: Reporter = reperr
 
+        # Sink of the timings and counters of store_all and upload_all (see oc_ocdm.support.metrics)
+        self.metrics: MetricsSink = metrics if metrics is not None else NULL_METRICS
+
+        # Index of the files written by store_all (see oc_ocdm.support.manifest)
+        if manifest is not None and self.output_format != "json-ld":
+            raise ValueError("A manifest can only be maintained with the 'json-ld' output format.")
+        self.manifest: Manifest | None = manifest
+
+        # With atomic writes, store_all writes every file to a temporary file which is synced to disk
+        # and then replaces it, and keeps a journal of the files in flight (see recover)
+        if atomic_writes and self.output_format != "json-ld":
+            raise ValueError("Atomic writes are only available with the 'json-ld' output format.")
+        if fsync_batch_size < 0:
+            raise ValueError("fsync_batch_size must be a non negative integer.")
+        if fsync_batch_size and not atomic_writes:
+            raise ValueError("fsync_batch_size requires atomic_writes.")
+        self.atomic_writes: bool = atomic_writes
+        self.fsync_batch_size: int = fsync_batch_size
+
     @staticmethod
     def _to_rdflib_obj(o: RDFTerm) -> RdfLibObject:
         if o.type == "literal":
@@ -211,15 +427,26 @@ class Storer(object):
         self.reperr.new_article()
         self.repok.add_sentence("Store the graphs into a file: starting process")
 
-        if self.output_format == "json-ld":
-            self._store_graphs_in_file_jsonld_fast(file_path, context_path)
-            return
-
-        cg: Dataset = Dataset()
-        for g in self.a_set.graphs():
-            _add_quads(cg, self._entity_quads(g))
-
-        self._store_in_file(cg, file_path, context_path)
+        try:
+            if self.output_format == "json-ld":
+                self._store_graphs_in_file_jsonld_fast(file_path, context_path)
+            else:
+                cg: Dataset = Dataset()
+                for g in self.a_set.graphs():
+                    _add_quads(cg, self._entity_quads(g))
+                self._store_in_file(cg, file_path, context_path)
+            self.repok.add_sentence("Files added: 1.")
+        finally:
+            self._flush_reporters()
+
+    def _flush_reporters(self) -> None:
+        self.repok.flush()
+        self.reperr.flush()
+
+    def _report_file_added(self, file_path: str) -> None:
+        # Files are summarized by store_all and store_graphs_in_file, and reported one by one only in debug mode
+        if self.repok.is_enabled_for(logging.DEBUG):
+            self.repok.add_sentence(f"File '{file_path}' added.", level=logging.DEBUG)
 
     def _store_in_file(self, cur_g: Dataset, cur_file_path: str, context_path: str | None = None) -> None:
         zip_file_path = cur_file_path.replace(os.path.splitext(cur_file_path)[1], ".zip")
@@ -230,7 +457,8 @@ class Storer(object):
         else:
             self._write_graph(cur_g, None, cur_file_path, context_path)
 
-        self.repok.add_sentence(f"File '{cur_file_path}' added.")
+        self.metrics.increment("storer.files_written")
+        self._report_file_added(cur_file_path)
 
     def _write_graph(
         self, graph: Dataset, zip_file: ZipFile | None, cur_file_path: str, context_path: str | None
@@ -266,6 +494,22 @@ class Storer(object):
     def store_all(
         self, base_dir: str, base_iri: str, context_path: str | None = None, process_id: int | str | None = None
     ) -> List[str]:
+        try:
+            with self.metrics.span("storer.store_all"):
+                stored_paths, unchanged_files = self._store_all(base_dir, base_iri, context_path, process_id)
+            if unchanged_files:
+                self.repok.add_sentence(
+                    f"Files added: {len(stored_paths) - unchanged_files}. Files unchanged: {unchanged_files}."
+                )
+            else:
+                self.repok.add_sentence(f"Files added: {len(stored_paths)}.")
+            return stored_paths
+        finally:
+            self._flush_reporters()
+
+    def _store_all(
+        self, base_dir: str, base_iri: str, context_path: str | None, process_id: int | str | None
+    ) -> Tuple[List[str], int]:
         self.repok.new_article()
         self.reperr.new_article()
 
@@ -284,9 +528,10 @@ class Storer(object):
                     created_dirs.add(cur_dir_path)
                 relevant_paths.setdefault(cur_file_path, list())
                 relevant_paths[cur_file_path].append(entity)
+        self.metrics.increment("storer.entities", sum(len(entities) for entities in relevant_paths.values()))
 
         if self.output_format == "json-ld":
-            return self._store_all_jsonld_fast(relevant_paths, context_path)
+            return self._store_all_jsonld_fast(relevant_paths, base_dir, context_path)
 
         reader = Reader(context_map=self.context_map)
         for relevant_path, entities_in_path in relevant_paths.items():
@@ -295,8 +540,9 @@ class Storer(object):
                 relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
             )
             lock = FileLock(f"{output_filepath}.lock")
-            with lock:
+            with self.metrics.locked(lock, "storer.lock_wait"):
                 if os.path.exists(output_filepath):
+                    self.metrics.increment("storer.files_read")
                     stored_g = reader.load(output_filepath)
                 if stored_g is None:
                     stored_g = Dataset()
@@ -304,7 +550,7 @@ class Storer(object):
                     self.store(entity_in_path, stored_g, relevant_path, context_path, False)
                 self._store_in_file(stored_g, relevant_path, context_path)
 
-        return list(relevant_paths.keys())
+        return list(relevant_paths.keys()), 0
 
     def _entity_triples_as_rdflib_quads(self, entity: AbstractEntity) -> list[RdfLibQuad]:
         graph_id = URIRef(entity.g.identifier) if entity.g.identifier else None
@@ -340,7 +586,9 @@ class Storer(object):
 
             return destination_g
         except Exception as e:
-            self.reperr.add_sentence(f"[1] It was impossible to store the RDF statements in {cur_file_path}. {e}")
+            self.reperr.add_sentence(
+                f"[1] It was impossible to store the RDF statements in {cur_file_path}. {e}", level=logging.ERROR
+            )
 
     def _build_ns_to_prefix(self, context_path: str) -> list[tuple[str, str]]:
         ctx = cast(JsonObject, self.context_map[context_path])
@@ -350,54 +598,223 @@ class Storer(object):
         pairs.sort(key=lambda x: len(x[0]), reverse=True)
         return pairs
 
-    def _write_jsonld_fast(self, json_bytes: bytes, relevant_path: str) -> None:
-        if self.zip_output:
-            zip_file_path = relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip")
-            with ZipFile(zip_file_path, mode="w", compression=ZIP_DEFLATED, allowZip64=True) as zf:
-                zf.writestr(os.path.basename(relevant_path), json_bytes)
-        else:
-            with open(relevant_path, "wb") as f:
-                f.write(json_bytes)
-        self.repok.add_sentence(f"File '{relevant_path}' added.")
+    def _output_file_path(self, relevant_path: str) -> str:
+        return relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
+
+    def _write_jsonld_fast(self, json_bytes: bytes, relevant_path: str, journal: _Journal | None = None) -> int:
+        # With a journal, the file is written to a temporary file, which the journal then renames
+        output_filepath = self._output_file_path(relevant_path)
+        write_path = journal.temp_path(output_filepath) if journal is not None else output_filepath
+        try:
+            if self.zip_output:
+                with ZipFile(write_path, mode="w", compression=ZIP_DEFLATED, allowZip64=True) as zf:
+                    zf.writestr(os.path.basename(relevant_path), json_bytes)
+                    self.metrics.increment("storer.bytes_deflated", zf.infolist()[-1].compress_size)
+            else:
+                with open(write_path, "wb") as f:
+                    f.write(json_bytes)
+            size = os.path.getsize(write_path)
+        except BaseException:
+            if journal is not None:
+                with suppress(OSError):
+                    os.remove(write_path)
+            raise
+        self.metrics.increment("storer.files_written")
+        self.metrics.increment("storer.bytes_written", len(json_bytes))
+        self._report_file_added(relevant_path)
+        return size
 
     def _store_all_jsonld_fast(
-        self, relevant_paths: dict[str, list[AbstractEntity]], context_path: str | None
-    ) -> List[str]:
+        self, relevant_paths: dict[str, list[AbstractEntity]], base_dir: str, context_path: str | None
+    ) -> Tuple[List[str], int]:
         reader = Reader(context_map=self.context_map)
+        unchanged_files = 0
+        manifest_entries: list[ManifestEntry] = []
         ns_to_prefix: list[tuple[str, str]] | None = None
         if context_path is not None and context_path in self.context_map:
             ns_to_prefix = self._build_ns_to_prefix(context_path)
 
-        for relevant_path, entities_in_path in relevant_paths.items():
-            output_filepath = (
-                relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
-            )
-            lock = FileLock(f"{output_filepath}.lock")
-            with lock:
-                existing_data: JsonLdDocument | None = None
-                if os.path.exists(output_filepath):
-                    existing_data = reader.load_jsonld_dict(output_filepath)
-                doc = _JsonLdDoc(existing_data if existing_data is not None else [])
-
-                for entity in entities_in_path:
-                    graph_iri = cast(str, entity.g.identifier)
-                    if isinstance(entity, ProvEntity):
-                        doc.merge_entity(graph_iri, entity.res, _entity_to_jsonld_dict(entity))
-                    elif isinstance(entity, (GraphEntity, MetadataEntity)):
-                        if entity.to_be_deleted:
-                            doc.remove_entity(graph_iri, entity.res)
-                        else:
-                            if len(entity.preexisting_triples) > 0:
-                                doc.remove_entity(graph_iri, entity.res)
-                            doc.upsert_entity(graph_iri, entity.res, _entity_to_jsonld_dict(entity))
-
-                output_data: JsonLdDocument | JsonObject = doc.to_list()
-                if context_path is not None and ns_to_prefix is not None:
-                    output_data = _compact_jsonld(output_data, context_path, ns_to_prefix)
-                json_bytes = orjson.dumps(output_data)
-                self._write_jsonld_fast(json_bytes, relevant_path)
-
-        return list(relevant_paths.keys())
+        journal: _Journal | None = None
+        if self.atomic_writes:
+            self.recover(base_dir)
+            journal = _Journal(base_dir, map(self._output_file_path, relevant_paths), self.fsync_batch_size)
+        try:
+            for relevant_path, entities_in_path in relevant_paths.items():
+                output_filepath = self._output_file_path(relevant_path)
+                lock = cast(InterprocessLock, FileLock(f"{output_filepath}.lock"))
+                held = journal is not None and journal.try_acquire(lock)
+                try:
+                    with self.metrics.locked(lock, "storer.lock_wait"):
+                        existing_data: JsonLdDocument | None = None
+                        if os.path.exists(output_filepath):
+                            self.metrics.increment("storer.files_read")
+                            with self.metrics.span("storer.read"):
+                                existing_data = reader.load_jsonld_dict(output_filepath)
+                        manifest_path = os.path.relpath(output_filepath, base_dir).replace(os.sep, "/")
+                        with self.metrics.span("storer.serialize"):
+                            doc = self._build_jsonld_doc(existing_data, entities_in_path)
+                            json_bytes: bytes | None = self._serialize_jsonld(doc, context_path, ns_to_prefix)
+                            # The stored document is compared too, since the same entities are written in
+                            # another form when the context changes
+                            if (
+                                existing_data is not None
+                                and not doc.changed
+                                and self._same_document(output_filepath, manifest_path, json_bytes)
+                            ):
+                                json_bytes = None
+                        if json_bytes is None:
+                            # Rewriting the file would not change its content, so it is left untouched
+                            self.metrics.increment("storer.files_unchanged")
+                            unchanged_files += 1
+                            if journal is not None:
+                                journal.file_skipped()
+                            continue
+                        with self.metrics.span("storer.write"):
+                            size = self._write_jsonld_fast(json_bytes, relevant_path, journal)
+                            if journal is not None:
+                                journal.file_written(output_filepath, lock)
+                        if self.manifest is not None:
+                            manifest_entries.append(
+                                ManifestEntry.build(manifest_path, json_bytes, size, doc.entity_uris())
+                            )
+                finally:
+                    if held:
+                        lock.release()
+        finally:
+            try:
+                # The files still waiting are renamed before being recorded in the manifest
+                if journal is not None:
+                    journal.close()
+            finally:
+                # The files written are recorded at once, also when a later one fails, so the manifest
+                # is never left half updated
+                if self.manifest is not None and manifest_entries:
+                    self.manifest.record(manifest_entries)
+        return list(relevant_paths.keys()), unchanged_files
+
+    def recover(self, base_dir: str) -> List[str]:
+        """
+        It repairs the files left in an inconsistent state by the ``store_all`` calls with atomic
+        writes whose process crashed, as told by their journals: temporary files are deleted, and
+        files which may have been partially written and cannot be read anymore are renamed by adding
+        the ``.corrupted`` extension, so that they can be stored again. The manifest, if any, is
+        updated accordingly. The journals of the processes still running are skipped.
+
+        ``store_all`` calls this method on its own when ``atomic_writes`` is enabled.
+
+        :param base_dir: The base directory given to ``store_all``
+        :type base_dir: str
+        :return: The paths of the files renamed because they were corrupted
+        """
+        journal_dir = os.path.join(base_dir, _JOURNAL_DIR)
+        if not os.path.isdir(journal_dir):
+            return []
+        self.reperr.new_article()
+        corrupted_files: List[str] = []
+        try:
+            for journal_name in sorted(os.listdir(journal_dir)):
+                if not journal_name.endswith(_JOURNAL_EXTENSION):
+                    continue
+                journal_path = os.path.join(journal_dir, journal_name)
+                lock = cast(Lock, FileLock(journal_path + ".lock", timeout=0))
+                try:
+                    lock.acquire()
+                except Timeout:
+                    continue
+                try:
+                    corrupted_files.extend(self._recover_journal(journal_path, base_dir))
+                    os.remove(journal_path)
+                finally:
+                    lock.release()
+                with suppress(OSError):
+                    os.remove(journal_path + ".lock")
+        finally:
+            self.reperr.flush()
+        return corrupted_files
+
+    def _recover_journal(self, journal_path: str, base_dir: str) -> List[str]:
+        token = os.path.basename(journal_path)[: -len(_JOURNAL_EXTENSION)]
+        relative_paths, synced = _read_journal(journal_path)
+        reader = Reader(context_map=self.context_map)
+        corrupted_files: List[str] = []
+        corrupted_paths: List[str] = []
+        manifest_entries: List[ManifestEntry] = []
+        for i, relative_path in enumerate(relative_paths):
+            file_path = os.path.join(base_dir, relative_path)
+            with suppress(FileNotFoundError):
+                os.remove(f"{file_path}.{token}.tmp")
+            # Synced files are complete, but the manifest is updated only at the end of store_all
+            if not os.path.exists(file_path) or (i < synced and self.manifest is None):
+                continue
+            manifest_path = relative_path.replace(os.sep, "/")
+            try:
+                data = reader.load_jsonld_dict(file_path)
+            except Exception as e:
+                os.replace(file_path, file_path + ".corrupted")
+                corrupted_files.append(file_path)
+                corrupted_paths.append(manifest_path)
+                self.metrics.increment("storer.files_corrupted")
+                self.reperr.add_sentence(
+                    f"The file '{file_path}' was not completely written and it was renamed to "
+                    f"'{file_path}.corrupted'. {e}",
+                    level=logging.ERROR,
+                )
+                continue
+            if self.manifest is not None:
+                manifest_entries.append(
+                    ManifestEntry.build(
+                        manifest_path,
+                        self._read_document(file_path),
+                        os.path.getsize(file_path),
+                        _JsonLdDoc(data).entity_uris(),
+                    )
+                )
+        if self.manifest is not None:
+            self.manifest.remove(corrupted_paths)
+            if manifest_entries:
+                self.manifest.record(manifest_entries)
+        return corrupted_files
+
+    def _same_document(self, file_path: str, manifest_path: str, json_bytes: bytes) -> bool:
+        if self.manifest is None:
+            return self._read_document(file_path) == json_bytes
+        # Files missing from the manifest are written anyway, so that it can describe them
+        entry = self.manifest.get_file(manifest_path)
+        return entry is not None and entry.content_hash == hashlib.sha256(json_bytes).hexdigest()
+
+    @staticmethod
+    def _read_document(file_path: str) -> bytes:
+        if file_path.endswith(".zip"):
+            with ZipFile(file_path, mode="r") as archive:
+                # store_all writes a single document in every archive
+                return archive.read(archive.namelist()[0])
+        with open(file_path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _build_jsonld_doc(existing_data: JsonLdDocument | None, entities_in_path: list[AbstractEntity]) -> _JsonLdDoc:
+        doc = _JsonLdDoc(existing_data if existing_data is not None else [])
+        for entity in entities_in_path:
+            graph_iri = cast(str, entity.g.identifier)
+            if isinstance(entity, ProvEntity):
+                doc.merge_entity(graph_iri, entity.res, _entity_to_jsonld_dict(entity))
+            elif isinstance(entity, (GraphEntity, MetadataEntity)):
+                if entity.to_be_deleted:
+                    doc.remove_entity(graph_iri, entity.res)
+                elif len(entity.preexisting_triples) > 0:
+                    doc.replace_entity(graph_iri, entity.res, _entity_to_jsonld_dict(entity))
+                else:
+                    doc.upsert_entity(graph_iri, entity.res, _entity_to_jsonld_dict(entity))
+        return doc
+
+    @staticmethod
+    def _serialize_jsonld(
+        doc: _JsonLdDoc, context_path: str | None, ns_to_prefix: list[tuple[str, str]] | None
+    ) -> bytes:
+        output_data: JsonLdDocument | JsonObject = doc.to_list()
+        if context_path is not None and ns_to_prefix is not None:
+            output_data = _compact_jsonld(output_data, context_path, ns_to_prefix)
+        return orjson.dumps(output_data)
 
     def _store_graphs_in_file_jsonld_fast(self, file_path: str, context_path: str | None) -> None:
         doc = _JsonLdDoc([])
@@ -454,25 +871,128 @@ class Storer(object):
             base_dir: Base directory for output files (required when save_queries is True)
             batch_size: Number of queries per SPARQL batch
             save_queries: If True, save combined SPARQL queries to disk instead of uploading
+                (or RDF Patch files, when the update_format of the Storer is "rdf-patch")
 
         Returns:
             True if all batches were processed successfully, False otherwise
         """
+        try:
+            with self.metrics.span("storer.upload_all"):
+                return self._upload_all(triplestore_url, base_dir, batch_size, save_queries)
+        finally:
+            self._flush_reporters()
+
+    def _upload_all(self, triplestore_url: str, base_dir: str | None, batch_size: int, save_queries: bool) -> bool:
         self.repok.new_article()
         self.reperr.new_article()
 
-        if batch_size <= 0:
-            batch_size = 10
+        result: bool = True
+        to_be_uploaded_dir = self._prepare_to_be_uploaded_dir(base_dir)
+        for update, added_statements, removed_statements in self._iter_update_batches(batch_size):
+            if save_queries:
+                self._save_query(update, to_be_uploaded_dir, added_statements, removed_statements)
+            else:
+                result &= self._query(
+                    self._to_sparql(update), triplestore_url, base_dir, added_statements, removed_statements
+                )
 
-        query_batch: list[str] = []
-        added_statements: int = 0
-        removed_statements: int = 0
+        return result
+
+    async def upload_all_async(
+        self,
+        triplestore_url: str,
+        base_dir: str | None = None,
+        batch_size: int = 10,
+        save_queries: bool = False,
+        client: AsyncSPARQLClient | None = None,
+    ) -> bool:
+        """
+        Asynchronous counterpart of ``upload_all``: the batches are uploaded concurrently, without blocking
+        the event loop.
+
+        The batches are the same as those of ``upload_all``. They may reach the triplestore in any order,
+        which is safe since every batch only contains ``DELETE DATA``/``INSERT DATA`` operations and the
+        triples deleted and inserted for an entity never overlap.
+
+        Args:
+            triplestore_url: SPARQL endpoint URL
+            base_dir: Base directory for output files (required when save_queries is True)
+            batch_size: Number of queries per SPARQL batch
+            save_queries: If True, save the batches to disk instead of uploading them
+            client: The client used to send the updates, which also limits their concurrency.
+                If None, a temporary client is used.
+
+        Returns:
+            True if all batches were processed successfully, False otherwise
+        """
+        try:
+            with self.metrics.span("storer.upload_all"):
+                return await self._upload_all_async(triplestore_url, base_dir, batch_size, save_queries, client)
+        finally:
+            self._flush_reporters()
+
+    async def _upload_all_async(
+        self,
+        triplestore_url: str,
+        base_dir: str | None,
+        batch_size: int,
+        save_queries: bool,
+        client: AsyncSPARQLClient | None,
+    ) -> bool:
+        self.repok.new_article()
+        self.reperr.new_article()
+
+        to_be_uploaded_dir = self._prepare_to_be_uploaded_dir(base_dir)
+        if save_queries:
+            for update, added_statements, removed_statements in self._iter_update_batches(batch_size):
+                self._save_query(update, to_be_uploaded_dir, added_statements, removed_statements)
+            return True
+
+        own_client = client is None
+        if client is None:
+            client = AsyncSPARQLClient(max_retries=3, backoff_factor=2.5, metrics=self.metrics)
         result: bool = True
-        to_be_uploaded_dir: str = ""
+        # At most max_concurrency batches are waiting to be uploaded at any time, so that
+        # the batches do not need to be all built in advance
+        pending: set[asyncio.Task[bool]] = set()
+        try:
+            for update, added_statements, removed_statements in self._iter_update_batches(batch_size):
+                if len(pending) >= client.max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    result &= all(task.result() for task in done)
+                query_coro = self._query_async(
+                    client, self._to_sparql(update), triplestore_url, base_dir, added_statements, removed_statements
+                )
+                pending.add(asyncio.ensure_future(query_coro))
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                result &= all(task.result() for task in done)
+        finally:
+            for task in pending:
+                task.cancel()
+            if own_client:
+                # After a failure, waiting for the requests still running would block the event loop
+                client.close(wait=False)
+        return result
 
-        if base_dir:
-            to_be_uploaded_dir = os.path.join(base_dir, "to_be_uploaded")
-            os.makedirs(to_be_uploaded_dir, exist_ok=True)
+    @staticmethod
+    def _prepare_to_be_uploaded_dir(base_dir: str | None) -> str:
+        if not base_dir:
+            return ""
+        to_be_uploaded_dir = os.path.join(base_dir, "to_be_uploaded")
+        os.makedirs(to_be_uploaded_dir, exist_ok=True)
+        return to_be_uploaded_dir
+
+    def _to_sparql(self, update: str) -> str:
+        if self.update_format == "rdf-patch":
+            return " ; ".join(patch_to_sparql(update))
+        return update
+
+    def _iter_update_batches(self, batch_size: int) -> Iterator[Tuple[str, int, int]]:
+        # It yields the batches of changes to be uploaded, as (update, added statements, removed statements)
+        # tuples, where the update is either a SPARQL update or an RDF Patch, depending on update_format
+        if batch_size <= 0:
+            batch_size = 10
 
         entities_to_process: Iterable[AbstractEntity] = self.a_set.res_to_entity.values()
         if self.modified_entities is not None:
@@ -481,43 +1001,69 @@ class Storer(object):
                 for entity in entities_to_process
                 if str(entity.res).split("/prov/se/")[0] in self.modified_entities
             ]
+        entities_to_process = [
+            entity
+            for entity in entities_to_process
+            if not isinstance(entity, (GraphEntity, MetadataEntity)) or entity.to_be_deleted or entity.is_dirty
+        ]
+
+        if self.update_format == "rdf-patch":
+            yield from self._batch_updates(self._iter_update_patches(entities_to_process), batch_size, "")
+        else:
+            yield from self._batch_updates(self._iter_update_queries(entities_to_process), batch_size, " ; ")
 
+    @staticmethod
+    def _batch_updates(
+        updates: Iterable[Tuple[str, int, int, int]], batch_size: int, separator: str
+    ) -> Iterator[Tuple[str, int, int]]:
+        # It joins (update, SPARQL queries, added statements, removed statements) tuples into batches
+        # of at least batch_size SPARQL queries, the last one excepted
+        update_batch: list[str] = []
+        batch_queries: int = 0
+        added_statements: int = 0
+        removed_statements: int = 0
+
+        for update, n_queries, n_added, n_removed in updates:
+            update_batch.append(update)
+            batch_queries += n_queries
+            added_statements += n_added
+            removed_statements += n_removed
+
+            if batch_queries >= batch_size:
+                yield separator.join(update_batch), added_statements, removed_statements
+                update_batch = []
+                batch_queries = 0
+                added_statements = 0
+                removed_statements = 0
+
+        if update_batch:
+            yield separator.join(update_batch), added_statements, removed_statements
+
+    def _iter_update_queries(
+        self, entities_to_process: Iterable[AbstractEntity]
+    ) -> Iterator[Tuple[str, int, int, int]]:
         for entity in entities_to_process:
             entity_type = self._class_to_entity_type(entity)
             update_queries, n_added, n_removed = get_update_query(entity, entity_type=entity_type)
-
-            if not update_queries:
-                continue
-
             for query in update_queries:
-                query_batch.append(query)
-                added_statements += n_added // len(update_queries)
-                removed_statements += n_removed // len(update_queries)
-
-                if len(query_batch) >= batch_size:
-                    query_string = " ; ".join(query_batch)
-                    if save_queries:
-                        self._save_query(query_string, to_be_uploaded_dir, added_statements, removed_statements)
-                    else:
-                        result &= self._query(
-                            query_string, triplestore_url, base_dir, added_statements, removed_statements
-                        )
-                    query_batch = []
-                    added_statements = 0
-                    removed_statements = 0
-
-        if query_batch:
-            query_string = " ; ".join(query_batch)
-            if save_queries:
-                self._save_query(query_string, to_be_uploaded_dir, added_statements, removed_statements)
-            else:
-                result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements)
+                yield query, 1, n_added // len(update_queries), n_removed // len(update_queries)
 
-        return result
+    def _iter_update_patches(
+        self, entities_to_process: Iterable[AbstractEntity]
+    ) -> Iterator[Tuple[str, int, int, int]]:
+        # The patch of an entity is never split among batches: it counts as the number
+        # of SPARQL queries it will be converted into.
+        for entity in entities_to_process:
+            entity_type = self._class_to_entity_type(entity)
+            update_patch, n_added, n_removed = get_update_patch(entity, entity_type=entity_type)
+            if update_patch:
+                n_queries = -(-n_added // MAX_TRIPLES_PER_QUERY) + -(-n_removed // MAX_TRIPLES_PER_QUERY)
+                yield update_patch, n_queries, n_added, n_removed
 
     def _save_query(self, query_string: str, directory: str, added_statements: int, removed_statements: int) -> None:
         content_hash = hashlib.sha256(query_string.encode("utf-8")).hexdigest()[:16]
-        file_name = f"{content_hash}_add{added_statements}_remove{removed_statements}.sparql"
+        extension = RDF_PATCH_EXTENSION if self.update_format == "rdf-patch" else ".sparql"
+        file_name = f"{content_hash}_add{added_statements}_remove{removed_statements}{extension}"
         file_path = os.path.join(directory, file_name)
         with open(file_path, "w", encoding="utf-8") as f:
             f.write(query_string)
@@ -527,7 +1073,11 @@ class Storer(object):
         self.reperr.new_article()
 
         entity_type = self._class_to_entity_type(entity)
-        update_queries, n_added, n_removed = get_update_query(entity, entity_type=entity_type)
+        if self.update_format == "rdf-patch":
+            update_patch, n_added, n_removed = get_update_patch(entity, entity_type=entity_type)
+            update_queries = patch_to_sparql(update_patch)
+        else:
+            update_queries, n_added, n_removed = get_update_query(entity, entity_type=entity_type)
         query_string = " ; ".join(update_queries) if update_queries else ""
         return self._query(query_string, triplestore_url, base_dir, n_added, n_removed)
 
@@ -547,27 +1097,62 @@ class Storer(object):
     ) -> bool:
         if query_string != "":
             try:
-                sparql_update(triplestore_url, query_string, max_retries=3, backoff_factor=2.5)
+                with self.metrics.span("storer.upload"):
+                    sparql_update(
+                        triplestore_url, query_string, max_retries=3, backoff_factor=2.5, metrics=self.metrics
+                    )
+                self._report_upload(added_statements, removed_statements)
+                return True
 
-                self.repok.add_sentence(
-                    f"Triplestore updated with {added_statements} added statements and "
-                    f"with {removed_statements} removed statements."
-                )
+            except SPARQLEndpointError as e:
+                self._report_upload_error(e, query_string, base_dir)
 
+        return False
+
+    async def _query_async(
+        self,
+        client: AsyncSPARQLClient,
+        query_string: str,
+        triplestore_url: str,
+        base_dir: str | None = None,
+        added_statements: int = 0,
+        removed_statements: int = 0,
+    ) -> bool:
+        if query_string != "":
+            try:
+                with self.metrics.span("storer.upload"):
+                    await client.update(triplestore_url, query_string)
+                self._report_upload(added_statements, removed_statements)
                 return True
 
             except SPARQLEndpointError as e:
-                self.reperr.add_sentence(
-                    f"[3] Graph was not loaded into the triplestore due to communication problems: {e}"
-                )
-                if base_dir is not None:
-                    tp_err_dir: str = base_dir + os.sep + "tp_err"
-                    if not os.path.exists(tp_err_dir):
-                        os.makedirs(tp_err_dir, exist_ok=True)
-                    cur_file_err: str = (
-                        tp_err_dir + os.sep + datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f_not_uploaded.txt")
-                    )
-                    with open(cur_file_err, "wt", encoding="utf-8") as f:
-                        f.write(query_string)
+                self._report_upload_error(e, query_string, base_dir)
 
         return False
+
+    def _report_upload(self, added_statements: int, removed_statements: int) -> None:
+        self.metrics.increment("storer.batches_uploaded")
+        self.repok.add_sentence(
+            f"Triplestore updated with {added_statements} added statements and "
+            f"with {removed_statements} removed statements."
+        )
+
+    def _report_upload_error(self, error: SPARQLEndpointError, query_string: str, base_dir: str | None) -> None:
+        self.metrics.increment("storer.upload_errors")
+        self.reperr.add_sentence(
+            f"[3] Graph was not loaded into the triplestore due to communication problems: {error}",
+            level=logging.ERROR,
+        )
+        if base_dir is not None:
+            tp_err_dir: str = base_dir + os.sep + "tp_err"
+            if not os.path.exists(tp_err_dir):
+                os.makedirs(tp_err_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f")
+            cur_file_err: str = tp_err_dir + os.sep + timestamp + "_not_uploaded.txt"
+            # Concurrent uploads may fail within the same microsecond
+            n_file = 1
+            while os.path.exists(cur_file_err):
+                cur_file_err = tp_err_dir + os.sep + f"{timestamp}-{n_file}_not_uploaded.txt"
+                n_file += 1
+            with open(cur_file_err, "wt", encoding="utf-8") as f:
+                f.write(query_string)
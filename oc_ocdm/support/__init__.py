@@ -7,7 +7,9 @@
 
 # -*- coding: utf-8 -*-
 
-from oc_ocdm.support.query_utils import get_delete_query, get_insert_query, get_update_query
+from oc_ocdm.support.manifest import Manifest, ManifestEntry
+from oc_ocdm.support.metrics import InMemoryMetricsSink, MetricsSink
+from oc_ocdm.support.query_utils import get_delete_query, get_insert_query, get_update_patch, get_update_query
 from oc_ocdm.support.reporter import Reporter
 from oc_ocdm.support.support import (
     create_date,
@@ -28,6 +30,10 @@ from oc_ocdm.support.support import (
 )
 
 __all__ = [
+    "InMemoryMetricsSink",
+    "Manifest",
+    "ManifestEntry",
+    "MetricsSink",
     "Reporter",
     "create_date",
     "create_literal",
@@ -42,6 +48,7 @@ __all__ = [
     "get_prefix",
     "get_resource_number",
     "get_short_name",
+    "get_update_patch",
     "get_update_query",
     "has_supplier_prefix",
     "is_dataset",
@@ -0,0 +1,265 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, cast
+
+from oc_ocdm.support.support import parse_uri
+
+# The IRI shared by the entities of a range (e.g. https://w3id.org/oc/meta/br/060), first and last number
+EntityRange = Tuple[str, int, int]
+
+_CREATE_TABLES = (
+    "CREATE TABLE IF NOT EXISTS batches(id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS files(path TEXT PRIMARY KEY, content_hash TEXT NOT NULL, size INTEGER NOT NULL, "
+    "entity_count INTEGER NOT NULL, batch_id INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS files_batch ON files(batch_id)",
+    "CREATE TABLE IF NOT EXISTS ranges(path TEXT NOT NULL, range_key TEXT NOT NULL, first_entity INTEGER NOT NULL, "
+    "last_entity INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ranges_key ON ranges(range_key, first_entity)",
+    "CREATE INDEX IF NOT EXISTS ranges_path ON ranges(path)",
+)
+_INSERT_BATCH = "INSERT INTO batches (created_at) VALUES (?)"
+_UPSERT_FILE = (
+    "INSERT INTO files (path, content_hash, size, entity_count, batch_id) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(path) DO UPDATE SET content_hash = excluded.content_hash, size = excluded.size, "
+    "entity_count = excluded.entity_count, batch_id = excluded.batch_id"
+)
+_DELETE_RANGES = "DELETE FROM ranges WHERE path = ?"
+_INSERT_RANGE = "INSERT INTO ranges (path, range_key, first_entity, last_entity) VALUES (?, ?, ?, ?)"
+_DELETE_FILE = "DELETE FROM files WHERE path = ?"
+_SELECT_FILE = "SELECT path, content_hash, size, entity_count, batch_id FROM files WHERE path = ?"
+_SELECT_RANGES = "SELECT range_key, first_entity, last_entity FROM ranges WHERE path = ? ORDER BY range_key"
+_SELECT_CONTAINING = (
+    "SELECT path FROM ranges WHERE range_key = ? AND first_entity <= ? AND last_entity >= ? ORDER BY path"
+)
+_SELECT_CHANGED = "SELECT path FROM files WHERE batch_id > ? ORDER BY path"
+_SELECT_LATEST_BATCH = "SELECT MAX(id) FROM batches"
+
+
+def _range_key(iri: str) -> Optional[Tuple[str, int]]:
+    parsed = parse_uri(iri)
+    if parsed.is_prov:
+        # Snapshots are grouped in files according to the number of the entity they describe
+        key = (
+            f"{parsed.base_iri}/{parsed.prov_subject_short_name}/{parsed.prov_subject_prefix}/prov/{parsed.short_name}"
+        )
+        count = parsed.prov_subject_count
+    else:
+        key = f"{parsed.base_iri}/{parsed.short_name}/{parsed.prefix}"
+        count = parsed.count
+    # Dataset IRIs and ranges of counts (e.g. br/1-5) are not indexed
+    if not parsed.short_name or not count.isdigit():
+        return None
+    return key, int(count)
+
+
+def _entity_ranges(entity_uris: Iterable[str]) -> List[EntityRange]:
+    bounds: Dict[str, List[int]] = {}
+    for uri in entity_uris:
+        key_and_number = _range_key(uri)
+        if key_and_number is None:
+            continue
+        key, number = key_and_number
+        key_bounds = bounds.get(key)
+        if key_bounds is None:
+            bounds[key] = [number, number]
+        elif number < key_bounds[0]:
+            key_bounds[0] = number
+        elif number > key_bounds[1]:
+            key_bounds[1] = number
+    return [(key, first, last) for key, (first, last) in sorted(bounds.items())]
+
+
+@dataclass
+class ManifestEntry:
+    """
+    The description of a file in a ``Manifest``.
+
+    ``content_hash`` is the SHA-256 digest of the stored document, that is of the file itself
+    or, for zip archives, of the file they contain. ``ranges`` lists, for every group of entities
+    in the file (e.g. the ``br`` entities with supplier prefix ``060``), the IRI shared by the
+    group and the numbers of its first and last entity. Snapshots are grouped according to the
+    entity they describe.
+    """
+
+    path: str
+    content_hash: str
+    size: int
+    entity_count: int
+    ranges: List[EntityRange] = field(default_factory=lambda: [])
+    # Assigned by the manifest when the entry is recorded
+    batch_id: Optional[int] = None
+
+    @classmethod
+    def build(cls, path: str, content: bytes, size: int, entity_uris: Iterable[str]) -> ManifestEntry:
+        """
+        It describes a file which was just written.
+
+        :param path: The path of the file, relative to the root of the dump
+        :type path: str
+        :param content: The stored document
+        :type content: bytes
+        :param size: The size of the file on disk
+        :type size: int
+        :param entity_uris: The IRIs of the entities in the file
+        :type entity_uris: Iterable[str]
+        :return: The entry
+        """
+        uris = list(entity_uris)
+        return cls(path, hashlib.sha256(content).hexdigest(), size, len(uris), _entity_ranges(uris))
+
+
+class Manifest(object):
+    """
+    An index of the files of a dump, kept in a SQLite database and updated by ``Storer.store_all``.
+
+    For every file, identified by its path relative to the base directory of the dump, the manifest
+    records the hash of its content, its size, the number of entities and their ranges, and the
+    batch which wrote it last. Every call to ``Storer.store_all`` records its files as a new batch,
+    in a single transaction, so the manifest can tell which files changed since a given batch
+    (``changed_since``) and which files hold an entity (``find_files``) without walking the
+    filesystem.
+
+    The database is opened in WAL mode, so several processes can share the same manifest.
+    """
+
+    def __init__(self, database: str, timeout: float = 30.0) -> None:
+        """
+        :param database: The path of the database file
+        :type database: str
+        :param timeout: How many seconds a connection waits for the lock held by another process
+        :type timeout: float
+        """
+        self.database: str = database
+        self.timeout: float = timeout
+        self._connect()
+
+    def _connect(self) -> None:
+        self._lock = threading.RLock()
+        self.con = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        for statement in _CREATE_TABLES:
+            self.con.execute(statement)
+        self.con.commit()
+
+    def __getstate__(self) -> dict[str, object]:
+        """
+        Support for pickle serialization.
+
+        The SQLite connection and the lock are excluded since they are not picklable:
+        they are recreated upon unpickling.
+        """
+        state = self.__dict__.copy()
+        del state["con"]
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        vars(self).update(state)
+        self._connect()
+
+    def record(self, entries: Iterable[ManifestEntry]) -> int:
+        """
+        It records the given files as a new batch, replacing their previous entries.
+        Either all the entries are recorded or, if an error occurs, none of them.
+
+        :param entries: The descriptions of the files written by the batch
+        :type entries: Iterable[ManifestEntry]
+        :return: The identifier of the new batch
+        """
+        with self._lock, self.con:
+            cursor = self.con.execute(_INSERT_BATCH, (datetime.now(timezone.utc).isoformat(),))
+            batch_id = cast(int, cursor.lastrowid)
+            for entry in entries:
+                entry.batch_id = batch_id
+                self.con.execute(
+                    _UPSERT_FILE, (entry.path, entry.content_hash, entry.size, entry.entity_count, batch_id)
+                )
+                self.con.execute(_DELETE_RANGES, (entry.path,))
+                self.con.executemany(_INSERT_RANGE, [(entry.path, *entity_range) for entity_range in entry.ranges])
+        return batch_id
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """
+        It removes some files from the manifest, e.g. because they were deleted.
+
+        :param paths: The paths of the files, relative to the root of the dump
+        :type paths: Iterable[str]
+        :return: None
+        """
+        with self._lock, self.con:
+            for path in paths:
+                self.con.execute(_DELETE_FILE, (path,))
+                self.con.execute(_DELETE_RANGES, (path,))
+
+    def get_file(self, path: str) -> Optional[ManifestEntry]:
+        """
+        It returns the description of a file.
+
+        :param path: The path of the file, relative to the root of the dump
+        :type path: str
+        :return: The entry, or None if the file is not in the manifest
+        """
+        with self._lock:
+            row = cast(Optional[Tuple[str, str, int, int, int]], self.con.execute(_SELECT_FILE, (path,)).fetchone())
+            if row is None:
+                return None
+            ranges = cast(List[EntityRange], self.con.execute(_SELECT_RANGES, (path,)).fetchall())
+        return ManifestEntry(row[0], row[1], row[2], row[3], ranges, row[4])
+
+    def find_files(self, entity_iri: str) -> List[str]:
+        """
+        It returns the files whose ranges include an entity. Usually there is just one such file,
+        but files stored with a ``process_id`` may share their ranges with others.
+
+        :param entity_iri: The IRI of the entity or of one of its snapshots
+        :type entity_iri: str
+        :return: The paths of the files, relative to the root of the dump
+        """
+        key_and_number = _range_key(entity_iri)
+        if key_and_number is None:
+            return []
+        key, number = key_and_number
+        with self._lock:
+            rows = cast(List[Tuple[str]], self.con.execute(_SELECT_CONTAINING, (key, number, number)).fetchall())
+        return [row[0] for row in rows]
+
+    def changed_since(self, batch_id: int = 0) -> List[str]:
+        """
+        It returns the files written after a batch.
+
+        :param batch_id: The identifier of the batch. With the default value, every file is returned.
+        :type batch_id: int
+        :return: The paths of the files, relative to the root of the dump
+        """
+        with self._lock:
+            rows = cast(List[Tuple[str]], self.con.execute(_SELECT_CHANGED, (batch_id,)).fetchall())
+        return [row[0] for row in rows]
+
+    def latest_batch(self) -> int:
+        """
+        It returns the identifier of the last recorded batch, e.g. to pass it to ``changed_since``
+        at the next synchronization.
+
+        :return: The identifier, or 0 if no batch was recorded
+        """
+        with self._lock:
+            row = cast(Tuple[Optional[int]], self.con.execute(_SELECT_LATEST_BATCH).fetchone())
+        return row[0] or 0
+
+    def close(self) -> None:
+        """
+        It closes the connection to the database.
+
+        :return: None
+        """
+        self.con.close()
@@ -0,0 +1,235 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import TracebackType
+    from typing import ContextManager, Dict, List, Optional, Tuple, Type, Union
+
+    from oc_ocdm._types import Lock
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ("_sink", "_name", "_start")
+
+    def __init__(self, sink: MetricsSink, name: str) -> None:
+        self._sink = sink
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._sink.timing(self._name, time.perf_counter() - self._start)
+
+
+class _TimedLock(object):
+    __slots__ = ("_sink", "_name", "_lock")
+
+    def __init__(self, sink: MetricsSink, name: str, lock: Lock) -> None:
+        self._sink = sink
+        self._name = name
+        self._lock = lock
+
+    def __enter__(self) -> None:
+        start = time.perf_counter()
+        self._lock.acquire()
+        self._sink.timing(self._name, time.perf_counter() - start)
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._lock.release()
+
+
+class MetricsSink(object):
+    """
+    Receiver of the metrics collected by ``Storer``, ``Reader``, ``ProvSet``, the counter handlers
+    and the SPARQL clients: counters (e.g. the number of files written) and timings (e.g. the time
+    spent in a stage, or waiting for a lock).
+
+    This base class discards everything and its ``enabled`` attribute is False, so that the
+    instrumented code can skip the measurements altogether: it is the default sink of every
+    instrumented object. Custom sinks (e.g. forwarding the metrics to Prometheus or StatsD)
+    should subclass it, set ``enabled`` to True and override ``increment`` and ``timing``.
+    """
+
+    enabled: bool = False
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        It adds ``value`` to the counter called ``name``.
+
+        :param name: The name of the counter
+        :type name: str
+        :param value: The amount to be added
+        :type value: int
+        :return: None
+        """
+        return None
+
+    def timing(self, name: str, seconds: float) -> None:
+        """
+        It records a duration of the operation called ``name``.
+
+        :param name: The name of the timed operation
+        :type name: str
+        :param seconds: The duration in seconds
+        :type seconds: float
+        :return: None
+        """
+        return None
+
+    def span(self, name: str) -> ContextManager[None]:
+        """
+        It returns a context manager recording the duration of its block as a timing called ``name``.
+
+        :param name: The name of the timed operation
+        :type name: str
+        :return: The context manager (a shared no-op one when the sink is not enabled)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def locked(self, lock: Lock, name: str) -> Union[Lock, _TimedLock]:
+        """
+        It returns a context manager holding ``lock`` for the duration of its block, which records
+        the time spent waiting for the lock as a timing called ``name``.
+
+        :param lock: A lock, such as a ``threading.Lock`` or a ``filelock.FileLock``
+        :type lock: Lock
+        :param name: The name of the timing
+        :type name: str
+        :return: The context manager (the lock itself when the sink is not enabled)
+        """
+        if not self.enabled:
+            return lock
+        return _TimedLock(self, name, lock)
+
+
+NULL_METRICS = MetricsSink()
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    A thread-safe sink keeping the totals of the counters and some statistics of the timings in memory.
+
+    When pickled (e.g. together with a counter handler sent to another process), the copy starts with
+    empty metrics.
+    """
+
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        # For every timing: number of measurements, total and maximum duration
+        self.timings: Dict[str, List[float]] = {}
+
+    def __getstate__(self) -> dict[str, object]:
+        return {}
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        self.__init__()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.timings.get(name)
+            if stats is None:
+                self.timings[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def get_counter(self, name: str) -> int:
+        """
+        It returns the total of a counter.
+
+        :param name: The name of the counter
+        :type name: str
+        :return: The total, or 0 if the counter was never incremented
+        """
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    def get_timing(self, name: str) -> Tuple[int, float, float]:
+        """
+        It returns the statistics of a timing.
+
+        :param name: The name of the timed operation
+        :type name: str
+        :return: The number of measurements, their total and their maximum duration in seconds
+          (all 0 if the operation was never timed)
+        """
+        with self._lock:
+            stats = self.timings.get(name)
+            if stats is None:
+                return 0, 0.0, 0.0
+            return int(stats[0]), stats[1], stats[2]
+
+    def reset(self) -> None:
+        """
+        It discards all the collected metrics.
+
+        :return: None
+        """
+        with self._lock:
+            self.counters = {}
+            self.timings = {}
+
+    def summary(self) -> str:
+        """
+        It returns a human-readable summary of the collected metrics, listing the timings from the
+        one with the largest total duration, so that the slowest stage comes first.
+
+        :return: The summary
+        """
+        with self._lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+            counters = sorted(self.counters.items())
+        lines: List[str] = []
+        for name, (count, total, maximum) in timings:
+            lines.append(f"{name}: {total:.6f}s total, {int(count)} times, {maximum:.6f}s max")
+        for name, value in counters:
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
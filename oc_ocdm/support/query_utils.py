@@ -8,73 +8,144 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, AbstractSet, List, Set
+import re
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Set, Tuple, cast
 
 from rdflib.term import Node
 from triplelite import RDFTerm, Triple
 
+from oc_ocdm.support.tracked_graph import TrackedGraph
+
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Hashable, Iterable, Optional
 
     from oc_ocdm.abstract_entity import AbstractEntity
+    from oc_ocdm.graph.graph_entity import GraphEntity
+    from oc_ocdm.metadata.metadata_entity import MetadataEntity
 
 MAX_TRIPLES_PER_QUERY = 500
+# Formats in which the changes of an entity can be expressed
+UPDATE_FORMATS = ("sparql", "rdf-patch")
+
+# Every character that must be escaped inside an N-Triples/SPARQL string literal
+_NT_ESCAPES: Dict[str, str] = {
+    "\\": "\\\\",
+    '"': '\\"',
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+    "\b": "\\b",
+    "\f": "\\f",
+}
+# The remaining control characters have no short escape sequence, and are rare enough to be handled separately
+_NT_CONTROL_ESCAPES: Dict[str, str] = {chr(c): f"\\u{c:04X}" for c in (*range(0x20), 0x7F) if chr(c) not in _NT_ESCAPES}
+_NT_CONTROL_PATTERN = re.compile("[" + re.escape("".join(_NT_CONTROL_ESCAPES)) + "]")
+# Serializations of the datatype and language tag that follow a literal value (e.g. "^^<...#string>")
+_LITERAL_SUFFIXES: Dict[Tuple[str, str], str] = {}
+
+
+def _escape_control_match(match: re.Match[str]) -> str:
+    return _NT_CONTROL_ESCAPES[match.group()]
+
+
+def _needs_escape(value: str) -> bool:
+    # Every control character is non-printable, so only quotes and backslashes have to be looked for explicitly
+    return '"' in value or "\\" in value or not value.isprintable()
+
+
+def _escape_literal(value: str) -> str:
+    if not _needs_escape(value):
+        return value
+    # str.replace is much faster than any per-character callback, as long as the backslash goes first
+    for char, escaped in _NT_ESCAPES.items():
+        if char in value:
+            value = value.replace(char, escaped)
+    if not value.isprintable():
+        value = _NT_CONTROL_PATTERN.sub(_escape_control_match, value)
+    return value
+
+
+def _literal_suffix(datatype: str, lang: str) -> str:
+    key = (datatype, lang)
+    suffix = _LITERAL_SUFFIXES.get(key)
+    if suffix is None:
+        suffix = f"@{lang}" if lang else f"^^<{datatype}>"
+        _LITERAL_SUFFIXES[key] = suffix
+    return suffix
 
 
 def _term_to_nt(term: str | RDFTerm | Node) -> str:
     if isinstance(term, RDFTerm):
         if term.type == "literal":
-            escaped = term.value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
-            if term.lang:
-                return f'"{escaped}"@{term.lang}'
-            return f'"{escaped}"^^<{term.datatype}>'
+            return f'"{_escape_literal(term.value)}"{_literal_suffix(term.datatype, term.lang)}'
         return f"<{term.value}>"
-    if isinstance(term, str):
-        return f"<{term}>"
-    return term.n3()
-
-
-def _serialize_triples_to_nt(triples: AbstractSet[Triple]) -> str:
-    return "".join(f"{_term_to_nt(s)} {_term_to_nt(p)} {_term_to_nt(o)} ." for s, p, o in triples)
-
-
-def _chunk_set(data: AbstractSet[Triple], chunk_size: int) -> List[Set[Triple]]:
-    data_list = list(data)
-    return [set(data_list[i : i + chunk_size]) for i in range(0, len(data_list), chunk_size)]
-
-
-def get_delete_query(graph_iri: str, data: AbstractSet[Triple]) -> Tuple[List[str], int]:
+    if isinstance(term, Node):
+        return term.n3()
+    return f"<{term}>"
+
+
+def _triples_to_nt_lines(triples: Iterable[Triple]) -> List[str]:
+    # Subjects and predicates are IRIs, so only objects need to be inspected.
+    # The common cases are inlined, since this runs once per triple of every update query.
+    lines: List[str] = []
+    append = lines.append
+    suffixes = _LITERAL_SUFFIXES
+    for s, p, o in triples:
+        if o.__class__ is not RDFTerm:
+            append(f"<{s}> <{p}> {_term_to_nt(o)} .")
+            continue
+        # Unpacking is faster than accessing the named fields of RDFTerm
+        term_type, value, datatype, lang = o
+        if term_type == "literal":
+            if '"' in value or "\\" in value or not value.isprintable():
+                value = _escape_literal(value)
+            suffix = suffixes.get((datatype, lang))
+            if suffix is None:
+                suffix = _literal_suffix(datatype, lang)
+            append(f'<{s}> <{p}> "{value}"{suffix} .')
+        else:
+            append(f"<{s}> <{p}> <{value}> .")
+    return lines
+
+
+def _get_data_queries(operation: str, graph_iri: str, data: AbstractSet[Triple]) -> Tuple[List[str], int]:
     num_of_statements: int = len(data)
     if num_of_statements <= 0:
         return [], 0
 
-    if num_of_statements <= MAX_TRIPLES_PER_QUERY:
-        statements: str = _serialize_triples_to_nt(data)
-        return [f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"], num_of_statements
-
-    chunks = _chunk_set(data, MAX_TRIPLES_PER_QUERY)
+    # Every triple is serialized once, then the resulting lines are split among the queries
+    lines = _triples_to_nt_lines(data)
     queries: List[str] = []
-    for chunk in chunks:
-        statements = _serialize_triples_to_nt(chunk)
-        queries.append(f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}")
+    for i in range(0, num_of_statements, MAX_TRIPLES_PER_QUERY):
+        statements = "".join(lines[i : i + MAX_TRIPLES_PER_QUERY])
+        queries.append(f"{operation} DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}")
     return queries, num_of_statements
 
 
+def _get_patch_rows(operation: str, graph_iri: str, data: AbstractSet[Triple]) -> List[str]:
+    # Each N-Triples line becomes a quad row by replacing its final dot with the graph IRI
+    graph_suffix = f"<{graph_iri}> ."
+    return [f"{operation} {line[:-1]}{graph_suffix}" for line in _triples_to_nt_lines(data)]
+
+
+def get_delete_query(graph_iri: str, data: AbstractSet[Triple]) -> Tuple[List[str], int]:
+    return _get_data_queries("DELETE", graph_iri, data)
+
+
 def get_insert_query(graph_iri: str, data: AbstractSet[Triple]) -> Tuple[List[str], int]:
-    num_of_statements: int = len(data)
-    if num_of_statements <= 0:
-        return [], 0
+    return _get_data_queries("INSERT", graph_iri, data)
 
-    if num_of_statements <= MAX_TRIPLES_PER_QUERY:
-        statements: str = _serialize_triples_to_nt(data)
-        return [f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"], num_of_statements
 
-    chunks = _chunk_set(data, MAX_TRIPLES_PER_QUERY)
-    queries: List[str] = []
-    for chunk in chunks:
-        statements = _serialize_triples_to_nt(chunk)
-        queries.append(f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}")
-    return queries, num_of_statements
+def get_change_log(entity: GraphEntity | MetadataEntity) -> Optional[TrackedGraph]:
+    """
+    Returns the graph of the entity if its change log can be trusted, i.e. if it is a ``TrackedGraph``
+    whose changes are tracked with respect to the current preexisting triples of the entity.
+    Otherwise (e.g. the preexisting triples were replaced by hand), returns None.
+    """
+    g = entity.g
+    if isinstance(g, TrackedGraph) and g.baseline is entity.preexisting_triples:
+        return g
+    return None
 
 
 def _compute_graph_changes(entity: AbstractEntity, entity_type: str) -> Tuple[Set[Triple], Set[Triple], int, int]:
@@ -95,14 +166,21 @@ def _compute_graph_changes(entity: AbstractEntity, entity_type: str) -> Tuple[Se
     # Deferred import to break circular dependency:
     # graph_entity → abstract_entity → support.support → (support/__init__) → query_utils → graph_entity
     from oc_ocdm.graph.graph_entity import GraphEntity  # noqa: E402
+    from oc_ocdm.metadata.metadata_entity import MetadataEntity  # noqa: E402
 
-    assert isinstance(entity, GraphEntity)
+    assert isinstance(entity, (GraphEntity, MetadataEntity))
     to_be_deleted: bool = entity.to_be_deleted
     preexisting_triples = entity.preexisting_triples
 
     if to_be_deleted:
         return set(), set(preexisting_triples), 0, len(preexisting_triples)
 
+    change_log = get_change_log(entity)
+    if change_log is not None:
+        added_triples = change_log.added_triples
+        removed_triples = change_log.removed_triples
+        return added_triples, removed_triples, len(added_triples), len(removed_triples)
+
     current_triples = set(entity.g)
 
     if len(preexisting_triples) == len(current_triples) and set(preexisting_triples) == current_triples:
@@ -114,17 +192,89 @@ def _compute_graph_changes(entity: AbstractEntity, entity_type: str) -> Tuple[Se
     return added_triples, removed_triples, len(added_triples), len(removed_triples)
 
 
+def _get_update_query_cache(
+    entity: AbstractEntity, entity_type: str, update_format: str = "sparql"
+) -> Tuple[Optional[Dict[Hashable, object]], Tuple[str, str, bool]]:
+    if entity_type == "prov" or not isinstance(entity.g, TrackedGraph):
+        return None, (update_format, entity_type, False)
+
+    from oc_ocdm.graph.graph_entity import GraphEntity  # noqa: E402
+    from oc_ocdm.metadata.metadata_entity import MetadataEntity  # noqa: E402
+
+    if not isinstance(entity, (GraphEntity, MetadataEntity)) or get_change_log(entity) is None:
+        return None, (update_format, entity_type, False)
+    return entity.g.cache, (update_format, entity_type, entity.to_be_deleted)
+
+
 def get_update_query(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[List[str], int, int]:
+    """
+    Builds the SPARQL update queries that apply the changes of an entity to a triplestore.
+
+    When the entity graph is a ``TrackedGraph``, the result is memoized within the graph until
+    its next change (or ``commit_changes``), so that ``ProvSet.generate_provenance`` and
+    ``Storer.upload_all`` serialize the changes of each entity only once.
+
+    Args:
+        entity: The entity to analyze
+        entity_type: Type of entity ("graph", "prov", or "metadata")
+
+    Returns:
+        Tuple of (queries, added_count, removed_count)
+    """
+    cache, cache_key = _get_update_query_cache(entity, entity_type)
+    if cache is not None and cache_key in cache:
+        cached_queries, n_added, n_removed = cast("Tuple[Tuple[str, ...], int, int]", cache[cache_key])
+        return list(cached_queries), n_added, n_removed
+
     to_insert, to_delete, n_added, n_removed = _compute_graph_changes(entity, entity_type)
 
     if n_added == 0 and n_removed == 0:
-        return [], 0, 0
+        queries: List[str] = []
+    else:
+        graph_iri = entity.g.identifier
+        if graph_iri is None:
+            raise ValueError("Entity graph has no identifier")
+
+        delete_queries, _ = get_delete_query(graph_iri, to_delete)
+        insert_queries, _ = get_insert_query(graph_iri, to_insert)
+        queries = delete_queries + insert_queries
 
-    graph_iri = entity.g.identifier
-    if graph_iri is None:
-        raise ValueError("Entity graph has no identifier")
+    if cache is not None:
+        cache[cache_key] = (tuple(queries), n_added, n_removed)
+    return queries, n_added, n_removed
 
-    delete_queries, _ = get_delete_query(graph_iri, to_delete)
-    insert_queries, _ = get_insert_query(graph_iri, to_insert)
 
-    return delete_queries + insert_queries, n_added, n_removed
+def get_update_patch(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[str, int, int]:
+    """
+    Builds the RDF Patch that applies the changes of an entity to a triplestore.
+
+    The patch contains a ``D`` row for every removed quad, followed by an ``A`` row for every
+    added quad. It's memoized exactly like the result of ``get_update_query``, and it can be
+    converted to SPARQL with ``oc_ocdm.support.rdf_patch.patch_to_sparql``.
+
+    Args:
+        entity: The entity to analyze
+        entity_type: Type of entity ("graph", "prov", or "metadata")
+
+    Returns:
+        Tuple of (patch, added_count, removed_count), where the patch is empty if nothing changed
+    """
+    cache, cache_key = _get_update_query_cache(entity, entity_type, "rdf-patch")
+    if cache is not None and cache_key in cache:
+        return cast("Tuple[str, int, int]", cache[cache_key])
+
+    to_insert, to_delete, n_added, n_removed = _compute_graph_changes(entity, entity_type)
+
+    if n_added == 0 and n_removed == 0:
+        patch = ""
+    else:
+        graph_iri = entity.g.identifier
+        if graph_iri is None:
+            raise ValueError("Entity graph has no identifier")
+
+        rows = _get_patch_rows("D", graph_iri, to_delete) + _get_patch_rows("A", graph_iri, to_insert)
+        patch = "\n".join(rows) + "\n"
+
+    if cache is not None:
+        cache[cache_key] = (patch, n_added, n_removed)
+    return patch, n_added, n_removed
@@ -0,0 +1,201 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+"""
+Support for a line-oriented change set format based on the rows of `RDF Patch
+<https://afs.github.io/rdf-delta/rdf-patch.html>`_.
+
+Every row adds (``A``) or deletes (``D``) a single quad, whose terms are written
+as in N-Quads::
+
+    D <http://example.org/br/1> <http://purl.org/dc/terms/title> "Old title"^^<http://www.w3.org/2001/XMLSchema#string> <http://example.org/br/> .
+    A <http://example.org/br/1> <http://purl.org/dc/terms/title> "New title"^^<http://www.w3.org/2001/XMLSchema#string> <http://example.org/br/> .
+
+Patches are built by ``oc_ocdm.support.query_utils.get_update_patch``. They can be
+applied to in-memory graphs without any SPARQL parser, or converted to SPARQL
+``DELETE DATA``/``INSERT DATA`` queries right before being sent to a triplestore.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from triplelite import RDFTerm, TripleLite
+
+from oc_ocdm.constants import XSD_STRING
+from oc_ocdm.support.query_utils import MAX_TRIPLES_PER_QUERY
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Optional, Tuple
+
+    from triplelite import Triple
+
+RDF_PATCH_EXTENSION = ".rdfp"
+
+_IRI = r"<[^<>\s]*>"
+_LITERAL = r'"(?:[^"\\]|\\.)*"(?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^<[^<>\s]*>)?'
+_ROW_PATTERN = re.compile(rf"([AD])[ \t]+({_IRI}[ \t]+{_IRI}[ \t]+(?:{_IRI}|{_LITERAL}))(?:[ \t]+({_IRI}))?[ \t]*\.")
+_TRIPLE_PATTERN = re.compile(r"<([^<>\s]*)>[ \t]+<([^<>\s]*)>[ \t]+(.*)")
+# Header and transaction rows carry no change, hence they are skipped
+_IGNORED_ROWS = ("H ", "H\t", "TX", "TC", "TA", "#")
+_UNESCAPE_PATTERN = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+_UNESCAPES: Dict[str, str] = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+_OPERATIONS: Dict[str, str] = {"A": "INSERT", "D": "DELETE"}
+
+
+def _unescape_match(match: re.Match[str]) -> str:
+    code = match.group(1) or match.group(2)
+    if code is not None:
+        return chr(int(code, 16))
+    char = match.group(3)
+    if char not in _UNESCAPES:
+        raise ValueError(f"Invalid escape sequence '\\{char}' in RDF Patch literal.")
+    return _UNESCAPES[char]
+
+
+def _parse_object(term: str) -> RDFTerm:
+    if term.startswith("<"):
+        return RDFTerm("uri", term[1:-1])
+    end = term.rindex('"')
+    value = term[1:end]
+    if "\\" in value:
+        value = _UNESCAPE_PATTERN.sub(_unescape_match, value)
+    suffix = term[end + 1 :]
+    if suffix.startswith("@"):
+        return RDFTerm("literal", value, "", suffix[1:])
+    if suffix.startswith("^^"):
+        return RDFTerm("literal", value, suffix[3:-1])
+    return RDFTerm("literal", value, XSD_STRING)
+
+
+def is_rdf_patch(text: str) -> bool:
+    """
+    It tells whether the given text looks like an RDF Patch rather than a SPARQL update,
+    by looking at its first significant row.
+
+    :param text: The text to be inspected
+    :type text: str
+    :return: True if the first row that is not a header, a transaction marker or a comment is an A/D row
+    """
+    for line in text.split("\n"):
+        line = line.strip()
+        if line and not line.startswith(_IGNORED_ROWS):
+            return _ROW_PATTERN.fullmatch(line) is not None
+    return False
+
+
+def iter_patch_rows(patch: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    It iterates over the A/D rows of an RDF Patch without decoding their terms.
+
+    Header (``H``), transaction (``TX``, ``TC``, ``TA``) and comment rows are skipped.
+
+    :param patch: The RDF Patch to be read
+    :type patch: str
+    :raises ValueError: if a row is malformed or uses prefixed names (``PA``/``PD`` rows)
+    :return: An iterator of (operation, statement, graph IRI) tuples, where the operation is either
+      ``"A"`` or ``"D"``, the statement is the row triple serialized as N-Triples and the graph IRI
+      is None for rows about the default graph
+    """
+    for line in patch.split("\n"):
+        line = line.strip()
+        if not line or line.startswith(_IGNORED_ROWS):
+            continue
+        match = _ROW_PATTERN.fullmatch(line)
+        if match is None:
+            if line.startswith(("PA", "PD")):
+                raise ValueError("Prefixed names are not supported in RDF Patch rows.")
+            raise ValueError(f"Invalid RDF Patch row: {line}")
+        operation, triple, graph = match.groups()
+        yield operation, f"{triple} .", graph[1:-1] if graph is not None else None
+
+
+def parse_patch(patch: str) -> Iterator[Tuple[str, Triple, Optional[str]]]:
+    """
+    It iterates over the A/D rows of an RDF Patch, decoding every row as a triple.
+
+    :param patch: The RDF Patch to be read
+    :type patch: str
+    :raises ValueError: if a row is malformed
+    :return: An iterator of (operation, triple, graph IRI) tuples
+    """
+    for operation, statement, graph in iter_patch_rows(patch):
+        match = _TRIPLE_PATTERN.fullmatch(statement[:-2])
+        assert match is not None
+        s, p, o = match.groups()
+        yield operation, (s, p, _parse_object(o)), graph
+
+
+def apply_patch(patch: str, graphs: Dict[Optional[str], TripleLite]) -> None:
+    """
+    It applies an RDF Patch to a collection of in-memory graphs, following the order of its rows.
+
+    Graphs mentioned by the patch that are not contained in ``graphs`` are created and added to it.
+
+    :param patch: The RDF Patch to be applied
+    :type patch: str
+    :param graphs: A dictionary mapping graph IRIs (None for the default graph) to graphs
+    :type graphs: Dict[Optional[str], TripleLite]
+    :raises ValueError: if a row is malformed
+    :return: None
+    """
+    for operation, triple, graph_iri in parse_patch(patch):
+        g = graphs.get(graph_iri)
+        if g is None:
+            g = TripleLite(identifier=graph_iri)
+            graphs[graph_iri] = g
+        if operation == "A":
+            g.add(triple)
+        else:
+            g.remove(triple)
+
+
+def patch_to_sparql(patch: str) -> List[str]:
+    """
+    It converts an RDF Patch to SPARQL ``DELETE DATA``/``INSERT DATA`` queries.
+
+    Consecutive rows sharing the same operation and graph end up in the same query
+    (up to ``MAX_TRIPLES_PER_QUERY`` rows), so the order of the patch is preserved.
+
+    :param patch: The RDF Patch to be converted
+    :type patch: str
+    :raises ValueError: if a row is malformed
+    :return: The list of SPARQL update queries, to be executed in order
+    """
+    queries: List[str] = []
+    statements: List[str] = []
+    current: Optional[Tuple[str, Optional[str]]] = None
+
+    def flush() -> None:
+        if current is None or not statements:
+            return
+        operation, graph_iri = current
+        data = "".join(statements)
+        if graph_iri is None:
+            queries.append(f"{_OPERATIONS[operation]} DATA {{ {data} }}")
+        else:
+            queries.append(f"{_OPERATIONS[operation]} DATA {{ GRAPH <{graph_iri}> {{ {data} }} }}")
+        statements.clear()
+
+    for operation, statement, graph_iri in iter_patch_rows(patch):
+        key = (operation, graph_iri)
+        if key != current or len(statements) >= MAX_TRIPLES_PER_QUERY:
+            flush()
+            current = key
+        statements.append(statement)
+    flush()
+    return queries
@@ -8,37 +8,184 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import logging
+import threading
+import weakref
+from collections import deque
+from queue import Queue
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import List, Optional
+    from typing import Deque, List, Optional, Tuple
+
+    Lines = List[Tuple[int, str]]
+
+
+def _emit(lines: Lines, logger: Optional[logging.Logger]) -> None:
+    if logger is not None:
+        for level, line in lines:
+            logger.log(level, line)
+    else:
+        print("\n".join(line for _, line in lines))
+
+
+def _emit_forever(queue: Queue[Optional[Lines]], logger: Optional[logging.Logger]) -> None:
+    while True:
+        lines = queue.get()
+        try:
+            if lines is None:
+                return
+            _emit(lines, logger)
+        finally:
+            queue.task_done()
+
+
+def _stop_emitter(queue: Queue[Optional[Lines]], thread: threading.Thread) -> None:
+    # The sentences still queued are emitted before the thread stops
+    queue.put(None)
+    thread.join()
 
 
 class Reporter(object):
     """This class is used as a metaphoric agent being a reporter"""
 
-    def __init__(self, print_sentences: bool = True, prefix: str = "") -> None:
-        self.articles: List[List[str]] = []
-        self.last_article: Optional[List[str]] = None
+    def __init__(
+        self,
+        print_sentences: bool = True,
+        prefix: str = "",
+        level: int = logging.INFO,
+        max_sentences: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+        batch_size: int = 1,
+        background: bool = False,
+    ) -> None:
+        """
+        :param print_sentences: Whether the sentences are emitted (printed or logged) at all
+        :type print_sentences: bool
+        :param prefix: A string prepended to every sentence
+        :type prefix: str
+        :param level: The minimum ``logging`` level of the sentences to be kept: sentences with a lower
+          level are discarded without being stored nor emitted
+        :type level: int
+        :param max_sentences: The maximum number of sentences kept in ``articles``: when it is exceeded,
+          the oldest sentences are discarded. If None, every sentence is kept.
+        :type max_sentences: Optional[int]
+        :param logger: If given, sentences are sent to this logger with their level instead of being printed
+        :type logger: Optional[logging.Logger]
+        :param batch_size: How many sentences are emitted together. Sentences waiting for the batch
+          to be completed are emitted by ``flush``.
+        :type batch_size: int
+        :param background: If True, the batches are emitted by a background thread, so that
+          ``add_sentence`` never waits for the output. ``flush`` waits for the thread to catch up.
+        :type background: bool
+        :raises ValueError: if ``max_sentences`` is negative or ``batch_size`` is not positive
+        """
+        if max_sentences is not None and max_sentences < 0:
+            raise ValueError("max_sentences must be a non negative integer.")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+        self.articles: Deque[Deque[str]] = deque()
+        self.last_article: Optional[Deque[str]] = None
         self.last_sentence: Optional[str] = None
         self.print_sentences: bool = print_sentences
         self.prefix: str = prefix
+        self.level: int = level
+        self.max_sentences: Optional[int] = max_sentences
+        self.logger: Optional[logging.Logger] = logger
+        self.batch_size: int = batch_size
+        self.background: bool = background
+        self._n_sentences: int = 0
+        self._pending: Lines = []
+        self._queue: Optional[Queue[Optional[Lines]]] = None
+        self._stop: Optional[weakref.finalize[..., Reporter]] = None
+
+    def __getstate__(self):
+        """
+        Support for pickle serialization.
+
+        The background thread is not transferred, and a new one is started by the copy if needed.
+        Sentences still waiting to be emitted are emitted by the original reporter only.
+        """
+        state = self.__dict__.copy()
+        state["_pending"] = []
+        state["_queue"] = None
+        state["_stop"] = None
+        return state
 
     def new_article(self) -> None:
         if self.last_article is None or len(self.last_article) > 0:
-            self.last_article = []
+            self.last_article = deque()
             self.last_sentence = None
             self.articles.append(self.last_article)
-            if self.print_sentences and len(self.last_article) > 0:
-                print("\n")
 
-    def add_sentence(self, sentence: str, print_this_sentence: bool = True) -> None:
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def add_sentence(self, sentence: str, print_this_sentence: bool = True, level: int = logging.INFO) -> None:
         assert self.last_article is not None
+        if level < self.level:
+            return
         cur_sentence: str = self.prefix + sentence
         self.last_sentence = cur_sentence
-        self.last_article.append(cur_sentence)
+        if self.max_sentences != 0:
+            self.last_article.append(cur_sentence)
+            self._n_sentences += 1
+            if self.max_sentences is not None and self._n_sentences > self.max_sentences:
+                self._discard_oldest_sentence()
         if self.print_sentences and print_this_sentence:
-            print(cur_sentence)
+            self._pending.append((level, cur_sentence))
+            if len(self._pending) >= self.batch_size:
+                self._emit_pending()
+
+    def _discard_oldest_sentence(self) -> None:
+        oldest = self.articles[0]
+        while not oldest:
+            # Articles emptied by previous discards
+            self.articles.popleft()
+            oldest = self.articles[0]
+        oldest.popleft()
+        self._n_sentences -= 1
+        if not oldest and oldest is not self.last_article:
+            self.articles.popleft()
+
+    def _emit_pending(self) -> None:
+        lines, self._pending = self._pending, []
+        if not self.background:
+            _emit(lines, self.logger)
+            return
+        if self._queue is None:
+            self._queue = Queue()
+            thread = threading.Thread(
+                target=_emit_forever, args=(self._queue, self.logger), name="oc_ocdm-reporter", daemon=True
+            )
+            thread.start()
+            # The thread is stopped once the reporter is garbage collected, or at exit
+            self._stop = weakref.finalize(self, _stop_emitter, self._queue, thread)
+        self._queue.put(lines)
+
+    def flush(self) -> None:
+        """
+        It emits the sentences waiting for their batch to be completed and, in background mode,
+        it waits until every sentence has been emitted.
+
+        :return: None
+        """
+        if self._pending:
+            self._emit_pending()
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        It emits every pending sentence and stops the background thread, if any.
+
+        :return: None
+        """
+        self.flush()
+        if self._stop is not None:
+            self._stop()
+            self._stop = None
+            self._queue = None
 
     def get_last_sentence(self) -> Optional[str]:
         return self.last_sentence
@@ -4,15 +4,38 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
 import json
+import re
+import threading
 import time
-from typing import cast
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import IO, TYPE_CHECKING, Callable, TypeVar, cast
 from urllib.error import HTTPError, URLError
 from urllib.parse import parse_qs, urlparse
 
 from SPARQLWrapper import JSON, N3, POST, URLENCODED, SPARQLWrapper
 
 from oc_ocdm._types import SparqlQueryResult
+from oc_ocdm.support.metrics import NULL_METRICS, MetricsSink
+from oc_ocdm.support.support import build_graph_from_results
+
+if TYPE_CHECKING:
+    from typing import Iterator
+
+    from triplelite import TripleLite
+
+    from oc_ocdm._types import SparqlResultRow
+
+T = TypeVar("T")
+
+# The beginning of the array of bindings within a SPARQL JSON results document
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+# Whatever can separate two bindings of the array
+_BINDINGS_SEPARATOR = re.compile(r"[\s,]*")
+_JSON_DECODER = json.JSONDecoder()
 
 
 class SPARQLEndpointError(Exception):
@@ -30,7 +53,7 @@ def _make_sparql_client(endpoint: str) -> SPARQLWrapper:
     return sparql
 
 
-def _execute_with_retry(
+def _open_with_retry(
     endpoint: str,
     query: str,
     return_format: str,
@@ -38,7 +61,8 @@ def _execute_with_retry(
     is_update: bool = False,
     max_retries: int = 5,
     backoff_factor: float = 0.5,
-) -> bytes:
+    metrics: MetricsSink = NULL_METRICS,
+) -> IO[bytes]:
     sparql = _make_sparql_client(endpoint)
     sparql.setQuery(query)
     sparql.setReturnFormat(return_format)
@@ -50,9 +74,11 @@ def _execute_with_retry(
 
     for attempt in range(max_retries + 1):
         if attempt > 0:
+            metrics.increment("sparql.retries")
             time.sleep(backoff_factor * (2**attempt))
+        metrics.increment("sparql.requests")
         try:
-            return sparql.query().response.read()
+            return cast(IO[bytes], sparql.query().response)
         except HTTPError as e:
             if e.code == 400:
                 raise SPARQLEndpointError(f"Query syntax error: {e.read().decode()}", status_code=400) from e
@@ -67,25 +93,171 @@ def _execute_with_retry(
     raise last_error  # type: ignore[misc]
 
 
+def _execute_with_retry(
+    endpoint: str,
+    query: str,
+    return_format: str,
+    *,
+    is_update: bool = False,
+    max_retries: int = 5,
+    backoff_factor: float = 0.5,
+    metrics: MetricsSink = NULL_METRICS,
+) -> bytes:
+    response = _open_with_retry(
+        endpoint,
+        query,
+        return_format,
+        is_update=is_update,
+        max_retries=max_retries,
+        backoff_factor=backoff_factor,
+        metrics=metrics,
+    )
+    try:
+        return response.read()
+    finally:
+        response.close()
+
+
+class _TextBuffer(object):
+    def __init__(self, stream: IO[bytes], chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._eof = False
+        self.text: str = ""
+        self.pos: int = 0
+
+    def fill(self) -> bool:
+        # It appends the next chunk of the stream to the text that is still to be consumed
+        while not self._eof:
+            chunk = self._stream.read(self._chunk_size)
+            self._eof = not chunk
+            text = self._decoder.decode(chunk, final=self._eof)
+            if text:
+                self.text = self.text[self.pos :] + text
+                self.pos = 0
+                return True
+        return False
+
+
+def iter_json_bindings(stream: IO[bytes], chunk_size: int = 65536) -> Iterator[SparqlResultRow]:
+    """
+    It reads a SPARQL JSON results document from a binary stream, yielding its bindings one at a time.
+
+    Only ``chunk_size`` bytes are read at a time, hence the memory used does not depend on
+    the number of bindings.
+
+    :param stream: The binary stream containing the SPARQL JSON results
+    :type stream: IO[bytes]
+    :param chunk_size: The number of bytes read from the stream at a time
+    :type chunk_size: int
+    :raises ValueError: if the document is malformed or truncated
+    :return: An iterator over the bindings (an empty one for documents without bindings)
+    """
+    buffer = _TextBuffer(stream, chunk_size)
+    while True:
+        match = _BINDINGS_START.search(buffer.text, buffer.pos)
+        if match is not None:
+            buffer.pos = match.end()
+            break
+        # The key might be split between two chunks
+        buffer.pos = max(buffer.pos, len(buffer.text) - 64)
+        if not buffer.fill():
+            return
+
+    while True:
+        text = buffer.text
+        separator = _BINDINGS_SEPARATOR.match(text, buffer.pos)
+        assert separator is not None
+        pos = buffer.pos = separator.end()
+        if pos == len(text):
+            if not buffer.fill():
+                raise ValueError("The SPARQL JSON results are truncated.")
+            continue
+        if text[pos] == "]":
+            return
+        try:
+            binding, end = _JSON_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            # The binding is incomplete, unless the stream is over
+            if not buffer.fill():
+                raise
+            continue
+        buffer.pos = end
+        yield cast("SparqlResultRow", binding)
+
+
 def sparql_query(
     endpoint: str,
     query: str,
     *,
     max_retries: int = 5,
     backoff_factor: float = 0.5,
+    metrics: MetricsSink = NULL_METRICS,
 ) -> SparqlQueryResult:
-    raw = _execute_with_retry(endpoint, query, JSON, max_retries=max_retries, backoff_factor=backoff_factor)
+    raw = _execute_with_retry(
+        endpoint, query, JSON, max_retries=max_retries, backoff_factor=backoff_factor, metrics=metrics
+    )
     return cast(SparqlQueryResult, json.loads(raw))
 
 
+def sparql_query_iter(
+    endpoint: str,
+    query: str,
+    *,
+    max_retries: int = 5,
+    backoff_factor: float = 0.5,
+    chunk_size: int = 65536,
+    metrics: MetricsSink = NULL_METRICS,
+) -> Iterator[SparqlResultRow]:
+    """
+    It executes a SPARQL SELECT query like ``sparql_query``, but it yields the bindings of the results
+    while the response is being read, instead of loading the whole response in memory.
+
+    The query is sent when the first binding is requested. Failures that happen after the response
+    has started being read are not retried.
+
+    :param endpoint: The URL of the SPARQL endpoint
+    :type endpoint: str
+    :param query: The SELECT query
+    :type query: str
+    :param max_retries: The maximum number of times a failed request is retried
+    :type max_retries: int
+    :param backoff_factor: The factor of the exponential delay between retries
+    :type backoff_factor: float
+    :param chunk_size: The number of bytes read from the response at a time
+    :type chunk_size: int
+    :param metrics: The sink counting the requests sent and their retries
+    :type metrics: MetricsSink
+    :raises SPARQLEndpointError: if the request fails
+    :return: An iterator over the bindings of the results
+    """
+    response = _open_with_retry(
+        endpoint, query, JSON, max_retries=max_retries, backoff_factor=backoff_factor, metrics=metrics
+    )
+    try:
+        yield from iter_json_bindings(response, chunk_size)
+    finally:
+        response.close()
+
+
 def sparql_update(
     endpoint: str,
     query: str,
     *,
     max_retries: int = 5,
     backoff_factor: float = 0.5,
+    metrics: MetricsSink = NULL_METRICS,
 ) -> None:
-    _execute_with_retry(endpoint, query, JSON, is_update=True, max_retries=max_retries, backoff_factor=backoff_factor)
+    _execute_with_retry(
+        endpoint,
+        query,
+        JSON,
+        is_update=True,
+        max_retries=max_retries,
+        backoff_factor=backoff_factor,
+        metrics=metrics,
+    )
 
 
 def sparql_construct(
@@ -94,5 +266,184 @@ def sparql_construct(
     *,
     max_retries: int = 5,
     backoff_factor: float = 0.5,
+    metrics: MetricsSink = NULL_METRICS,
+) -> bytes:
+    return _execute_with_retry(
+        endpoint, query, N3, max_retries=max_retries, backoff_factor=backoff_factor, metrics=metrics
+    )
+
+
+class AsyncSPARQLClient(object):
+    """
+    A client that runs SPARQL requests from ``asyncio`` code without blocking the event loop.
+
+    Requests are executed by a pool of ``max_concurrency`` worker threads shared by all the
+    requests of the client, which therefore also bounds the number of concurrent requests.
+    Failed requests are retried like in the blocking functions of this module, but the
+    backoff delay is awaited with ``asyncio.sleep`` outside of the pool.
+
+    The client can be shared among different event loops, and it can be used as a context manager.
+    The requests sent and their retries are counted by ``metrics`` (``sparql.requests`` and
+    ``sparql.retries``), if given.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        metrics: MetricsSink | None = None,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer.")
+        self.max_concurrency: int = max_concurrency
+        self.max_retries: int = max_retries
+        self.backoff_factor: float = backoff_factor
+        self.metrics: MetricsSink = metrics if metrics is not None else NULL_METRICS
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="oc_ocdm-sparql")
+
+    def __enter__(self) -> AsyncSPARQLClient:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        It releases the worker threads of the client, after the running requests are over.
+
+        :param wait: If False, the method returns at once, without blocking the event loop: the requests
+          not started yet are cancelled, while the running ones are left to finish in the background.
+        :type wait: bool
+        :return: None
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    async def run(
+        self, request: Callable[[], T], *, max_retries: int | None = None, backoff_factor: float | None = None
+    ) -> T:
+        """
+        It runs a blocking request in the pool of the client, retrying it in case of server or connection errors.
+
+        :param request: A function that performs a single attempt of the request (i.e. without retrying by itself)
+        :type request: Callable[[], T]
+        :param max_retries: The maximum number of retries (the default one of the client if None)
+        :type max_retries: Optional[int]
+        :param backoff_factor: The factor of the exponential delay between retries (the default one of the client
+          if None)
+        :type backoff_factor: Optional[float]
+        :raises SPARQLEndpointError: if the request fails
+        :return: The value returned by the request
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        backoff_factor = self.backoff_factor if backoff_factor is None else backoff_factor
+        loop = asyncio.get_running_loop()
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                self.metrics.increment("sparql.retries")
+                await asyncio.sleep(backoff_factor * (2**attempt))
+            self.metrics.increment("sparql.requests")
+            try:
+                return await loop.run_in_executor(self._executor, request)
+            except SPARQLEndpointError as e:
+                # Syntax and client errors would fail again
+                retryable = e.status_code is None or e.status_code >= 500
+                if not retryable or attempt == max_retries:
+                    raise
+        raise AssertionError("unreachable")
+
+    async def query(
+        self, endpoint: str, query: str, *, max_retries: int | None = None, backoff_factor: float | None = None
+    ) -> SparqlQueryResult:
+        return await self.run(
+            partial(sparql_query, endpoint, query, max_retries=0),
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+        )
+
+    async def query_graph(
+        self, endpoint: str, query: str, *, max_retries: int | None = None, backoff_factor: float | None = None
+    ) -> TripleLite:
+        """
+        It executes a SELECT query whose variables are ``?s``, ``?p`` and ``?o``, streaming
+        its results straight into a ``TripleLite`` graph.
+        """
+        return await self.run(
+            partial(_query_graph, endpoint, query), max_retries=max_retries, backoff_factor=backoff_factor
+        )
+
+    async def update(
+        self, endpoint: str, query: str, *, max_retries: int | None = None, backoff_factor: float | None = None
+    ) -> None:
+        await self.run(
+            partial(sparql_update, endpoint, query, max_retries=0),
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+        )
+
+    async def construct(
+        self, endpoint: str, query: str, *, max_retries: int | None = None, backoff_factor: float | None = None
+    ) -> bytes:
+        return await self.run(
+            partial(sparql_construct, endpoint, query, max_retries=0),
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+        )
+
+
+def _query_graph(endpoint: str, query: str) -> TripleLite:
+    return build_graph_from_results(sparql_query_iter(endpoint, query, max_retries=0))
+
+
+_default_client: AsyncSPARQLClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_async_client() -> AsyncSPARQLClient:
+    """
+    It returns the client shared by ``sparql_query_async``, ``sparql_update_async`` and
+    ``sparql_construct_async``, creating it on first use.
+
+    :return: The shared ``AsyncSPARQLClient``
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = AsyncSPARQLClient()
+        return _default_client
+
+
+async def sparql_query_async(
+    endpoint: str,
+    query: str,
+    *,
+    max_retries: int = 5,
+    backoff_factor: float = 0.5,
+    client: AsyncSPARQLClient | None = None,
+) -> SparqlQueryResult:
+    client = client if client is not None else get_default_async_client()
+    return await client.query(endpoint, query, max_retries=max_retries, backoff_factor=backoff_factor)
+
+
+async def sparql_update_async(
+    endpoint: str,
+    query: str,
+    *,
+    max_retries: int = 5,
+    backoff_factor: float = 0.5,
+    client: AsyncSPARQLClient | None = None,
+) -> None:
+    client = client if client is not None else get_default_async_client()
+    await client.update(endpoint, query, max_retries=max_retries, backoff_factor=backoff_factor)
+
+
+async def sparql_construct_async(
+    endpoint: str,
+    query: str,
+    *,
+    max_retries: int = 5,
+    backoff_factor: float = 0.5,
+    client: AsyncSPARQLClient | None = None,
 ) -> bytes:
-    return _execute_with_retry(endpoint, query, N3, max_retries=max_retries, backoff_factor=backoff_factor)
+    client = client if client is not None else get_default_async_client()
+    return await client.construct(endpoint, query, max_retries=max_retries, backoff_factor=backoff_factor)
@@ -20,13 +20,13 @@ from rdflib.namespace import XSD as _RDFLIB_XSD
 from rdflib.term import Node
 from triplelite import XSD_STRING, RDFTerm, TripleLite
 
-from oc_ocdm._types import SparqlBinding, SparqlResultRows
+from oc_ocdm._types import SparqlBinding, SparqlResultRow
 from oc_ocdm.constants import RDF_TYPE, XSD_DATE, XSD_GYEAR, XSD_GYEARMONTH, XSD_STRING
 
 _RDFLIB_XSD_STRING = _RDFLIB_XSD.string
 
 if TYPE_CHECKING:
-    from typing import Dict, List, Optional, Set, Tuple
+    from typing import Dict, Iterable, List, Optional, Set, Tuple
 
     from oc_ocdm.graph.entities.bibliographic.agent_role import AgentRole
     from oc_ocdm.graph.entities.bibliographic.bibliographic_resource import BibliographicResource
@@ -371,10 +371,12 @@ def has_supplier_prefix(res: str, base_iri: str) -> bool:
     return re.search(r"^%s[a-z][a-z]/0" % base_iri, string_iri) is not None
 
 
-def build_graph_from_results(results: SparqlResultRows) -> TripleLite:
+def build_graph_from_results(results: Iterable[SparqlResultRow]) -> TripleLite:
+    # Any iterable is accepted, so that the bindings streamed by sparql_query_iter never pile up in a list
     graph = TripleLite()
-    for triple in results:
-        graph.add((triple["s"]["value"], triple["p"]["value"], sparql_binding_to_rdfterm(triple["o"])))
+    graph.add_many(
+        (triple["s"]["value"], triple["p"]["value"], sparql_binding_to_rdfterm(triple["o"])) for triple in results
+    )
     return graph
 
 
@@ -0,0 +1,129 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from triplelite import TripleLite
+
+if TYPE_CHECKING:
+    from typing import AbstractSet, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+    from triplelite import RDFTerm, Triple
+
+
+def _rebuild_tracked_graph(
+    identifier: Optional[str], reverse_index_predicates: Optional[frozenset[str]], triples: list[Triple]
+) -> TrackedGraph:
+    g = TrackedGraph(identifier=identifier, reverse_index_predicates=reverse_index_predicates)
+    TripleLite.add_many(g, triples)
+    return g
+
+
+class TrackedGraph(TripleLite):
+    """
+    A ``TripleLite`` graph that records every change applied to it since the last call
+    to ``reset_changes``.
+
+    The change log is kept as two disjoint sets, ``added_triples`` and ``removed_triples``,
+    updated by ``add``, ``add_many`` and ``remove``: adding a triple that was previously removed
+    (or vice versa) simply cancels the corresponding entry. Therefore, computing the difference
+    between the graph and its baseline costs O(changes) instead of O(triples).
+    """
+
+    def __init__(self, identifier: str | None = None, reverse_index_predicates: frozenset[str] | None = None) -> None:
+        super().__init__(identifier=identifier, reverse_index_predicates=reverse_index_predicates)
+        self._baseline: Optional[AbstractSet[Triple]] = None
+        self._added: Set[Triple] = set()
+        self._removed: Set[Triple] = set()
+        self._cache: Dict[Hashable, object] = {}
+
+    def __reduce__(self) -> Tuple[Callable[..., TrackedGraph], Tuple[object, ...], Dict[str, object]]:
+        return (
+            _rebuild_tracked_graph,
+            (self.identifier, self._reverse_index_predicates, list(self)),
+            {"_baseline": self._baseline, "_added": self._added, "_removed": self._removed},
+        )
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        vars(self).update(state)
+
+    @property
+    def baseline(self) -> Optional[AbstractSet[Triple]]:
+        """The set of triples passed to the last ``reset_changes`` call, if any."""
+        return self._baseline
+
+    @property
+    def added_triples(self) -> Set[Triple]:
+        return set(self._added)
+
+    @property
+    def removed_triples(self) -> Set[Triple]:
+        return set(self._removed)
+
+    @property
+    def is_dirty(self) -> bool:
+        return len(self._added) > 0 or len(self._removed) > 0
+
+    @property
+    def cache(self) -> Dict[Hashable, object]:
+        """
+        A dictionary where values derived from the change log (e.g. SPARQL update queries) can be memoized.
+        It's emptied whenever the graph changes or ``reset_changes`` is called, and it's not pickled.
+        """
+        return self._cache
+
+    def reset_changes(self, baseline: Optional[AbstractSet[Triple]] = None) -> None:
+        """
+        It clears the change log, so that changes are tracked starting from now.
+
+        If ``baseline`` is given, it must be a subset of the current graph: any triple of the graph
+        that is not contained in it is recorded as added.
+
+        :param baseline: The triples with respect to which changes are tracked
+        :type baseline: Optional[AbstractSet[Triple]]
+        :return: None
+        """
+        self._baseline = baseline
+        self._cache.clear()
+        self._removed = set()
+        if baseline is not None and len(baseline) != len(self):
+            self._added = set(self) - set(baseline)
+        else:
+            self._added = set()
+
+    def _record_addition(self, triple: Triple) -> None:
+        self._cache.clear()
+        if triple in self._removed:
+            self._removed.discard(triple)
+        else:
+            self._added.add(triple)
+
+    def add(self, triple: tuple[str, str, RDFTerm]) -> None:
+        if triple in self:
+            return
+        super().add(triple)
+        self._record_addition(triple)
+
+    def add_many(self, triples: Iterable[tuple[str, str, RDFTerm]]) -> None:
+        new_triples = {triple for triple in triples if triple not in self}
+        super().add_many(new_triples)
+        for triple in new_triples:
+            self._record_addition(triple)
+
+    def remove(self, triple: tuple[str | None, str | None, RDFTerm | None]) -> None:
+        matches = list(self.triples(triple))
+        if not matches:
+            return
+        super().remove(triple)
+        self._cache.clear()
+        for match in matches:
+            if match in self._added:
+                self._added.discard(match)
+            else:
+                self._removed.add(match)
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import struct
+import tempfile
+import unittest
+
+from oc_ocdm.counter_handler.binary_filesystem_counter_handler import BinaryFilesystemCounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+
+class TestBinaryFilesystemCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.info_dir = os.path.join(self.temp_dir.name, "info_dir") + os.sep
+        self.counter_handler = BinaryFilesystemCounterHandler(self.info_dir)
+
+    def tearDown(self):
+        self.counter_handler.close()
+        self.temp_dir.cleanup()
+
+    def test_set_and_read_counter(self):
+        self.assertEqual(self.counter_handler.read_counter("br"), 0)
+        self.assertFalse(os.path.exists(self.info_dir + "info_file_br.bin"))
+
+        self.counter_handler.set_counter(18, "br")
+        self.counter_handler.set_counter(7, "br", "se", 35)
+        self.assertEqual(self.counter_handler.read_counter("br"), 18)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 35), 7)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 34), 0)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 100000), 0)
+
+        self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+        self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "br", "se", 0)
+        self.assertRaises(ValueError, self.counter_handler.read_counter, "br", "se", -1)
+
+    def test_increment_counter(self):
+        self.assertEqual(self.counter_handler.increment_counter("br"), 1)
+        self.assertEqual(self.counter_handler.increment_counter("br"), 2)
+        self.assertEqual(self.counter_handler.increment_counter("br", "se", 3), 1)
+        self.assertEqual(self.counter_handler.increment_metadata_counter("di", "dataset"), 1)
+        self.assertEqual(self.counter_handler.read_metadata_counter("di", "dataset"), 1)
+        self.assertRaises(ValueError, self.counter_handler.increment_metadata_counter, "di", None)
+
+    def test_file_layout(self):
+        self.counter_handler.set_counter(5, "br", "se", 3)
+        self.counter_handler.flush()
+        with open(self.info_dir + "prov_file_br.bin", "rb") as f:
+            content = f.read()
+        self.assertEqual(content[:8], b"OCDMCNT\x01")
+        self.assertEqual(struct.unpack_from("<3Q", content, 8), (0, 0, 5))
+
+    def test_persistence(self):
+        self.counter_handler.set_counters_batch({("br", "se"): {1: 3, 2000: 9}, ("ra", ""): {1: 4}}, "")
+        self.counter_handler.close()
+
+        reopened = BinaryFilesystemCounterHandler(self.info_dir)
+        try:
+            self.assertEqual(reopened.read_counter("br", "se", 1), 3)
+            self.assertEqual(reopened.read_counter("br", "se", 2000), 9)
+            self.assertEqual(reopened.read_counter("ra"), 4)
+        finally:
+            reopened.close()
+
+    def test_supplier_prefix(self):
+        self.counter_handler.close()
+        info_dir = os.path.join(self.temp_dir.name, "P060", "info_dir") + os.sep
+        self.counter_handler = BinaryFilesystemCounterHandler(info_dir, supplier_prefix="P060")
+        self.counter_handler.set_counter(3, "br", supplier_prefix="P060")
+        self.counter_handler.set_counter(8, "br", supplier_prefix="P070")
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="P060"), 3)
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="P070"), 8)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, "P070", "info_dir", "info_file_br.bin")))
+
+    def test_migration_from_text_files(self):
+        self.counter_handler.close()
+        text_handler = FilesystemCounterHandler(self.info_dir)
+        text_handler.set_counter(42, "br")
+        text_handler.set_counter(2, "br", "se", 1)
+        text_handler.set_counter(6, "br", "se", 4)
+        text_handler.set_metadata_counter(3, "di", "dataset")
+        text_handler.flush()
+
+        self.counter_handler = BinaryFilesystemCounterHandler(self.info_dir)
+        self.assertEqual(self.counter_handler.read_counter("br"), 42)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 1), 2)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 2), 0)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 4), 6)
+        self.assertEqual(self.counter_handler.increment_metadata_counter("di", "dataset"), 4)
+
+        self.assertTrue(os.path.exists(self.info_dir + "info_file_br.bin"))
+        self.assertFalse(os.path.exists(self.info_dir + "info_file_br.txt"))
+        self.assertFalse(os.path.exists(self.info_dir + "prov_file_br.txt"))
+
+    def test_not_a_counter_file(self):
+        os.makedirs(self.info_dir, exist_ok=True)
+        with open(self.info_dir + "info_file_br.bin", "wb") as f:
+            f.write(b"garbage!garbage!")
+        self.assertRaises(ValueError, self.counter_handler.read_counter, "br")
+
+    def test_pickle_serialization(self):
+        self.counter_handler.set_counter(12, "br")
+        restored = pickle.loads(pickle.dumps(self.counter_handler))
+        try:
+            self.assertEqual(restored.read_counter("br"), 12)
+            self.assertEqual(restored.increment_counter("br"), 13)
+        finally:
+            restored.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
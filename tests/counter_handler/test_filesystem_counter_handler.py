@@ -6,11 +6,22 @@
 
 # -*- coding: utf-8 -*-
 import os
+import pickle
 import shutil
 import tempfile
 import unittest
+from multiprocessing import Pool
 
+from oc_ocdm.counter_handler.binary_filesystem_counter_handler import BinaryFilesystemCounterHandler
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.support.metrics import InMemoryMetricsSink
+
+
+def _allocate_in_worker(handler_class: type, info_dir: str, n: int) -> tuple[list[int], list[int]]:
+    counter_handler = handler_class(info_dir, lease_size=7)
+    graph_values = [counter_handler.increment_counter("br") for _ in range(n)]
+    prov_values = [counter_handler.increment_counter("br", "se", 1) for _ in range(n)]
+    return graph_values, prov_values
 
 
 class TestFilesystemCounterHandler(unittest.TestCase):
@@ -128,5 +139,108 @@ class TestFilesystemCounterHandler(unittest.TestCase):
         shutil.rmtree(tmp_dir)
 
 
+class TestFilesystemCounterHandlerLeases(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.info_dir = os.path.join(self.temp_dir.name, "info_dir") + os.sep
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_invalid_lease_size(self):
+        self.assertRaises(ValueError, FilesystemCounterHandler, self.info_dir, lease_size=0)
+
+    def test_leased_range_is_persisted(self):
+        first = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        second = FilesystemCounterHandler(self.info_dir, lease_size=10)
+
+        self.assertEqual(first.increment_counter("br"), 1)
+        self.assertEqual(first.increment_counter("br"), 2)
+        with open(self.info_dir + "info_file_br.txt") as f:
+            self.assertEqual(f.read(), "10\n")
+        self.assertEqual(second.read_counter("br"), 10)
+        self.assertEqual(second.increment_counter("br"), 11)
+        self.assertEqual(first.increment_counter("br"), 3)
+
+    def test_provenance_counters_are_not_leased(self):
+        first = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        second = FilesystemCounterHandler(self.info_dir, lease_size=10)
+
+        self.assertEqual(first.increment_counter("br", "se", 5), 1)
+        self.assertEqual(second.increment_counter("br", "se", 5), 2)
+        self.assertEqual(first.read_counter("br", "se", 5), 2)
+        self.assertEqual(first.increment_metadata_counter("di", "dataset"), 1)
+        self.assertEqual(second.increment_metadata_counter("di", "dataset"), 2)
+
+    def test_set_counter(self):
+        first = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        second = FilesystemCounterHandler(self.info_dir, lease_size=10)
+
+        self.assertEqual(first.increment_counter("br"), 1)
+        with self.subTest("Values inside the lease are skipped"):
+            first.set_counter(5, "br")
+            self.assertEqual(first.increment_counter("br"), 6)
+        with self.subTest("Graph counters are never lowered"):
+            second.set_counter(3, "br")
+            self.assertEqual(second.read_counter("br"), 10)
+        with self.subTest("A value beyond the lease discards it"):
+            second.set_counter(20, "br")
+            self.assertEqual(first.increment_counter("br"), 7)
+            first.set_counter(25, "br")
+            self.assertEqual(first.increment_counter("br"), 26)
+        with self.subTest("Provenance counters are set exactly"):
+            first.set_counter(4, "br", "se", 1)
+            first.set_counter(2, "br", "se", 1)
+            self.assertEqual(second.read_counter("br", "se", 1), 2)
+
+    def test_set_counters_batch(self):
+        first = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        second = FilesystemCounterHandler(self.info_dir, lease_size=10)
+
+        self.assertEqual(first.increment_counter("br"), 1)
+        self.assertEqual(first.increment_counter("ra"), 1)
+        with self.subTest("Graph counters are never lowered"):
+            second.set_counters_batch({("br", ""): {1: 3}, ("ra", ""): {1: 15}}, "")
+            self.assertEqual(second.read_counter("br"), 10)
+            self.assertEqual(second.read_counter("ra"), 15)
+            self.assertEqual(second.increment_counter("br"), 11)
+        with self.subTest("Values inside the lease are skipped"):
+            first.set_counters_batch({("br", ""): {1: 5}}, "")
+            self.assertEqual(first.increment_counter("br"), 6)
+            # The range leased by the first handler is still its own
+            self.assertEqual(first.increment_counter("ra"), 2)
+        with self.subTest("Provenance counters are set exactly"):
+            first.set_counters_batch({("br", "se"): {1: 4, 2: 3}}, "")
+            second.set_counters_batch({("br", "se"): {1: 2}}, "")
+            self.assertEqual(first.read_counter("br", "se", 1), 2)
+            self.assertEqual(first.read_counter("br", "se", 2), 3)
+
+    def test_lock_wait_metrics(self):
+        counter_handler = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        counter_handler.metrics = InMemoryMetricsSink()
+        for _ in range(12):
+            counter_handler.increment_counter("br")
+        # One lock for each leased range
+        self.assertEqual(counter_handler.metrics.get_timing("counter_handler.lock_wait")[0], 2)
+
+    def test_pickle_drops_leases(self):
+        counter_handler = FilesystemCounterHandler(self.info_dir, lease_size=10)
+        self.assertEqual(counter_handler.increment_counter("br"), 1)
+        restored = pickle.loads(pickle.dumps(counter_handler))
+        self.assertEqual(restored.increment_counter("br"), 11)
+        self.assertEqual(counter_handler.increment_counter("br"), 2)
+
+    def test_concurrent_processes(self):
+        for handler_class in (FilesystemCounterHandler, BinaryFilesystemCounterHandler):
+            with self.subTest(handler_class=handler_class.__name__):
+                info_dir = os.path.join(self.temp_dir.name, handler_class.__name__) + os.sep
+                with Pool(4) as pool:
+                    results = pool.starmap(_allocate_in_worker, [(handler_class, info_dir, 25)] * 4)
+                graph_values = [value for values, _ in results for value in values]
+                prov_values = [value for _, values in results for value in values]
+                self.assertEqual(len(set(graph_values)), 100)
+                self.assertEqual(sorted(prov_values), list(range(1, 101)))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -143,6 +143,25 @@ class TestFilesystemCounterHandler(unittest.TestCase):
             self.assertRaises(ValueError, self.counter_handler.increment_counter, "br", "xyz")
             self.assertRaises(ValueError, self.counter_handler.increment_counter, "br", "se", -1)
 
+    def test_read_counters(self):
+        self.counter_handler.entity_counters["br"] = 12
+        self.counter_handler.prov_counters["id"]["se"] = [0, 0, 5]
+
+        result = self.counter_handler.read_counters([("br", "", 1, ""), ("id", "se", 3, ""), ("id", "se", 4, "")])
+        self.assertEqual(result, [12, 5, 0])
+        self.assertRaises(ValueError, self.counter_handler.read_counters, [("xyz", "", 1, "")])
+
+    def test_set_counters(self):
+        with self.subTest("Set BR and SE counters"):
+            self.counter_handler.set_counters({("br", "", 1, ""): 8, ("id", "se", 2, ""): 3})
+            self.assertEqual(self.counter_handler.entity_counters["br"], 8)
+            self.assertEqual(self.counter_handler.prov_counters["id"]["se"], [0, 3])
+        with self.subTest("Wrong inputs"):
+            self.assertRaises(
+                ValueError, self.counter_handler.set_counters, {("ra", "", 1, ""): 1, ("br", "", 1, ""): -1}
+            )
+            self.assertEqual(self.counter_handler.entity_counters["ra"], 0)
+
     def test_set_metadata_counter(self):
         dataset_name: str = "http://dataset/"
         with self.subTest("Set DI counter"):
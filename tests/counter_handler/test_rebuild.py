@@ -0,0 +1,130 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from oc_ocdm.counter_handler.rebuild import rebuild_counters, scan_dump
+from oc_ocdm.counter_handler.shared_memory_counter_handler import SharedMemoryCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.prov_set import ProvSet
+from oc_ocdm.storer import Storer
+
+
+class TestRebuild(unittest.TestCase):
+    base_iri = "http://test/"
+    resp_agent = "http://resp_agent.test/"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self.temp_dir.name, "rdf") + os.sep
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_dump(self, output_format: str, zip_output: bool) -> None:
+        graph_set = GraphSet(self.base_iri, supplier_prefix="060")
+        prov_set = ProvSet(graph_set, self.base_iri, wanted_label=False, supplier_prefix="060")
+        brs = [graph_set.add_br(self.resp_agent) for _ in range(3)]
+        graph_set.add_id(self.resp_agent)
+        graph_set.add_br(self.resp_agent, res="http://test/br/07012")
+
+        for i in range(2):
+            if i == 1:
+                brs[0].has_title("Modified")
+                brs[2].has_title("Modified")
+            prov_set.generate_provenance()
+            for abstract_set in (graph_set, prov_set):
+                storer = Storer(
+                    abstract_set,
+                    context_map={},
+                    dir_split=10000,
+                    n_file_item=1000,
+                    output_format=output_format,
+                    zip_output=zip_output,
+                )
+                storer.store_all(self.base_dir, self.base_iri)
+            graph_set.commit_changes()
+
+    def test_scan_dump(self):
+        for output_format, zip_output in (("json-ld", False), ("json-ld", True), ("nt11", False)):
+            with self.subTest(output_format=output_format, zip_output=zip_output):
+                self.tearDown()
+                self.setUp()
+                self._create_dump(output_format, zip_output)
+                result = scan_dump(self.base_dir, max_workers=2)
+                expected = {
+                    "060": {
+                        ("br", ""): {1: 3},
+                        ("br", "se"): {1: 2, 2: 1, 3: 2},
+                        ("id", ""): {1: 1},
+                        ("id", "se"): {1: 1},
+                    },
+                    "070": {("br", ""): {1: 12}, ("br", "se"): {12: 1}},
+                }
+                self.assertEqual(result, expected)
+
+    def test_scan_dump_with_deleted_entity(self):
+        graph_set = GraphSet(self.base_iri, supplier_prefix="060")
+        prov_set = ProvSet(graph_set, self.base_iri, wanted_label=False, supplier_prefix="060")
+        brs = [graph_set.add_br(self.resp_agent) for _ in range(3)]
+        for i in range(2):
+            if i == 1:
+                brs[2].mark_as_to_be_deleted()
+            prov_set.generate_provenance()
+            for abstract_set in (graph_set, prov_set):
+                storer = Storer(
+                    abstract_set, context_map={}, dir_split=10000, n_file_item=1000, output_format="json-ld"
+                )
+                storer.store_all(self.base_dir, self.base_iri)
+            graph_set.commit_changes()
+
+        result = scan_dump(self.base_dir, max_workers=2)
+        self.assertEqual(result, {"060": {("br", ""): {1: 3}, ("br", "se"): {1: 1, 2: 1, 3: 2}}})
+
+    def test_empty_dump(self):
+        self.assertEqual(scan_dump(self.base_dir), {})
+
+    def test_rebuild_counters(self):
+        self._create_dump("json-ld", True)
+        counter_handler = SharedMemoryCounterHandler(capacity=1024)
+        try:
+            counter_handler.set_counter(99, "ra", supplier_prefix="060")
+            with patch.object(counter_handler, "set_counters", wraps=counter_handler.set_counters) as set_counters:
+                rebuild_counters(self.base_dir, counter_handler, max_workers=2, batch_size=3)
+            self.assertEqual([len(c.args[0]) for c in set_counters.call_args_list], [3, 3, 2])
+
+            self.assertEqual(counter_handler.read_counter("br", supplier_prefix="060"), 3)
+            self.assertEqual(counter_handler.read_counter("br", supplier_prefix="070"), 12)
+            self.assertEqual(counter_handler.read_counter("id", supplier_prefix="060"), 1)
+            self.assertEqual(counter_handler.read_counter("br", "se", 1, "060"), 2)
+            self.assertEqual(counter_handler.read_counter("br", "se", 2, "060"), 1)
+            self.assertEqual(counter_handler.read_counter("br", "se", 3, "060"), 2)
+            self.assertEqual(counter_handler.read_counter("br", "se", 12, "070"), 1)
+            self.assertEqual(counter_handler.read_counter("ra", supplier_prefix="060"), 99)
+            self.assertRaises(ValueError, rebuild_counters, self.base_dir, counter_handler, batch_size=0)
+        finally:
+            counter_handler.close()
+
+    def test_rebuild_sqlite_counters(self):
+        self._create_dump("json-ld", False)
+        counter_handler = SqliteCounterHandler(os.path.join(self.temp_dir.name, "counters.db"))
+        try:
+            self.assertRaises(ValueError, rebuild_counters, self.base_dir, counter_handler)
+            rebuild_counters(self.base_dir, counter_handler, base_iri=self.base_iri, max_workers=2)
+            self.assertEqual(counter_handler.read_counter("br", supplier_prefix="060"), 3)
+            self.assertEqual(counter_handler.read_counter("http://test/br/0601"), 2)
+            self.assertEqual(counter_handler.read_counter("http://test/br/0603"), 2)
+        finally:
+            counter_handler.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,12 +6,25 @@
 
 # -*- coding: utf-8 -*-
 
+import importlib.util
 import pickle
+import random
+import shutil
+import socket
+import subprocess
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
+import redis
+
 from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
 
+# The tests against a server use fakeredis, which needs lupa to run Lua scripts, or a local redis-server
+_HAS_FAKEREDIS = importlib.util.find_spec("fakeredis") is not None and importlib.util.find_spec("lupa") is not None
+_REDIS_SERVER = shutil.which("redis-server")
+
 
 class TestRedisCounterHandler(unittest.TestCase):
     def setUp(self):
@@ -79,6 +92,34 @@ class TestRedisCounterHandler(unittest.TestCase):
             self.assertEqual(result, 3)
             self.mock_redis.incr.assert_called_with("br:060:1:se")
 
+    def test_read_counters(self):
+        with self.subTest("Read several counters with a single MGET"):
+            self.mock_redis.mget.return_value = ["3", None, "7"]
+            result = self.counter_handler.read_counters(
+                [("br", "", 1, "060"), ("id", "", 1, "060"), ("br", "se", 2, "060")]
+            )
+            self.assertEqual(result, [3, 0, 7])
+            self.mock_redis.mget.assert_called_once_with(["br:060", "id:060", "br:060:2:se"])
+
+        with self.subTest("Read no counters"):
+            self.mock_redis.mget.reset_mock()
+            self.assertEqual(self.counter_handler.read_counters([]), [])
+            self.mock_redis.mget.assert_not_called()
+
+    def test_set_counters(self):
+        with self.subTest("Set several counters through a pipeline"):
+            pipeline = MagicMock()
+            self.mock_redis.pipeline.return_value = pipeline
+            self.counter_handler.set_counters({("br", "", 1, "060"): 4, ("br", "se", 2, "060"): 1})
+            self.mock_redis.pipeline.assert_called_once_with(transaction=False)
+            pipeline.set.assert_any_call("br:060", 4)
+            pipeline.set.assert_any_call("br:060:2:se", 1)
+            pipeline.execute.assert_called_once()
+
+        with self.subTest("Wrong inputs"):
+            with self.assertRaises(ValueError):
+                self.counter_handler.set_counters({("br", "", 1, "060"): 4, ("id", "", 1, "060"): -1})
+
     def test_set_metadata_counter(self):
         with self.subTest("Set metadata counter"):
             self.counter_handler.set_metadata_counter(5, "di", "http://dataset/")
@@ -129,5 +170,205 @@ class TestRedisCounterHandler(unittest.TestCase):
             self.mock_redis.get.assert_called_with("br:060")
 
 
+class TestRedisCounterHandlerWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.mock_redis = MagicMock()
+        self.pipeline = self.mock_redis.pipeline.return_value
+        self.max_update = self.mock_redis.register_script.return_value
+        with patch("redis.Redis", return_value=self.mock_redis):
+            self.counter_handler = RedisCounterHandler(write_behind=True)
+
+    def test_connection_pool(self):
+        self.assertEqual(self.counter_handler.pool.max_connections, 50)
+        with patch("redis.Redis", return_value=self.mock_redis) as redis_class:
+            counter_handler = RedisCounterHandler(max_connections=4)
+        redis_class.assert_called_once_with(connection_pool=counter_handler.pool)
+        self.assertEqual(counter_handler.pool.max_connections, 4)
+        self.assertRaises(ValueError, RedisCounterHandler, max_connections=0)
+
+    def test_read_counter_is_cached(self):
+        self.mock_redis.mget.return_value = ["7"]
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 7)
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 7)
+        self.mock_redis.mget.assert_called_once_with(["br:060"])
+        self.mock_redis.get.assert_not_called()
+
+    def test_read_counters_only_fetches_missing_keys(self):
+        self.mock_redis.mget.return_value = ["7"]
+        self.counter_handler.read_counter("br", supplier_prefix="060")
+        self.mock_redis.mget.return_value = [None, "3"]
+        result = self.counter_handler.read_counters(
+            [("br", "", 1, "060"), ("ra", "", 1, "060"), ("br", "se", 1, "060"), ("ra", "", 1, "060")]
+        )
+        self.assertEqual(result, [7, 0, 3, 0])
+        self.mock_redis.mget.assert_called_with(["ra:060", "br:060:1:se"])
+
+    def test_set_counter_is_deferred(self):
+        self.mock_redis.mget.return_value = ["7"]
+        self.counter_handler.set_counter(10, "br", supplier_prefix="060")
+        self.counter_handler.set_counter(9, "br", supplier_prefix="060")
+        self.counter_handler.set_counters({("ra", "", 1, "060"): 2})
+        self.counter_handler.set_metadata_counter(4, "di", "http://dataset/")
+        self.mock_redis.set.assert_not_called()
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 10)
+
+        self.counter_handler.flush()
+        self.max_update.assert_called_once_with(
+            keys=["br:060", "ra:060", "metadata:http://dataset/:di"], args=[10, 2, 4], client=self.pipeline
+        )
+        self.pipeline.execute.assert_called_once()
+        self.mock_redis.set.assert_not_called()
+
+        self.counter_handler.flush()
+        self.pipeline.execute.assert_called_once()
+
+    def test_flush_in_chunks(self):
+        self.counter_handler.set_counters({("br", "se", i, "060"): 1 for i in range(1, 2501)})
+        self.counter_handler.flush()
+        self.assertEqual([len(c.kwargs["keys"]) for c in self.max_update.call_args_list], [1000, 1000, 500])
+        self.pipeline.execute.assert_called_once()
+
+    def test_increment_counter(self):
+        with self.subTest("Without pending values, INCR is sent directly"):
+            self.mock_redis.incr.return_value = 8
+            self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="060"), 8)
+            self.mock_redis.incr.assert_called_once_with("br:060")
+            self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 8)
+            self.mock_redis.mget.assert_not_called()
+
+        with self.subTest("A pending value is sent in the same round-trip"):
+            self.counter_handler.set_counter(20, "br", supplier_prefix="060")
+            self.pipeline.execute.return_value = [1, 21]
+            self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="060"), 21)
+            self.max_update.assert_called_once_with(keys=["br:060"], args=[20], client=self.pipeline)
+            self.pipeline.incr.assert_called_once_with("br:060")
+            self.counter_handler.flush()
+            self.max_update.assert_called_once()
+
+    def test_pickle_flushes_pending_values(self):
+        self.counter_handler.set_counter(10, "br", supplier_prefix="060")
+        pickled = pickle.dumps(self.counter_handler)
+        self.max_update.assert_called_once_with(keys=["br:060"], args=[10], client=self.pipeline)
+
+        with patch("redis.Redis", return_value=self.mock_redis):
+            restored = pickle.loads(pickled)
+        self.assertTrue(restored.write_behind)
+        self.assertEqual(restored._pending, {})
+        self.assertEqual(restored._cache, {})
+
+    def test_close(self):
+        self.counter_handler.set_counter(10, "br", supplier_prefix="060")
+        with patch.object(self.counter_handler.pool, "disconnect") as disconnect:
+            self.counter_handler.close()
+        self.max_update.assert_called_once()
+        disconnect.assert_called_once()
+
+
+@unittest.skipUnless(_HAS_FAKEREDIS or _REDIS_SERVER, "neither fakeredis with lupa nor redis-server is installed")
+class TestRedisCounterHandlerServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake_server = None
+        cls.redis_process = None
+        if _HAS_FAKEREDIS:
+            from fakeredis import TcpFakeServer
+
+            cls.fake_server = TcpFakeServer(("127.0.0.1", 0))
+            cls.port = cls.fake_server.server_address[1]
+            threading.Thread(target=cls.fake_server.serve_forever, daemon=True).start()
+        else:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                cls.port = sock.getsockname()[1]
+            cls.redis_process = subprocess.Popen(
+                [str(_REDIS_SERVER), "--port", str(cls.port), "--save", "", "--appendonly", "no"],
+                stdout=subprocess.DEVNULL,
+            )
+        client = redis.Redis(port=cls.port)
+        for _ in range(100):
+            try:
+                client.ping()
+                break
+            except redis.ConnectionError:
+                time.sleep(0.05)
+        client.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.fake_server is not None:
+            cls.fake_server.shutdown()
+            cls.fake_server.server_close()
+        if cls.redis_process is not None:
+            cls.redis_process.terminate()
+            cls.redis_process.wait()
+
+    def setUp(self):
+        self.client = redis.Redis(port=self.port, decode_responses=True)
+        self.client.flushdb()
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_flush_never_lowers_counters(self):
+        counter_handler = RedisCounterHandler(port=self.port, write_behind=True)
+        try:
+            counter_handler.set_counter(100, "br", supplier_prefix="060")
+            counter_handler.flush()
+            counter_handler.set_counter(50, "br", supplier_prefix="060")
+            counter_handler.flush()
+            self.assertEqual(self.client.get("br:060"), "100")
+        finally:
+            counter_handler.close()
+
+    def test_concurrent_flushes(self):
+        n_writers = 4
+        written: list[int] = []
+        incremented: list[int] = []
+        observed: list[int] = []
+        finished = threading.Event()
+
+        def write(seed: int) -> None:
+            counter_handler = RedisCounterHandler(port=self.port, write_behind=True)
+            values = random.Random(seed).sample(range(1, 1000), 50)
+            try:
+                for value in values:
+                    counter_handler.set_counter(value, "br", supplier_prefix="060")
+                    counter_handler.set_counter(value, "br", "se", 1, "060")
+                    counter_handler.flush()
+            finally:
+                counter_handler.close()
+            written.extend(values)
+
+        def increment() -> None:
+            counter_handler = RedisCounterHandler(port=self.port, write_behind=True)
+            try:
+                for _ in range(100):
+                    incremented.append(counter_handler.increment_counter("br", supplier_prefix="060"))
+            finally:
+                counter_handler.close()
+
+        def observe() -> None:
+            while not finished.is_set():
+                observed.append(int(self.client.get("br:060") or 0))
+
+        observer = threading.Thread(target=observe)
+        observer.start()
+        threads = [threading.Thread(target=write, args=(seed,)) for seed in range(n_writers)]
+        threads.append(threading.Thread(target=increment))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finished.set()
+        observer.join()
+
+        self.assertEqual(observed, sorted(observed))
+        self.assertEqual(incremented, sorted(set(incremented)))
+        final_value = int(self.client.get("br:060"))
+        self.assertGreaterEqual(final_value, max(written))
+        self.assertGreaterEqual(final_value, incremented[-1])
+        self.assertEqual(int(self.client.get("br:060:1:se")), max(written))
+
+
 if __name__ == "__main__":
     unittest.main()
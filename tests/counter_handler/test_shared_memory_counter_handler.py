@@ -0,0 +1,235 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import tempfile
+import unittest
+from multiprocessing import Pool
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.shared_memory_counter_handler import SharedMemoryCounterHandler
+from oc_ocdm.graph.graph_set import GraphSet
+
+
+def _increment_many(counter_handler: SharedMemoryCounterHandler, n: int) -> list[int]:
+    try:
+        return [counter_handler.increment_counter("br", supplier_prefix="060") for _ in range(n)]
+    finally:
+        counter_handler.close()
+
+
+def _create_entities(counter_handler: SharedMemoryCounterHandler, n: int) -> list[str]:
+    graph_set = GraphSet("http://test/", supplier_prefix="060", custom_counter_handler=counter_handler)
+    try:
+        return [graph_set.add_br("http://resp_agent.test/").res for _ in range(n)]
+    finally:
+        counter_handler.close()
+
+
+class TestSharedMemoryCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.counter_handler = SharedMemoryCounterHandler(capacity=4096)
+
+    def tearDown(self):
+        self.counter_handler.close()
+
+    def test_set_and_read_counter(self):
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 0)
+        self.counter_handler.set_counter(10, "br", supplier_prefix="060")
+        self.counter_handler.set_counter(3, "br", supplier_prefix="070")
+        self.counter_handler.set_counter(2, "br", "se", 10, "060")
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 10)
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="070"), 3)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 10, "060"), 2)
+        self.assertEqual(self.counter_handler.read_counter("br", "se", 11, "060"), 0)
+
+        self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+        self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "br", "se", 0)
+        self.assertRaises(ValueError, self.counter_handler.read_counter, "br", supplier_prefix="0" * 100)
+
+    def test_increment_counter(self):
+        self.assertEqual(self.counter_handler.increment_counter("br"), 1)
+        self.assertEqual(self.counter_handler.increment_counter("br"), 2)
+        self.assertEqual(self.counter_handler.increment_counter("br", "se", 1), 1)
+
+    def test_metadata_counters(self):
+        dataset_name = "http://dataset/"
+        self.counter_handler.set_metadata_counter(5, "di", dataset_name)
+        self.assertEqual(self.counter_handler.read_metadata_counter("di", dataset_name), 5)
+        self.assertEqual(self.counter_handler.increment_metadata_counter("di", dataset_name), 6)
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "di", None)
+        self.assertEqual(self.counter_handler.increment_metadata_counter("di", "d" * 83), 1)
+        self.assertRaises(ValueError, self.counter_handler.increment_metadata_counter, "di", "d" * 84)
+
+    def test_batch_counters(self):
+        keys = [("br", "", 1, "060"), ("br", "se", 1, "060"), ("id", "", 1, "060")]
+        self.counter_handler.set_counters({keys[0]: 7, keys[1]: 2})
+        self.assertEqual(self.counter_handler.read_counters(keys), [7, 2, 0])
+        self.assertRaises(ValueError, self.counter_handler.set_counters, {keys[2]: -1})
+
+    def test_capacity(self):
+        self.assertRaises(ValueError, SharedMemoryCounterHandler, capacity=0)
+        small_handler = SharedMemoryCounterHandler(capacity=10)
+        try:
+            for i in range(1, 10):
+                small_handler.set_counter(1, "br", "se", i)
+            self.assertRaises(ValueError, small_handler.set_counter, 1, "br", "se", 10)
+            self.assertEqual(small_handler.read_counter("br", "se", 10), 0)
+        finally:
+            small_handler.close()
+
+    def test_pickled_copy_shares_counters(self):
+        copy = pickle.loads(pickle.dumps(self.counter_handler))
+        try:
+            self.assertEqual(copy.increment_counter("br"), 1)
+            self.assertEqual(self.counter_handler.increment_counter("br"), 2)
+            self.assertEqual(copy.read_counter("br"), 2)
+        finally:
+            copy.close()
+        self.assertEqual(self.counter_handler.increment_counter("br"), 3)
+
+    def test_concurrent_increments(self):
+        with Pool(4) as pool:
+            results = pool.starmap(_increment_many, [(self.counter_handler, 50)] * 4)
+        all_values = [value for values in results for value in values]
+        self.assertEqual(sorted(all_values), list(range(1, 201)))
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 200)
+
+    def test_concurrent_graph_sets(self):
+        with Pool(4) as pool:
+            results = pool.starmap(_create_entities, [(self.counter_handler, 25)] * 4)
+        all_iris = [iri for iris in results for iri in iris]
+        self.assertEqual(len(set(all_iris)), 100)
+
+
+class TestSharedMemoryCounterHandlerPersistence(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.info_dir = os.path.join(self.temp_dir.name, "info_dir") + os.sep
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_persist_and_load(self):
+        counter_handler = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        counter_handler.set_counter(42, "br")
+        counter_handler.set_counter(2, "br", "se", 1)
+        counter_handler.set_counter(6, "br", "se", 4)
+        counter_handler.set_metadata_counter(3, "di", "dataset")
+        counter_handler.close()
+
+        filesystem_handler = FilesystemCounterHandler(self.info_dir)
+        self.assertEqual(filesystem_handler.read_counter("br"), 42)
+        self.assertEqual(filesystem_handler.read_counter("br", "se", 1), 2)
+        self.assertEqual(filesystem_handler.read_counter("br", "se", 4), 6)
+        with open(os.path.join(self.info_dir, "datasets", "dataset", "metadata_di.txt")) as f:
+            self.assertEqual(f.read(), "3\n")
+
+        reloaded = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        try:
+            self.assertEqual(reloaded.read_counter("br"), 42)
+            self.assertEqual(reloaded.read_counter("br", "se", 4), 6)
+            self.assertEqual(reloaded.increment_counter("br", "se", 1), 3)
+        finally:
+            reloaded.close()
+
+    def test_persist_and_load_metadata(self):
+        counter_handler = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        self.assertEqual(counter_handler.increment_counter("br"), 1)
+        self.assertEqual(counter_handler.increment_counter("br", "se", 1), 1)
+        self.assertEqual(counter_handler.increment_metadata_counter("di", "http://ds/"), 1)
+        self.assertEqual(counter_handler.increment_metadata_counter("di", "http://ds/"), 2)
+        self.assertEqual(counter_handler.increment_metadata_counter("di", "dataset"), 1)
+        self.assertEqual(counter_handler.increment_metadata_counter("di", "other"), 1)
+        counter_handler.persist()
+        counter_handler.close()
+
+        reloaded = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        try:
+            self.assertEqual(reloaded.read_metadata_counter("di", "http://ds/"), 2)
+            self.assertEqual(reloaded.increment_metadata_counter("di", "http://ds/"), 3)
+            self.assertEqual(reloaded.increment_metadata_counter("di", "dataset"), 2)
+            self.assertEqual(reloaded.read_metadata_counter("di", "missing"), 0)
+            self.assertEqual(reloaded.increment_counter("br"), 2)
+            self.assertEqual(reloaded.increment_counter("br", "se", 1), 2)
+            # Copies in other processes load the counters on their own
+            copy = pickle.loads(pickle.dumps(reloaded))
+            try:
+                self.assertEqual(copy.increment_metadata_counter("di", "other"), 2)
+            finally:
+                copy.close()
+            self.assertEqual(reloaded.read_metadata_counter("di", "other"), 2)
+        finally:
+            reloaded.close()
+        self.assertEqual(
+            FilesystemCounterHandler(self.info_dir, lease_size=1).read_metadata_counter("di", "dataset"), 2
+        )
+
+    def test_persist_and_load_supplier_prefixes(self):
+        counter_handler = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        for _ in range(5):
+            counter_handler.increment_counter("br", supplier_prefix="060")
+        for _ in range(2):
+            counter_handler.increment_counter("br", supplier_prefix="061")
+        counter_handler.set_counter(3, "br", "se", 2, supplier_prefix="061")
+        counter_handler.close()
+
+        self.assertEqual(FilesystemCounterHandler(os.path.join(self.info_dir, "060")).read_counter("br"), 5)
+        self.assertEqual(FilesystemCounterHandler(os.path.join(self.info_dir, "061")).read_counter("br"), 2)
+
+        reloaded = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        try:
+            self.assertEqual(reloaded.read_counter("br", supplier_prefix="060"), 5)
+            self.assertEqual(reloaded.read_counter("br", supplier_prefix="061"), 2)
+            self.assertEqual(reloaded.read_counter("br", "se", 2, supplier_prefix="061"), 3)
+            self.assertEqual(reloaded.read_counter("br"), 0)
+        finally:
+            reloaded.close()
+
+    def test_persist_and_load_prefix_folders(self):
+        info_dir = os.path.join(self.temp_dir.name, "060", "info_dir") + os.sep
+        counter_handler = SharedMemoryCounterHandler(capacity=4096, info_dir=info_dir, supplier_prefix="060")
+        counter_handler.set_counter(5, "br", supplier_prefix="060")
+        counter_handler.set_counter(2, "br", supplier_prefix="061")
+        counter_handler.close()
+
+        filesystem_handler = FilesystemCounterHandler(info_dir, "060")
+        self.assertEqual(filesystem_handler.read_counter("br", supplier_prefix="060"), 5)
+        self.assertEqual(filesystem_handler.read_counter("br", supplier_prefix="061"), 2)
+
+        reloaded = SharedMemoryCounterHandler(capacity=4096, info_dir=info_dir, supplier_prefix="060")
+        try:
+            self.assertEqual(reloaded.read_counter("br", supplier_prefix="060"), 5)
+            self.assertEqual(reloaded.read_counter("br", supplier_prefix="061"), 2)
+        finally:
+            reloaded.close()
+
+    def test_persist_to_another_folder(self):
+        counter_handler = SharedMemoryCounterHandler(capacity=4096)
+        try:
+            counter_handler.set_counter(7, "ra")
+            self.assertRaises(ValueError, counter_handler.persist)
+            counter_handler.persist(self.info_dir)
+        finally:
+            counter_handler.close()
+        self.assertEqual(FilesystemCounterHandler(self.info_dir).read_counter("ra"), 7)
+
+    def test_copy_does_not_persist(self):
+        counter_handler = SharedMemoryCounterHandler(capacity=4096, info_dir=self.info_dir)
+        try:
+            copy = pickle.loads(pickle.dumps(counter_handler))
+            copy.set_counter(5, "br")
+            copy.close()
+            self.assertFalse(os.path.exists(self.info_dir))
+        finally:
+            counter_handler.close()
+        self.assertEqual(FilesystemCounterHandler(self.info_dir).read_counter("br"), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+from multiprocessing import Pool
+
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from oc_ocdm.graph.graph_set import GraphSet
+
+
+def _increment_many(database: str, n: int) -> list[int]:
+    counter_handler = SqliteCounterHandler(database)
+    try:
+        return [counter_handler.increment_counter("br", supplier_prefix="060") for _ in range(n)]
+    finally:
+        counter_handler.close()
+
+
+class TestSqliteCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.temp_dir.name, "counters.db")
+        self.counter_handler = SqliteCounterHandler(self.database)
+
+    def tearDown(self):
+        self.counter_handler.close()
+        self.temp_dir.cleanup()
+
+    def _stored_rows(self) -> dict[str, int]:
+        con = sqlite3.connect(self.database)
+        try:
+            return dict(con.execute("SELECT entity, count FROM info").fetchall())
+        finally:
+            con.close()
+
+    def test_wal_mode(self):
+        journal_mode = self.counter_handler.con.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+
+    def test_set_and_read_counter(self):
+        with self.subTest("Graph counters are kept apart by supplier prefix"):
+            self.counter_handler.set_counter(10, "br", supplier_prefix="060")
+            self.counter_handler.set_counter(3, "br", supplier_prefix="070")
+            self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 10)
+            self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="070"), 3)
+            self.assertEqual(self.counter_handler.read_counter("br"), 0)
+        with self.subTest("Provenance counters are kept apart by identifier"):
+            self.counter_handler.set_counter(2, "br", "se", 1, "060")
+            self.counter_handler.set_counter(5, "br", "se", 2, "060")
+            self.assertEqual(self.counter_handler.read_counter("br", "se", 1, "060"), 2)
+            self.assertEqual(self.counter_handler.read_counter("br", "se", 2, "060"), 5)
+            self.assertEqual(self.counter_handler.read_counter("br", "se", 3, "060"), 0)
+        with self.subTest("Keys follow the RedisCounterHandler layout"):
+            self.assertEqual(self._stored_rows(), {"br:060": 10, "br:070": 3, "br:060:1:se": 2, "br:060:2:se": 5})
+        with self.subTest("Values containing quotes are bound, not interpolated"):
+            self.counter_handler.set_counter(1, "http://test/br/1'--")
+            self.assertEqual(self.counter_handler.read_counter("http://test/br/1'--"), 1)
+        with self.subTest("Wrong inputs"):
+            self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+            self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "br", "se", 0)
+            self.assertRaises(ValueError, self.counter_handler.read_counter, "br", "se", -1)
+
+    def test_increment_counter(self):
+        self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="060"), 1)
+        self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="060"), 2)
+        self.assertEqual(self.counter_handler.increment_counter("br", "se", 1, "060"), 1)
+        self.counter_handler.set_counter(41, "ra", supplier_prefix="060")
+        self.assertEqual(self.counter_handler.increment_counter("ra", supplier_prefix="060"), 42)
+        self.assertEqual(self._stored_rows(), {"br:060": 2, "br:060:1:se": 1, "ra:060": 42})
+
+    def test_metadata_counters(self):
+        dataset_name = "http://dataset/"
+        self.assertEqual(self.counter_handler.read_metadata_counter("di", dataset_name), 0)
+        self.counter_handler.set_metadata_counter(5, "di", dataset_name)
+        self.assertEqual(self.counter_handler.read_metadata_counter("di", dataset_name), 5)
+        self.assertEqual(self.counter_handler.increment_metadata_counter("di", dataset_name), 6)
+        self.assertEqual(self._stored_rows(), {"metadata:http://dataset/:di": 6})
+        self.assertRaises(ValueError, self.counter_handler.set_metadata_counter, -1, "di", dataset_name)
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "di", None)
+        self.assertRaises(ValueError, self.counter_handler.increment_metadata_counter, "di", None)
+
+    def test_batch_counters(self):
+        keys = [("br", "", 1, "060"), ("br", "se", 1, "060"), ("id", "", 1, "060")]
+        self.counter_handler.set_counters({keys[0]: 7, keys[1]: 2})
+        self.assertEqual(self.counter_handler.read_counters(keys), [7, 2, 0])
+        self.assertRaises(ValueError, self.counter_handler.set_counters, {keys[2]: -1})
+
+        many_keys = [("br", "se", i, "060") for i in range(1, 1201)]
+        self.counter_handler.set_counters({key: key[2] for key in many_keys})
+        self.assertEqual(self.counter_handler.read_counters(many_keys), list(range(1, 1201)))
+
+    def test_commit_every(self):
+        self.counter_handler.close()
+        self.counter_handler = SqliteCounterHandler(self.database, commit_every=3)
+        self.assertRaises(ValueError, SqliteCounterHandler, self.database, commit_every=0)
+
+        self.counter_handler.increment_counter("br")
+        self.counter_handler.increment_counter("br")
+        self.assertEqual(self._stored_rows(), {})
+        self.counter_handler.increment_counter("br")
+        self.assertEqual(self._stored_rows(), {"br": 3})
+
+        self.counter_handler.increment_counter("br")
+        self.assertEqual(self._stored_rows(), {"br": 3})
+        self.counter_handler.flush()
+        self.assertEqual(self._stored_rows(), {"br": 4})
+
+    def test_concurrent_increments(self):
+        with Pool(4) as pool:
+            results = pool.starmap(_increment_many, [(self.database, 50)] * 4)
+        all_values = [value for values in results for value in values]
+        self.assertEqual(sorted(all_values), list(range(1, 201)))
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 200)
+
+    def test_graph_set(self):
+        graph_set = GraphSet("http://test/", supplier_prefix="060", custom_counter_handler=self.counter_handler)
+        br = graph_set.add_br("http://resp_agent.test/")
+        self.assertEqual(br.res, "http://test/br/0601")
+        graph_set.add_br("http://resp_agent.test/", res="http://test/br/06010")
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 10)
+
+    def test_legacy_database(self):
+        self.counter_handler.close()
+        legacy_database = os.path.join(self.temp_dir.name, "legacy.db")
+        con = sqlite3.connect(legacy_database)
+        con.execute("CREATE TABLE IF NOT EXISTS info(entity TEXT PRIMARY KEY, count INTEGER)")
+        con.executemany("INSERT INTO info (entity, count) VALUES (?, ?)", [("br", 12), ("http://test/br/0601", 3)])
+        con.commit()
+        con.close()
+
+        self.counter_handler = SqliteCounterHandler(legacy_database)
+        self.assertEqual(self.counter_handler.read_counter("br", supplier_prefix="060"), 12)
+        self.assertEqual(self.counter_handler.read_counter("http://test/br/0601"), 3)
+        self.assertEqual(
+            self.counter_handler.read_counters([("br", "", 1, "060"), ("ra", "", 1, "060"), ("br", "", 1, "")]),
+            [12, 0, 12],
+        )
+        graph_set = GraphSet("http://test/", supplier_prefix="060", custom_counter_handler=self.counter_handler)
+        self.assertEqual(graph_set.add_br("http://resp_agent.test/").res, "http://test/br/06013")
+        self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="070"), 13)
+        self.assertEqual(self.counter_handler.increment_counter("br", supplier_prefix="060"), 14)
+        self.assertEqual(self.counter_handler.read_counters([("br", "", 1, "060")]), [14])
+        self.assertEqual(self.counter_handler.read_counter("br"), 12)
+
+    def test_pickle_serialization(self):
+        self.counter_handler.close()
+        self.counter_handler = SqliteCounterHandler(self.database, commit_every=100)
+        self.counter_handler.set_counter(12, "br", supplier_prefix="060")
+
+        restored = pickle.loads(pickle.dumps(self.counter_handler))
+        try:
+            self.assertEqual(restored.database, self.database)
+            self.assertEqual(restored.commit_every, 100)
+            self.assertEqual(restored.read_counter("br", supplier_prefix="060"), 12)
+        finally:
+            restored.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
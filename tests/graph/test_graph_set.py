@@ -7,9 +7,11 @@
 # -*- coding: utf-8 -*-
 import pickle
 import unittest
+from unittest.mock import patch
 
 from triplelite import RDFTerm, TripleLite
 
+from oc_ocdm.constants import RDF_TYPE
 from oc_ocdm.graph.entities.bibliographic.agent_role import AgentRole
 from oc_ocdm.graph.entities.bibliographic.bibliographic_reference import BibliographicReference
 from oc_ocdm.graph.entities.bibliographic.bibliographic_resource import BibliographicResource
@@ -21,6 +23,7 @@ from oc_ocdm.graph.entities.bibliographic.reference_pointer import ReferencePoin
 from oc_ocdm.graph.entities.bibliographic.resource_embodiment import ResourceEmbodiment
 from oc_ocdm.graph.entities.bibliographic.responsible_agent import ResponsibleAgent
 from oc_ocdm.graph.entities.identifier import Identifier
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.graph.graph_set import GraphSet
 
 
@@ -300,6 +303,57 @@ class TestGraphSet(unittest.TestCase):
         restored_ar = restored.get_entity(ar.res)
         self.assertIsNotNone(restored_ar)
 
+    def test_remove_orphans_from_triplestore(self):
+        graph_set = GraphSet("http://test/", "", "060", False)
+        br_1 = graph_set.add_br(self.resp_agent, res="http://test/br/0601")
+        br_2 = graph_set.add_br(self.resp_agent, res="http://test/br/0602")
+        br_1.mark_as_to_be_deleted()
+        br_2.mark_as_to_be_deleted()
+        part_of = "http://purl.org/vocab/frbr/core#partOf"
+        cites = "http://purl.org/spar/cito/cites"
+        br_3_rows = [("http://test/br/0603", RDF_TYPE, GraphEntity.iri_expression)]
+        br_3_rows.append(("http://test/br/0603", GraphEntity.iri_title, None))
+        br_4_rows = [("http://test/br/0604", RDF_TYPE, GraphEntity.iri_expression)]
+        # The rows describing the referrers of each deleted entity, with None standing for a "Title" literal
+        referrers = {
+            br_1.res: [
+                *br_3_rows,
+                ("http://test/br/0603", part_of, br_1.res),
+                *br_4_rows,
+                ("http://test/br/0604", part_of, br_1.res),
+            ],
+            br_2.res: [*br_3_rows, ("http://test/br/0603", cites, br_2.res)],
+        }
+
+        def sparql_query(ts_url, query):
+            bindings = []
+            for res, rows in referrers.items():
+                if f"<{res}>" not in query:
+                    continue
+                for s, p, o in rows:
+                    obj = {"type": "literal", "value": "Title"} if o is None else {"type": "uri", "value": o}
+                    bindings.append({"s": {"type": "uri", "value": s}, "p": {"type": "uri", "value": p}, "o": obj})
+            return bindings
+
+        with patch("oc_ocdm.graph.graph_set.sparql_query_iter", side_effect=sparql_query) as query:
+            graph_set.remove_orphans_from_triplestore("http://unused.test/sparql", self.resp_agent, batch_size=1)
+        self.assertEqual(query.call_count, 2)
+        self.assertTrue(all("VALUES ?deleted" in c.args[1] for c in query.call_args_list))
+
+        br_3 = graph_set.get_entity("http://test/br/0603")
+        br_4 = graph_set.get_entity("http://test/br/0604")
+        assert br_3 is not None and br_4 is not None
+        self.assertEqual(
+            br_3.g.removed_triples,
+            {
+                ("http://test/br/0603", part_of, RDFTerm("uri", br_1.res)),
+                ("http://test/br/0603", cites, RDFTerm("uri", br_2.res)),
+            },
+        )
+        self.assertEqual(br_3.get_title(), "Title")
+        self.assertEqual(br_4.g.removed_triples, {("http://test/br/0604", part_of, RDFTerm("uri", br_1.res))})
+        self.assertRaises(ValueError, graph_set.remove_orphans_from_triplestore, "", self.resp_agent, batch_size=0)
+
     def test_preexisting_graph_materialized_as_frozenset(self):
         # A pre-existing entity must store its baseline as a plain frozenset of its own
         # triples, never a live SubgraphView that references (and would pickle) the whole
@@ -9,16 +9,20 @@
 import os
 import pickle
 import unittest
+from unittest.mock import patch
 
 from rdflib import URIRef
 
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
 from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.entities.snapshot_entity import SnapshotEntity
 from oc_ocdm.prov.prov_set import ProvSet
 from oc_ocdm.reader import Reader
 from oc_ocdm.storer import Storer
+from oc_ocdm.support.metrics import InMemoryMetricsSink
+from oc_ocdm.support.query_utils import get_update_query
 
 
 class TestProvSet(unittest.TestCase):
@@ -243,6 +247,64 @@ class TestProvSet(unittest.TestCase):
         prov_subject = URIRef("https://w3id.org/oc/corpus/br/abc")
         self.assertRaises(ValueError, self.prov_set._retrieve_last_snapshot, prov_subject)
 
+    def test_generate_provenance_prefetches_counters(self):
+        graph_set = GraphSet("http://test/", "", "", False)
+        counter_handler = InMemoryCounterHandler()
+        prov_set = ProvSet(graph_set, "http://test/", "", False, custom_counter_handler=counter_handler)
+        a = graph_set.add_br(self.resp_agent)
+        b = graph_set.add_br(self.resp_agent)
+        prov_set.generate_provenance(self.cur_time)
+        graph_set.commit_changes()
+
+        a.has_title("Modified")
+        a.merge(b)
+        with (
+            patch.object(counter_handler, "read_counters", wraps=counter_handler.read_counters) as read_counters,
+            patch.object(counter_handler, "read_counter", wraps=counter_handler.read_counter) as read_counter,
+        ):
+            prov_set.generate_provenance(self.cur_time)
+
+        read_counters.assert_called_once_with([("br", "se", 1, ""), ("br", "se", 2, "")])
+        # The only single reads are those performed by the default read_counters implementation
+        self.assertEqual(read_counter.call_count, 2)
+        self.assertEqual(prov_set._snapshot_counters, {})
+        se_a_2 = prov_set.get_entity(a.res + "/prov/se/2")
+        assert isinstance(se_a_2, SnapshotEntity)
+        self.assertSetEqual({a.res + "/prov/se/1", b.res + "/prov/se/1"}, {se.res for se in se_a_2.get_derives_from()})
+
+    def test_generate_provenance_metrics(self):
+        graph_set = GraphSet("http://test/", "", "", False)
+        metrics = InMemoryMetricsSink()
+        prov_set = ProvSet(graph_set, "http://test/", "", False, metrics=metrics)
+        self.assertIs(prov_set.counter_handler.metrics, metrics)
+        graph_set.add_br(self.resp_agent)
+        graph_set.add_br(self.resp_agent)
+        prov_set.generate_provenance(self.cur_time)
+        graph_set.commit_changes()
+        prov_set.generate_provenance(self.cur_time)
+
+        self.assertEqual(metrics.get_timing("prov.generate_provenance")[0], 2)
+        self.assertEqual(metrics.get_timing("prov.prefetch_snapshot_counters")[0], 2)
+        self.assertEqual(metrics.get_counter("prov.entities"), 4)
+        self.assertEqual(metrics.get_counter("prov.modified_entities"), 2)
+
+    def test_generate_provenance_skips_unchanged_entities(self):
+        graph_set = GraphSet("http://test/", "", "", False)
+        prov_set = ProvSet(graph_set, "http://test/", "", False, custom_counter_handler=InMemoryCounterHandler())
+        a = graph_set.add_br(self.resp_agent)
+        b = graph_set.add_br(self.resp_agent)
+        prov_set.generate_provenance(self.cur_time)
+        graph_set.commit_changes()
+
+        a.has_title("Modified")
+        with patch("oc_ocdm.prov.prov_set.get_update_query", wraps=get_update_query) as update_query:
+            result = prov_set.generate_provenance(self.cur_time)
+
+        update_query.assert_called_once_with(a, entity_type="graph")
+        self.assertEqual(result, {a.res})
+        self.assertIsNotNone(prov_set.get_entity(a.res + "/prov/se/2"))
+        self.assertIsNone(prov_set.get_entity(b.res + "/prov/se/2"))
+
     def test_restore_deleted_entity(self):
         # Create and delete an entity first
         a = self.graph_set.add_br(self.resp_agent)
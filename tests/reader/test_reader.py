@@ -8,14 +8,22 @@
 
 import json
 import os
+import re
 import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import patch
 
 from rdflib import RDF, XSD, Dataset, Graph, Literal, Namespace, URIRef
 
+from oc_ocdm.constants import RDF_TYPE
 from oc_ocdm.graph import GraphSet
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.reader import Reader
+from oc_ocdm.support.metrics import InMemoryMetricsSink
 from oc_ocdm.support.reporter import Reporter
+from oc_ocdm.support.sparql import AsyncSPARQLClient, SPARQLEndpointError
 
 
 class TestReader(unittest.TestCase):
@@ -268,6 +276,23 @@ class TestReaderNoTriplestore(unittest.TestCase):
         finally:
             os.unlink(temp_file)
 
+    def test_load_metrics(self):
+        metrics = InMemoryMetricsSink()
+        reader = Reader(metrics=metrics)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "data.json")
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump([{"@id": "http://example.org/g/", "@graph": [{"@id": "http://example.org/s"}]}], f)
+            reader.load(file_path)
+            reader.load_jsonld_dict(file_path)
+            reader.load(os.path.join(temp_dir, "missing.json"))
+            file_size = os.path.getsize(file_path)
+
+        self.assertEqual(metrics.get_counter("reader.files_read"), 2)
+        self.assertEqual(metrics.get_counter("reader.bytes_read"), 2 * file_size)
+        self.assertEqual(metrics.get_timing("reader.load")[0], 1)
+        self.assertEqual(metrics.get_timing("reader.load_jsonld_dict")[0], 1)
+
     def test_graph_validation_returns_valid_triples(self):
         g = Graph()
         br_uri = URIRef("https://w3id.org/oc/meta/br/1")
@@ -277,6 +302,105 @@ class TestReaderNoTriplestore(unittest.TestCase):
         self.assertIsInstance(valid_graph, Graph)
         self.assertEqual(len(valid_graph), 1)
 
+    def _fake_sparql_query(self, ts_url, query, **kwargs):
+        triples = {
+            "https://w3id.org/oc/meta/br/0601": [
+                (RDF_TYPE, GraphEntity.iri_expression),
+                (GraphEntity.iri_has_identifier, "https://w3id.org/oc/meta/id/0601"),
+            ],
+            "https://w3id.org/oc/meta/br/0602": [(RDF_TYPE, GraphEntity.iri_expression)],
+            "https://w3id.org/oc/meta/id/0601": [(RDF_TYPE, GraphEntity.iri_identifier)],
+        }
+        requested = re.findall(r"<([^>]+)>", re.search(r"VALUES \?s \{([^}]*)\}", query).group(1))
+        subjects = [res for res in requested if res in triples]
+        if "?entity ?link ?s" in query:
+            subjects.extend(o for res in list(subjects) for p, o in triples[res] if p != RDF_TYPE and o in triples)
+        bindings = [
+            {"s": {"type": "uri", "value": res}, "p": {"type": "uri", "value": p}, "o": {"type": "uri", "value": o}}
+            for res in subjects
+            for p, o in triples[res]
+        ]
+        return bindings
+
+    def test_import_entities_from_triplestore_in_concurrent_batches(self):
+        g_set = GraphSet("https://w3id.org/oc/meta/")
+        entities = ["https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/br/0602"]
+        with patch("oc_ocdm.reader.sparql_query_iter", side_effect=self._fake_sparql_query) as query:
+            imported = Reader.import_entities_from_triplestore(
+                g_set, "http://unused.test/sparql", entities, "http://resp_agent.test/", batch_size=1, max_workers=2
+            )
+        self.assertEqual(query.call_count, 2)
+        self.assertTrue(all("VALUES ?s" in c.args[1] and "UNION" not in c.args[1] for c in query.call_args_list))
+        self.assertEqual([entity.res for entity in imported], entities)
+        self.assertEqual(set(g_set.res_to_entity), set(entities))
+
+        with patch("oc_ocdm.reader.sparql_query_iter", side_effect=self._fake_sparql_query):
+            with self.assertRaises(ValueError):
+                Reader.import_entities_from_triplestore(
+                    g_set, "http://unused.test/sparql", ["https://w3id.org/oc/meta/br/0603"], "http://resp_agent.test/"
+                )
+        self.assertRaises(ValueError, Reader.import_entities_from_triplestore, g_set, "", entities, "", max_workers=0)
+
+    def test_import_entities_from_triplestore_with_neighbours(self):
+        g_set = GraphSet("https://w3id.org/oc/meta/")
+        with patch("oc_ocdm.reader.sparql_query_iter", side_effect=self._fake_sparql_query) as query:
+            imported = Reader.import_entities_from_triplestore(
+                g_set,
+                "http://unused.test/sparql",
+                ["https://w3id.org/oc/meta/br/0601"],
+                "http://resp_agent.test/",
+                include_neighbours=True,
+            )
+        query.assert_called_once()
+        self.assertEqual(
+            {entity.res for entity in imported},
+            {"https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/id/0601"},
+        )
+
+
+class TestImportEntitiesFromTriplestoreAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_import_entities_from_triplestore_async(self):
+        g_set = GraphSet("https://w3id.org/oc/meta/")
+        entities = ["https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/br/0602"]
+        fake_query = TestReaderNoTriplestore._fake_sparql_query
+        with AsyncSPARQLClient(max_concurrency=2) as client:
+            with patch("oc_ocdm.support.sparql.sparql_query_iter", side_effect=lambda *a, **k: fake_query(None, *a)):
+                imported = await Reader.import_entities_from_triplestore_async(
+                    g_set, "http://unused.test/sparql", entities, "http://resp_agent.test/", batch_size=1, client=client
+                )
+                self.assertEqual([entity.res for entity in imported], entities)
+
+                with self.assertRaises(ValueError):
+                    await Reader.import_entities_from_triplestore_async(
+                        g_set, "http://unused.test/sparql", ["https://w3id.org/oc/meta/br/0603"], "", client=client
+                    )
+
+    async def test_import_entities_from_triplestore_async_failure(self):
+        g_set = GraphSet("https://w3id.org/oc/meta/")
+        entities = ["https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/br/0602"]
+        started = threading.Event()
+        release = threading.Event()
+
+        def query(ts_url, query, **kwargs):
+            if "br/0602" in query:
+                started.set()
+                release.wait(5)
+                return iter([])
+            started.wait(5)
+            raise SPARQLEndpointError("Client error: 400", status_code=400)
+
+        with patch("oc_ocdm.support.sparql.sparql_query_iter", side_effect=query):
+            start = time.monotonic()
+            try:
+                with self.assertRaises(SPARQLEndpointError):
+                    await Reader.import_entities_from_triplestore_async(
+                        g_set, "http://unused.test/sparql", entities, "http://resp_agent.test/", batch_size=1
+                    )
+                # The request still running is not waited for
+                self.assertLess(time.monotonic() - start, 1)
+            finally:
+                release.set()
+
 
 if __name__ == "__main__":
     unittest.main()
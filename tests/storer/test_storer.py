@@ -5,27 +5,38 @@
 # SPDX-License-Identifier: ISC
 
 # -*- coding: utf-8 -*-
+import asyncio
 import hashlib
 import json
+import logging
 import os
 import re
 import tempfile
+import threading
+import time
 import unittest
 from multiprocessing import Pool
 from shutil import rmtree
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from urllib.error import URLError
 from zipfile import ZipFile
 
+from filelock import FileLock
 from rdflib import Dataset, Graph, URIRef, compare
+from SPARQLWrapper import SPARQLWrapper
 from triplelite import SubgraphView
 
 from oc_ocdm.graph.entities.bibliographic.bibliographic_resource import BibliographicResource
 from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.entities.snapshot_entity import SnapshotEntity
 from oc_ocdm.prov.prov_set import ProvSet
 from oc_ocdm.reader import Reader, _expand_jsonld
-from oc_ocdm.storer import Storer, _compact_jsonld, _entity_to_jsonld_dict
+from oc_ocdm.storer import Storer, _compact_jsonld, _entity_to_jsonld_dict, _fsync_path, _Journal
+from oc_ocdm.support.manifest import Manifest
+from oc_ocdm.support.metrics import InMemoryMetricsSink
+from oc_ocdm.support.query_utils import _compute_graph_changes, get_update_patch, get_update_query
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.sparql import SPARQLEndpointError, sparql_query, sparql_update
+from oc_ocdm.support.sparql import AsyncSPARQLClient, SPARQLEndpointError, sparql_query, sparql_update
 
 
 def dataset_to_graph(dataset: Dataset) -> Graph:
@@ -1086,6 +1097,273 @@ class TestFastPath(unittest.TestCase):
                     ],
                 )
 
+    def test_fast_path_reports_files(self):
+        base_dir = os.path.join(self.data_dir, "report") + os.sep
+        for _ in range(3):
+            self.graph_set.add_br(self.resp_agent)
+
+        repok = Reporter(print_sentences=False)
+        Storer(self.graph_set, repok=repok, dir_split=10000, n_file_item=2).store_all(base_dir, self.base_iri)
+        # Files are summarized instead of being reported one by one
+        self.assertEqual(list(repok.articles[-1]), ["Starting the process", "Files added: 2."])
+
+        repok = Reporter(print_sentences=False, level=logging.DEBUG)
+        debug_dir = os.path.join(self.data_dir, "report_debug") + os.sep
+        Storer(self.graph_set, repok=repok, dir_split=10000, n_file_item=2).store_all(debug_dir, self.base_iri)
+        self.assertEqual(len(repok.articles[-1]), 4)
+        self.assertTrue(repok.articles[-1][1].startswith("File '"))
+
+        # Storing the same entities again leaves the files untouched
+        repok = Reporter(print_sentences=False, level=logging.DEBUG)
+        Storer(self.graph_set, repok=repok, dir_split=10000, n_file_item=2).store_all(base_dir, self.base_iri)
+        self.assertEqual(list(repok.articles[-1]), ["Starting the process", "Files added: 0. Files unchanged: 2."])
+
+    def test_fast_path_unchanged_files(self):
+        context_url = "http://example.org/context"
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"@context": {"fabio": "http://purl.org/spar/fabio/"}}, f)
+            context_file = f.name
+        base_dir = os.path.join(self.data_dir, "unchanged") + os.sep
+
+        def store(abstract_set):
+            metrics = InMemoryMetricsSink()
+            Storer(
+                abstract_set,
+                context_map={context_url: context_file},
+                dir_split=10000,
+                n_file_item=1000,
+                zip_output=True,
+                metrics=metrics,
+            ).store_all(base_dir, self.base_iri, context_path=context_url)
+            return metrics.get_counter("storer.files_written"), metrics.get_counter("storer.files_unchanged")
+
+        try:
+            br = self.graph_set.add_br(self.resp_agent)
+            br.has_title("Title")
+            br.create_journal_article()
+            self.prov_set.generate_provenance()
+            self.assertEqual(store(self.graph_set), (1, 0))
+            self.assertEqual(store(self.prov_set), (1, 0))
+            br_file = os.path.join(base_dir, "br", "060", "10000", "1000.zip")
+            prov_file = os.path.join(base_dir, "br", "060", "10000", "1000", "prov", "se.zip")
+            os.utime(br_file, ns=(0, 0))
+            os.utime(prov_file, ns=(0, 0))
+
+            # Neither the entity nor its snapshot add anything to the existing files
+            self.assertEqual(store(self.graph_set), (0, 1))
+            self.assertEqual(store(self.prov_set), (0, 1))
+            br._preexisting_triples = frozenset(br.g.triples((None, None, None)))
+            self.assertEqual(store(self.graph_set), (0, 1))
+            self.assertEqual(os.stat(br_file).st_mtime_ns, 0)
+            self.assertEqual(os.stat(prov_file).st_mtime_ns, 0)
+
+            br.remove_title()
+            br.has_title("Updated")
+            self.assertEqual(store(self.graph_set), (1, 0))
+            self.assertNotEqual(os.stat(br_file).st_mtime_ns, 0)
+            self.assertEqual(
+                Reader(context_map={}).load_jsonld_dict(br_file)[0]["@graph"][0]["http://purl.org/dc/terms/title"],
+                [{"@type": "http://www.w3.org/2001/XMLSchema#string", "@value": "Updated"}],
+            )
+        finally:
+            os.unlink(context_file)
+
+    def test_fast_path_context_change(self):
+        context_url = "http://example.org/context"
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"@context": {"fabio": "http://purl.org/spar/fabio/"}}, f)
+            context_file = f.name
+        base_dir = os.path.join(self.data_dir, "context_change") + os.sep
+        br_file = os.path.join(base_dir, "br", "060", "10000", "1000.json")
+        self.graph_set.add_br(self.resp_agent).create_journal_article()
+
+        def store(context_path, manifest=None):
+            metrics = InMemoryMetricsSink()
+            Storer(
+                self.graph_set,
+                context_map={context_url: context_file},
+                dir_split=10000,
+                n_file_item=1000,
+                manifest=manifest,
+                metrics=metrics,
+            ).store_all(base_dir, self.base_iri, context_path=context_path)
+            with open(br_file, "rb") as f:
+                stored = json.load(f)
+            return metrics.get_counter("storer.files_written"), "@context" in stored
+
+        try:
+            self.assertEqual(store(None), (1, False))
+            self.assertEqual(store(None), (0, False))
+            # The same entities are written again when the file has to be compacted
+            self.assertEqual(store(context_url), (1, True))
+            self.assertEqual(store(context_url), (0, True))
+            self.assertEqual(store(None), (1, False))
+
+            manifest = Manifest(os.path.join(self.data_dir, "context_change.db"))
+            try:
+                self.assertEqual(store(None, manifest), (1, False))
+                self.assertEqual(store(None, manifest), (0, False))
+                self.assertEqual(store(context_url, manifest), (1, True))
+                self.assertEqual(store(context_url, manifest), (0, True))
+            finally:
+                manifest.close()
+        finally:
+            os.unlink(context_file)
+
+    def test_fast_path_manifest(self):
+        base_dir = os.path.join(self.data_dir, "manifest") + os.sep
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        # Files stored before the manifest existed
+        Storer(self.graph_set, dir_split=10000, n_file_item=2, zip_output=True).store_all(base_dir, self.base_iri)
+
+        manifest = Manifest(os.path.join(self.data_dir, "manifest.db"))
+        try:
+            storer = Storer(self.graph_set, dir_split=10000, n_file_item=2, zip_output=True, manifest=manifest)
+            storer.store_all(base_dir, self.base_iri)
+            first_batch = manifest.latest_batch()
+            self.assertEqual(manifest.changed_since(), ["br/060/10000/2.zip", "br/060/10000/4.zip"])
+            entry = manifest.get_file("br/060/10000/2.zip")
+            assert entry is not None
+            with ZipFile(os.path.join(base_dir, "br", "060", "10000", "2.zip")) as archive:
+                self.assertEqual(entry.content_hash, hashlib.sha256(archive.read("2.json")).hexdigest())
+            self.assertEqual(entry.size, os.path.getsize(os.path.join(base_dir, "br", "060", "10000", "2.zip")))
+            self.assertEqual(entry.entity_count, 2)
+            self.assertEqual(entry.ranges, [("http://test/br/060", 1, 2)])
+            self.assertEqual(entry.batch_id, first_batch)
+            self.assertEqual(manifest.find_files(brs[2].res), ["br/060/10000/4.zip"])
+
+            # Unchanged files do not start a new batch
+            storer.store_all(base_dir, self.base_iri)
+            self.assertEqual(manifest.latest_batch(), first_batch)
+
+            brs[2].has_title("Title")
+            storer.store_all(base_dir, self.base_iri)
+            self.assertEqual(manifest.changed_since(first_batch), ["br/060/10000/4.zip"])
+        finally:
+            manifest.close()
+
+        with self.assertRaises(ValueError):
+            Storer(self.graph_set, output_format="nt11", manifest=manifest)
+
+    def test_fast_path_atomic_writes(self):
+        base_dir = os.path.join(self.data_dir, "atomic") + os.sep
+        for _ in range(5):
+            self.graph_set.add_br(self.resp_agent)
+        storer = Storer(self.graph_set, dir_split=10000, zip_output=True, atomic_writes=True, fsync_batch_size=2)
+        br_dir = os.path.join(base_dir, "br", "060", "10000")
+        synced: list[str] = []
+
+        def fsync_path(path: str) -> None:
+            # Temporary files are synced before replacing the output files
+            if path.endswith(".tmp"):
+                self.assertFalse(os.path.exists(path.rsplit(".", 2)[0]))
+                synced.append(path.rsplit(".", 2)[0])
+            else:
+                synced.append(path)
+            _fsync_path(path)
+
+        with patch("oc_ocdm.storer._fsync_path", side_effect=fsync_path):
+            paths = storer.store_all(base_dir, self.base_iri)
+        self.assertEqual(
+            sorted(path for path in synced if path.endswith(".zip")),
+            [os.path.join(br_dir, f"{i}.zip") for i in range(1, 6)],
+        )
+        # The directory is synced once for every batch of files, and the journal directory once
+        self.assertEqual(synced.count(br_dir), 3)
+        self.assertEqual(synced.count(os.path.join(base_dir, ".journal")), 1)
+        self.assertEqual(os.listdir(os.path.join(base_dir, ".journal")), [])
+        reader = Reader()
+        for path in paths:
+            self.assertEqual(len(reader.load_jsonld_dict(path.replace(".json", ".zip"))[0]["@graph"]), 1)
+
+        # Without batches, every file is synced before replacing the previous one
+        self.graph_set.add_br(self.resp_agent)
+        synced.clear()
+        storer = Storer(self.graph_set, dir_split=10000, zip_output=True, atomic_writes=True)
+        with patch("oc_ocdm.storer._fsync_path", side_effect=fsync_path):
+            storer.store_all(base_dir, self.base_iri)
+        self.assertEqual(synced, [os.path.join(br_dir, "6.zip")])
+
+        with self.assertRaises(ValueError):
+            Storer(self.graph_set, fsync_batch_size=2)
+        with self.assertRaises(ValueError):
+            Storer(self.graph_set, atomic_writes=True, fsync_batch_size=-1)
+        with self.assertRaises(ValueError):
+            Storer(self.graph_set, output_format="nt11", atomic_writes=True)
+
+    def test_journal_does_not_wait_with_pending_files(self):
+        base_dir = os.path.join(self.data_dir, "journal") + os.sep
+        os.makedirs(base_dir)
+        first_path, second_path = os.path.join(base_dir, "1.json"), os.path.join(base_dir, "2.json")
+        journal = _Journal(base_dir, [first_path, second_path], fsync_batch_size=10)
+        try:
+            first_lock = FileLock(first_path + ".lock")
+            self.assertFalse(journal.try_acquire(first_lock))
+            with first_lock:
+                with open(journal.temp_path(first_path), "w") as f:
+                    f.write("[]")
+                journal.file_written(first_path, first_lock)
+            self.assertFalse(os.path.exists(first_path))
+
+            # The lock of the second file is held by someone else: the first file is renamed before waiting
+            second_lock = FileLock(second_path + ".lock")
+            with FileLock(second_path + ".lock", thread_local=False):
+                self.assertFalse(journal.try_acquire(second_lock))
+            self.assertTrue(os.path.exists(first_path))
+            self.assertTrue(first_lock.acquire(timeout=0))
+            first_lock.release()
+        finally:
+            journal.close()
+
+    def test_fast_path_recover(self):
+        base_dir = os.path.join(self.data_dir, "recover") + os.sep
+        for _ in range(3):
+            self.graph_set.add_br(self.resp_agent)
+        os.makedirs(self.data_dir)
+        manifest = Manifest(os.path.join(self.data_dir, "manifest.db"))
+        reperr = Reporter(print_sentences=False)
+        storer = Storer(
+            self.graph_set, reperr=reperr, dir_split=10000, zip_output=True, manifest=manifest, atomic_writes=True
+        )
+        try:
+            storer.store_all(base_dir, self.base_iri)
+            br_dir = os.path.join(base_dir, "br", "060", "10000")
+            # A process crashed while writing the first file, after replacing the second one
+            with open(os.path.join(br_dir, "1.zip"), "wb") as f:
+                f.write(b"PK\x03\x04truncated")
+            with open(os.path.join(br_dir, "1.zip.1-crashed.tmp"), "wb") as f:
+                f.write(b"PK")
+            journal_dir = os.path.join(base_dir, ".journal")
+            with open(os.path.join(journal_dir, "1-crashed.journal"), "w") as f:
+                for name in ("2.zip", "1.zip", "3.zip"):
+                    f.write(f"F {os.path.join('br', '060', '10000', name)}\n")
+                f.write("S 1\n")
+            # The journal of a process which is still running
+            with open(os.path.join(journal_dir, "2-running.journal"), "w") as f:
+                f.write(f"F {os.path.join('br', '060', '10000', '3.zip')}\n")
+            running_lock = FileLock(os.path.join(journal_dir, "2-running.journal.lock"))
+            with running_lock:
+                first_batch = manifest.latest_batch()
+                self.assertEqual(storer.recover(base_dir), [os.path.join(br_dir, "1.zip")])
+                self.assertEqual(sorted(os.listdir(journal_dir)), ["2-running.journal", "2-running.journal.lock"])
+            self.assertEqual(
+                sorted(name for name in os.listdir(br_dir) if not name.endswith(".lock")),
+                ["1.zip.corrupted", "2.zip", "3.zip"],
+            )
+            self.assertIn("1.zip", reperr.get_last_sentence())
+            self.assertIsNone(manifest.get_file("br/060/10000/1.zip"))
+            # The files written before the crash are recorded in the manifest
+            self.assertEqual(manifest.changed_since(first_batch), ["br/060/10000/2.zip", "br/060/10000/3.zip"])
+
+            # The entity of the corrupted file is stored again
+            storer.store_all(base_dir, self.base_iri)
+            self.assertEqual(os.listdir(journal_dir), [])
+            self.assertEqual(
+                Reader().load_jsonld_dict(os.path.join(br_dir, "1.zip"))[0]["@graph"][0]["@id"], "http://test/br/0601"
+            )
+        finally:
+            manifest.close()
+
     def test_compact_jsonld(self):
         data = [
             {
@@ -1243,5 +1521,197 @@ def process_entity(entity):
     storer.upload_all(ts, base_dir)
 
 
+class TestUploadAllChangeTracking(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_iri = "http://test/"
+        self.resp_agent = "http://resp_agent.test/"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_upload_all_skips_unchanged_entities(self):
+        graph_set = GraphSet(self.base_iri, "", "060", False)
+        br1 = graph_set.add_br(self.resp_agent)
+        br1.has_title("First")
+        br2 = graph_set.add_br(self.resp_agent)
+        br2.has_title("Second")
+        graph_set.commit_changes()
+
+        br2.has_title("Second, modified")
+        storer = Storer(graph_set)
+        with patch("oc_ocdm.storer.get_update_query", wraps=get_update_query) as update_query:
+            self.assertTrue(storer.upload_all("http://unused.test/sparql", self.temp_dir.name, save_queries=True))
+        update_query.assert_called_once_with(br2, entity_type="graph")
+
+        to_be_uploaded_dir = os.path.join(self.temp_dir.name, "to_be_uploaded")
+        query_files = os.listdir(to_be_uploaded_dir)
+        self.assertEqual(len(query_files), 1)
+        with open(os.path.join(to_be_uploaded_dir, query_files[0]), "r", encoding="utf-8") as f:
+            query_content = f.read()
+        self.assertIn(br2.res, query_content)
+        self.assertNotIn(br1.res, query_content)
+
+    def test_upload_all_reuses_provenance_queries(self):
+        graph_set = GraphSet(self.base_iri, "", "060", False)
+        prov_set = ProvSet(graph_set, self.base_iri, "", False)
+        br = graph_set.add_br(self.resp_agent)
+        br.has_title("Original")
+        prov_set.generate_provenance()
+        graph_set.commit_changes()
+
+        br.has_title("Modified")
+        with patch("oc_ocdm.support.query_utils._compute_graph_changes", wraps=_compute_graph_changes) as changes:
+            modified_entities = prov_set.generate_provenance()
+            storer = Storer(graph_set, modified_entities=modified_entities)
+            self.assertTrue(storer.upload_all("http://unused.test/sparql", self.temp_dir.name, save_queries=True))
+        changes.assert_called_once_with(br, "graph")
+
+        se = prov_set.get_entity(br.res + "/prov/se/2")
+        assert isinstance(se, SnapshotEntity)
+        to_be_uploaded_dir = os.path.join(self.temp_dir.name, "to_be_uploaded")
+        with open(os.path.join(to_be_uploaded_dir, os.listdir(to_be_uploaded_dir)[0]), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), se.get_update_action())
+
+    def test_upload_all_saves_rdf_patches(self):
+        self.assertRaises(ValueError, Storer, GraphSet(self.base_iri), update_format="turtle")
+        graph_set = GraphSet(self.base_iri, "", "060", False)
+        prov_set = ProvSet(graph_set, self.base_iri, "", False)
+        br = graph_set.add_br(self.resp_agent)
+        br.has_title("Original")
+        prov_set.generate_provenance()
+        graph_set.commit_changes()
+
+        br.has_title("Modified")
+        modified_entities = prov_set.generate_provenance()
+        storer = Storer(graph_set, modified_entities=modified_entities, update_format="rdf-patch")
+        self.assertTrue(storer.upload_all("http://unused.test/sparql", self.temp_dir.name, save_queries=True))
+
+        se = prov_set.get_entity(br.res + "/prov/se/2")
+        assert isinstance(se, SnapshotEntity)
+        to_be_uploaded_dir = os.path.join(self.temp_dir.name, "to_be_uploaded")
+        patch_files = os.listdir(to_be_uploaded_dir)
+        self.assertEqual(len(patch_files), 1)
+        self.assertTrue(patch_files[0].endswith("_add1_remove1.rdfp"))
+        with open(os.path.join(to_be_uploaded_dir, patch_files[0]), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), get_update_patch(br)[0])
+        # Snapshots keep recording SPARQL updates
+        self.assertEqual(se.get_update_action(), " ; ".join(get_update_query(br)[0]))
+
+        # Patches are converted to the same SPARQL queries right before being uploaded
+        with patch.object(storer, "_query", return_value=True) as query:
+            self.assertTrue(storer.upload_all("http://unused.test/sparql"))
+        query.assert_called_once_with(" ; ".join(get_update_query(br)[0]), "http://unused.test/sparql", None, 1, 1)
+
+
+class TestStorerMetrics(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_iri = "http://test/"
+        self.resp_agent = "http://resp_agent.test/"
+        self.graph_set = GraphSet(self.base_iri, "", "060", False)
+        for i in range(3):
+            self.graph_set.add_br(self.resp_agent).has_title(f"Title {i}")
+        self.metrics = InMemoryMetricsSink()
+        self.storer = Storer(
+            self.graph_set,
+            repok=Reporter(print_sentences=False),
+            reperr=Reporter(print_sentences=False),
+            dir_split=10000,
+            n_file_item=2,
+            zip_output=True,
+            metrics=self.metrics,
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_store_all(self):
+        base_dir = self.temp_dir.name + os.sep
+        self.storer.store_all(base_dir, self.base_iri)
+        self.assertEqual(self.metrics.get_counter("storer.entities"), 3)
+        self.assertEqual(self.metrics.get_counter("storer.files_written"), 2)
+        self.assertEqual(self.metrics.get_counter("storer.files_read"), 0)
+        self.assertGreater(self.metrics.get_counter("storer.bytes_written"), 0)
+        self.assertGreater(self.metrics.get_counter("storer.bytes_deflated"), 0)
+
+        self.storer.store_all(base_dir, self.base_iri)
+        self.assertEqual(self.metrics.get_counter("storer.files_read"), 2)
+        self.assertEqual(self.metrics.get_timing("storer.store_all")[0], 2)
+        for stage in ("storer.lock_wait", "storer.serialize"):
+            self.assertEqual(self.metrics.get_timing(stage)[0], 4)
+        self.assertEqual(self.metrics.get_timing("storer.read")[0], 2)
+        # The files already hold the same entities, so they are not written again
+        self.assertEqual(self.metrics.get_timing("storer.write")[0], 2)
+        self.assertEqual(self.metrics.get_counter("storer.files_written"), 2)
+        self.assertEqual(self.metrics.get_counter("storer.files_unchanged"), 2)
+
+    def test_upload_all(self):
+        attempts = [URLError("refused"), MagicMock(), MagicMock(), MagicMock()]
+        with (
+            patch.object(SPARQLWrapper, "query", side_effect=attempts),
+            patch("oc_ocdm.support.sparql.time.sleep") as sleep,
+        ):
+            self.assertTrue(self.storer.upload_all("http://unused.test/sparql", batch_size=1))
+        sleep.assert_called_once()
+
+        self.assertEqual(self.metrics.get_counter("sparql.requests"), 4)
+        self.assertEqual(self.metrics.get_counter("sparql.retries"), 1)
+        self.assertEqual(self.metrics.get_counter("storer.batches_uploaded"), 3)
+        self.assertEqual(self.metrics.get_counter("storer.upload_errors"), 0)
+        self.assertEqual(self.metrics.get_timing("storer.upload")[0], 3)
+        self.assertEqual(self.metrics.get_timing("storer.upload_all")[0], 1)
+
+
+class TestUploadAllAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_upload_all_async(self):
+        base_iri = "http://test/"
+        graph_set = GraphSet(base_iri, "", "060", False)
+        for i in range(5):
+            graph_set.add_br("http://resp_agent.test/").has_title(f"Title {i}")
+        storer = Storer(graph_set, repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False))
+        expected = [update for update, _, _ in storer._iter_update_batches(2)]
+        self.assertEqual(len(expected), 3)
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            with patch("oc_ocdm.support.sparql.sparql_update") as update:
+                with AsyncSPARQLClient(max_concurrency=2) as client:
+                    self.assertTrue(
+                        await storer.upload_all_async(
+                            "http://unused.test/sparql", base_dir, batch_size=2, client=client
+                        )
+                    )
+            self.assertEqual(sorted(c.args[1] for c in update.call_args_list), sorted(expected))
+
+            with patch("oc_ocdm.support.sparql.sparql_update", side_effect=SPARQLEndpointError("x", 400)):
+                self.assertFalse(await storer.upload_all_async("http://unused.test/sparql", base_dir, batch_size=2))
+            self.assertEqual(len(os.listdir(os.path.join(base_dir, "tp_err"))), 3)
+
+    async def test_upload_all_async_cancelled(self):
+        graph_set = GraphSet("http://test/", "", "060", False)
+        for i in range(5):
+            graph_set.add_br("http://resp_agent.test/").has_title(f"Title {i}")
+        storer = Storer(graph_set, repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False))
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_update(*args, **kwargs):
+            started.set()
+            release.wait(5)
+
+        with patch("oc_ocdm.support.sparql.sparql_update", side_effect=blocking_update):
+            task = asyncio.ensure_future(storer.upload_all_async("http://unused.test/sparql", batch_size=2))
+            try:
+                await asyncio.to_thread(started.wait, 5)
+                task.cancel()
+                start = time.monotonic()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                # The requests still running are not waited for
+                self.assertLess(time.monotonic() - start, 1)
+            finally:
+                release.set()
+
+
 if __name__ == "__main__":
     unittest.main()
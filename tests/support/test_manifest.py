@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import pickle
+import tempfile
+import unittest
+
+from oc_ocdm.support.manifest import Manifest, ManifestEntry
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest = Manifest(os.path.join(self.temp_dir.name, "manifest.db"))
+
+    def tearDown(self):
+        self.manifest.close()
+        self.temp_dir.cleanup()
+
+    def test_build(self):
+        entry = ManifestEntry.build(
+            "br/060/10000/1000.zip",
+            b"[]",
+            120,
+            [
+                "https://w3id.org/oc/meta/br/06020",
+                "https://w3id.org/oc/meta/br/0603",
+                "https://w3id.org/oc/meta/br/0605",
+                "https://w3id.org/oc/meta/",
+            ],
+        )
+        self.assertEqual(entry.content_hash, hashlib.sha256(b"[]").hexdigest())
+        self.assertEqual(entry.size, 120)
+        self.assertEqual(entry.entity_count, 4)
+        # Dataset IRIs are counted but not indexed
+        self.assertEqual(entry.ranges, [("https://w3id.org/oc/meta/br/060", 3, 20)])
+        self.assertIsNone(entry.batch_id)
+
+        entry = ManifestEntry.build(
+            "br/060/10000/1000/prov/se.zip",
+            b"[]",
+            120,
+            ["https://w3id.org/oc/meta/br/0601/prov/se/2", "https://w3id.org/oc/meta/br/0607/prov/se/1"],
+        )
+        self.assertEqual(entry.ranges, [("https://w3id.org/oc/meta/br/060/prov/se", 1, 7)])
+
+    def test_record(self):
+        self.assertEqual(self.manifest.latest_batch(), 0)
+        br_entry = ManifestEntry.build("br/060/1000.json", b"br", 2, ["https://w3id.org/oc/meta/br/0601"])
+        ra_entry = ManifestEntry.build("ra/060/1000.json", b"ra", 2, ["https://w3id.org/oc/meta/ra/0601"])
+        first_batch = self.manifest.record([br_entry, ra_entry])
+        self.assertEqual(self.manifest.latest_batch(), first_batch)
+        self.assertEqual(br_entry.batch_id, first_batch)
+        self.assertEqual(self.manifest.get_file("br/060/1000.json"), br_entry)
+        self.assertIsNone(self.manifest.get_file("id/060/1000.json"))
+
+        updated_entry = ManifestEntry.build(
+            "br/060/1000.json", b"br2", 3, ["https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/br/0602"]
+        )
+        second_batch = self.manifest.record([updated_entry])
+        self.assertGreater(second_batch, first_batch)
+        self.assertEqual(self.manifest.get_file("br/060/1000.json"), updated_entry)
+        self.assertEqual(self.manifest.changed_since(), ["br/060/1000.json", "ra/060/1000.json"])
+        self.assertEqual(self.manifest.changed_since(first_batch), ["br/060/1000.json"])
+        self.assertEqual(self.manifest.changed_since(second_batch), [])
+
+        self.manifest.remove(["br/060/1000.json"])
+        self.assertIsNone(self.manifest.get_file("br/060/1000.json"))
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/br/0601"), [])
+        self.assertEqual(self.manifest.changed_since(), ["ra/060/1000.json"])
+
+    def test_record_is_atomic(self):
+        valid_entry = ManifestEntry.build("br/060/1000.json", b"br", 2, [])
+        invalid_entry = ManifestEntry("ra/060/1000.json", None, 2, 0)  # type: ignore[arg-type]
+        with self.assertRaises(Exception):
+            self.manifest.record([valid_entry, invalid_entry])
+        self.assertIsNone(self.manifest.get_file("br/060/1000.json"))
+        self.assertEqual(self.manifest.latest_batch(), 0)
+
+    def test_find_files(self):
+        self.manifest.record(
+            [
+                ManifestEntry.build(
+                    "br/060/10000/1000.json",
+                    b"",
+                    0,
+                    ["https://w3id.org/oc/meta/br/0601", "https://w3id.org/oc/meta/br/0601000"],
+                ),
+                ManifestEntry.build("br/060/10000/2000.json", b"", 0, ["https://w3id.org/oc/meta/br/0601001"]),
+                ManifestEntry.build("br/070/10000/1000.json", b"", 0, ["https://w3id.org/oc/meta/br/0705"]),
+                ManifestEntry.build(
+                    "br/060/10000/1000/prov/se.json", b"", 0, ["https://w3id.org/oc/meta/br/0605/prov/se/1"]
+                ),
+            ]
+        )
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/br/060500"), ["br/060/10000/1000.json"])
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/br/0601001"), ["br/060/10000/2000.json"])
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/br/0705"), ["br/070/10000/1000.json"])
+        self.assertEqual(
+            self.manifest.find_files("https://w3id.org/oc/meta/br/0605/prov/se/3"), ["br/060/10000/1000/prov/se.json"]
+        )
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/ra/0601"), [])
+        self.assertEqual(self.manifest.find_files("https://w3id.org/oc/meta/"), [])
+
+    def test_pickle(self):
+        self.manifest.record([ManifestEntry.build("br/060/1000.json", b"br", 2, [])])
+        copy = pickle.loads(pickle.dumps(self.manifest))
+        self.assertIsNotNone(copy.get_file("br/060/1000.json"))
+        copy.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import pickle
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from urllib.error import URLError
+
+from SPARQLWrapper import SPARQLWrapper
+
+from oc_ocdm.support.metrics import NULL_METRICS, InMemoryMetricsSink
+from oc_ocdm.support.sparql import AsyncSPARQLClient, SPARQLEndpointError, sparql_update
+
+
+class TestMetricsSink(unittest.TestCase):
+    def test_null_sink(self):
+        lock = threading.Lock()
+        self.assertFalse(NULL_METRICS.enabled)
+        # Nothing is measured: the span is shared and the lock is returned as it is
+        self.assertIs(NULL_METRICS.span("a"), NULL_METRICS.span("b"))
+        self.assertIs(NULL_METRICS.locked(lock, "lock_wait"), lock)
+        with NULL_METRICS.span("a"):
+            NULL_METRICS.increment("files")
+            NULL_METRICS.timing("write", 1.0)
+
+    def test_in_memory_sink(self):
+        metrics = InMemoryMetricsSink()
+        metrics.increment("files")
+        metrics.increment("files", 2)
+        metrics.timing("write", 0.5)
+        metrics.timing("write", 1.5)
+        metrics.timing("read", 0.1)
+        with metrics.span("read"):
+            pass
+        self.assertEqual(metrics.get_counter("files"), 3)
+        self.assertEqual(metrics.get_counter("missing"), 0)
+        self.assertEqual(metrics.get_timing("write"), (2, 2.0, 1.5))
+        self.assertEqual(metrics.get_timing("read")[0], 2)
+        self.assertEqual(metrics.get_timing("missing"), (0, 0.0, 0.0))
+        # The slowest stage comes first
+        self.assertEqual(metrics.summary().splitlines()[0], "write: 2.000000s total, 2 times, 1.500000s max")
+        self.assertEqual(metrics.summary().splitlines()[-1], "files: 3")
+
+        metrics.reset()
+        self.assertEqual(metrics.summary(), "")
+
+    def test_locked(self):
+        metrics = InMemoryMetricsSink()
+        lock = threading.Lock()
+        with metrics.locked(lock, "lock_wait"):
+            self.assertTrue(lock.locked())
+        self.assertFalse(lock.locked())
+        with self.assertRaises(RuntimeError):
+            with metrics.locked(lock, "lock_wait"):
+                raise RuntimeError
+        self.assertFalse(lock.locked())
+        self.assertEqual(metrics.get_timing("lock_wait")[0], 2)
+
+    def test_pickle(self):
+        metrics = InMemoryMetricsSink()
+        metrics.increment("files")
+        copy = pickle.loads(pickle.dumps(metrics))
+        self.assertEqual(copy.get_counter("files"), 0)
+        copy.increment("files")
+        self.assertEqual(copy.get_counter("files"), 1)
+
+
+class TestSPARQLMetrics(unittest.IsolatedAsyncioTestCase):
+    def test_sparql_update_retries(self):
+        metrics = InMemoryMetricsSink()
+        attempts = [URLError("refused"), URLError("refused"), MagicMock()]
+        with patch.object(SPARQLWrapper, "query", side_effect=attempts):
+            sparql_update("http://unused.test/sparql", "INSERT DATA {}", backoff_factor=0, metrics=metrics)
+        self.assertEqual(metrics.get_counter("sparql.requests"), 3)
+        self.assertEqual(metrics.get_counter("sparql.retries"), 2)
+
+    async def test_async_client_retries(self):
+        metrics = InMemoryMetricsSink()
+        errors = [SPARQLEndpointError("Server error: 503", status_code=503), b""]
+        with AsyncSPARQLClient(max_retries=2, backoff_factor=0, metrics=metrics) as client:
+            with patch("oc_ocdm.support.sparql._execute_with_retry", side_effect=errors):
+                await client.update("http://unused.test/sparql", "INSERT DATA {}")
+        self.assertEqual(metrics.get_counter("sparql.requests"), 2)
+        self.assertEqual(metrics.get_counter("sparql.retries"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,14 +6,24 @@
 
 # -*- coding: utf-8 -*-
 import unittest
+from unittest.mock import patch
 
 from rdflib import Literal, URIRef
 from rdflib.namespace import DCTERMS
+from triplelite import RDFTerm
 
 from oc_ocdm.constants import RDF_TYPE
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
-from oc_ocdm.support.query_utils import _compute_graph_changes, get_delete_query, get_insert_query, get_update_query
+from oc_ocdm.support.query_utils import (
+    MAX_TRIPLES_PER_QUERY,
+    _compute_graph_changes,
+    _term_to_nt,
+    get_delete_query,
+    get_insert_query,
+    get_update_query,
+)
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 
 class TestQueryUtils(unittest.TestCase):
@@ -256,6 +266,98 @@ class TestQueryUtils(unittest.TestCase):
         self.assertEqual(added, 1)
         self.assertEqual(removed, 0)
 
+    def test_compute_graph_changes_uses_change_log(self):
+        """Test _compute_graph_changes relies on the change log of the entity graph."""
+        br = self.graph_set.add_br(self.base_iri + "br/1")
+        br.has_title("Original")
+        br.commit_changes()
+        self.assertFalse(br.is_dirty)
+
+        br.has_title("Modified")
+        self.assertTrue(br.is_dirty)
+        with patch.object(TrackedGraph, "__iter__", side_effect=AssertionError("full graph scan")):
+            to_insert, to_delete, added, removed = _compute_graph_changes(br, "graph")
+
+        self.assertEqual({o.value for _, _, o in to_insert}, {"Modified"})
+        self.assertEqual({o.value for _, _, o in to_delete}, {"Original"})
+        self.assertEqual((added, removed), (1, 1))
+
+        br.has_title("Original")
+        self.assertFalse(br.is_dirty)
+        self.assertEqual(_compute_graph_changes(br, "graph"), (set(), set(), 0, 0))
+
+    def test_compute_graph_changes_replaced_preexisting_triples(self):
+        """Test _compute_graph_changes falls back to a full diff when the baseline is replaced."""
+        br = self.graph_set.add_br(self.base_iri + "br/1")
+        br.has_title("Test")
+        br.commit_changes()
+        br._preexisting_triples = frozenset()
+
+        self.assertTrue(br.is_dirty)
+        to_insert, to_delete, added, removed = _compute_graph_changes(br, "graph")
+        self.assertEqual(to_insert, set(br.g))
+        self.assertEqual((added, removed), (2, 0))
+
+    def test_get_update_query_is_memoized(self):
+        """Test get_update_query serializes the changes of an entity once until it changes."""
+        br = self.graph_set.add_br(self.base_iri + "br/1")
+        br.has_title("Original")
+        br.commit_changes()
+        br.has_title("Modified")
+
+        with patch(
+            "oc_ocdm.support.query_utils._compute_graph_changes", wraps=_compute_graph_changes
+        ) as compute_changes:
+            first = get_update_query(br)
+            first[0].append("mutating the result must not affect the cache")
+            second = get_update_query(br)
+            self.assertEqual(compute_changes.call_count, 1)
+            self.assertEqual(len(second[0]), 2)
+            self.assertEqual(first[1:], second[1:])
+
+            br.has_subtitle("Subtitle")
+            third = get_update_query(br)
+            self.assertEqual(compute_changes.call_count, 2)
+            self.assertEqual(third[1:], (2, 1))
+
+            br.mark_as_to_be_deleted()
+            deleted = get_update_query(br)
+            self.assertEqual(compute_changes.call_count, 3)
+            self.assertEqual(deleted[1:], (0, 2))
+
+            br.commit_changes()
+            self.assertEqual(get_update_query(br), ([], 0, 0))
+            self.assertEqual(compute_changes.call_count, 4)
+
+    def test_term_to_nt_escapes(self):
+        """Test literals are escaped according to the full N-Triples escape set."""
+        xsd_string = "http://www.w3.org/2001/XMLSchema#string"
+        literal = RDFTerm("literal", 'a "b" \\ c\nd\re\tf\bg\fh\x00i\x1fj\x7fk', xsd_string)
+        self.assertEqual(
+            _term_to_nt(literal),
+            f'"a \\"b\\" \\\\ c\\nd\\re\\tf\\bg\\fh\\u0000i\\u001Fj\\u007Fk"^^<{xsd_string}>',
+        )
+        self.assertEqual(_term_to_nt(RDFTerm("literal", "città", lang="it")), '"città"@it')
+        self.assertEqual(_term_to_nt(RDFTerm("uri", "https://test.org/br/1")), "<https://test.org/br/1>")
+        self.assertEqual(_term_to_nt(Literal("Test")), '"Test"')
+        self.assertEqual(_term_to_nt(URIRef("https://test.org/br/1")), "<https://test.org/br/1>")
+
+    def test_get_insert_query_chunks(self):
+        """Test every triple appears exactly once when the query is split in chunks."""
+        graph_iri = "https://test.org/br/"
+        triples = {
+            (f"https://test.org/br/{i}", "http://purl.org/dc/terms/title", RDFTerm("literal", f'Title "{i}"'))
+            for i in range(MAX_TRIPLES_PER_QUERY * 2 + 1)
+        }
+
+        queries, count = get_insert_query(graph_iri, triples)
+
+        self.assertEqual(count, len(triples))
+        self.assertEqual(len(queries), 3)
+        statements = "".join(queries)
+        for s, p, o in triples:
+            self.assertEqual(statements.count(f"<{s}> <{p}> {_term_to_nt(o)} ."), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from triplelite import RDFTerm, TripleLite
+
+from oc_ocdm.constants import XSD_STRING
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.support.query_utils import MAX_TRIPLES_PER_QUERY, get_update_patch, get_update_query
+from oc_ocdm.support.rdf_patch import apply_patch, is_rdf_patch, iter_patch_rows, parse_patch, patch_to_sparql
+
+GRAPH = "https://test.org/br/"
+RES = "https://test.org/br/0601"
+TITLE = "http://purl.org/dc/terms/title"
+
+
+class TestRdfPatch(unittest.TestCase):
+    def setUp(self):
+        self.graph_set = GraphSet("https://test.org/", "", "060", False)
+
+    def test_get_update_patch(self):
+        br = self.graph_set.add_br("http://resp_agent.test/", res=RES)
+        br.has_title("Original")
+        br.commit_changes()
+        self.assertEqual(get_update_patch(br), ("", 0, 0))
+
+        br.has_title('A "quoted"\ttitle\n\x0b')
+        update_patch, n_added, n_removed = get_update_patch(br)
+        self.assertEqual((n_added, n_removed), (1, 1))
+        self.assertEqual(
+            update_patch.split("\n"),
+            [
+                f'D <{RES}> <{TITLE}> "Original"^^<{XSD_STRING}> <{GRAPH}> .',
+                f'A <{RES}> <{TITLE}> "A \\"quoted\\"\\ttitle\\n\\u000B"^^<{XSD_STRING}> <{GRAPH}> .',
+                "",
+            ],
+        )
+        self.assertTrue(is_rdf_patch(update_patch))
+        self.assertFalse(is_rdf_patch(get_update_query(br)[0][0]))
+        self.assertEqual(patch_to_sparql(update_patch), get_update_query(br)[0])
+
+        # Replaying the patch on the previous state of the entity gives its current state
+        graphs = {GRAPH: TripleLite(identifier=GRAPH)}
+        graphs[GRAPH].add_many(br.preexisting_triples)
+        apply_patch(update_patch, graphs)
+        self.assertEqual(set(graphs[GRAPH]), set(br.g))
+
+    def test_parse_patch(self):
+        update_patch = "\n".join(
+            [
+                "H id <uuid:0686c69d-8f89-4496-acb5-744f0157a8db> .",
+                "TX .",
+                "# A comment",
+                f'A <{RES}> <{TITLE}> "Titolo"@it .',
+                f'A <{RES}> <{TITLE}> "Plain \\u00E8 \\U0001F600" <{GRAPH}> .',
+                f"D <{RES}> <http://purl.org/spar/pro/isHeldBy> <https://test.org/ra/0601> <{GRAPH}> .",
+                "TC .",
+            ]
+        )
+        self.assertTrue(is_rdf_patch(update_patch))
+        self.assertEqual(
+            list(parse_patch(update_patch)),
+            [
+                ("A", (RES, TITLE, RDFTerm("literal", "Titolo", "", "it")), None),
+                ("A", (RES, TITLE, RDFTerm("literal", "Plain è \U0001f600", XSD_STRING)), GRAPH),
+                ("D", (RES, "http://purl.org/spar/pro/isHeldBy", RDFTerm("uri", "https://test.org/ra/0601")), GRAPH),
+            ],
+        )
+        self.assertEqual(
+            patch_to_sparql(update_patch),
+            [
+                f'INSERT DATA {{ <{RES}> <{TITLE}> "Titolo"@it . }}',
+                f'INSERT DATA {{ GRAPH <{GRAPH}> {{ <{RES}> <{TITLE}> "Plain \\u00E8 \\U0001F600" . }} }}',
+                f"DELETE DATA {{ GRAPH <{GRAPH}> {{ <{RES}> <http://purl.org/spar/pro/isHeldBy> "
+                f"<https://test.org/ra/0601> . }} }}",
+            ],
+        )
+
+    def test_patch_to_sparql_chunks(self):
+        rows = [f'A <{RES}> <{TITLE}> "Title {i}" <{GRAPH}> .' for i in range(MAX_TRIPLES_PER_QUERY + 1)]
+        queries = patch_to_sparql("\n".join(rows))
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(queries[0].count(TITLE), MAX_TRIPLES_PER_QUERY)
+        self.assertEqual(queries[1].count(TITLE), 1)
+        self.assertEqual(patch_to_sparql(""), [])
+
+    def test_invalid_rows(self):
+        for row in (
+            f"A <{RES}> <{TITLE}> .",
+            f"X <{RES}> <{TITLE}> <{RES}> .",
+            f'A <{RES}> <{TITLE}> "unterminated <{GRAPH}> .',
+            "PA dc <http://purl.org/dc/terms/> .",
+        ):
+            with self.subTest(row=row):
+                self.assertFalse(is_rdf_patch(row))
+                self.assertRaises(ValueError, list, iter_patch_rows(row))
+        self.assertRaises(ValueError, list, parse_patch(f'A <{RES}> <{TITLE}> "\\z" .'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import io
+import logging
+import pickle
+import unittest
+from contextlib import redirect_stdout
+
+from oc_ocdm.support.reporter import Reporter
+
+
+class TestReporter(unittest.TestCase):
+    def test_default_behaviour(self):
+        reporter = Reporter(prefix="[Test] ")
+        reporter.new_article()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            reporter.add_sentence("first")
+            reporter.add_sentence("hidden", print_this_sentence=False)
+            reporter.new_article()
+            reporter.add_sentence("second")
+        self.assertEqual(output.getvalue(), "[Test] first\n[Test] second\n")
+        self.assertEqual(reporter.get_articles_as_string(), "[Test] first\n[Test] hidden\n\n[Test] second\n\n")
+        self.assertEqual(reporter.get_last_sentence(), "[Test] second")
+
+    def test_levels(self):
+        reporter = Reporter(print_sentences=False)
+        reporter.new_article()
+        self.assertFalse(reporter.is_enabled_for(logging.DEBUG))
+        reporter.add_sentence("debug", level=logging.DEBUG)
+        self.assertTrue(reporter.is_empty())
+        reporter.add_sentence("error", level=logging.ERROR)
+        self.assertEqual(reporter.get_articles_as_string(), "error\n\n")
+
+        reporter = Reporter(print_sentences=False, level=logging.DEBUG)
+        reporter.new_article()
+        reporter.add_sentence("debug", level=logging.DEBUG)
+        self.assertEqual(reporter.get_last_sentence(), "debug")
+
+    def test_max_sentences(self):
+        reporter = Reporter(print_sentences=False, max_sentences=3)
+        for article in range(3):
+            reporter.new_article()
+            for sentence in range(2):
+                reporter.add_sentence(f"{article}.{sentence}")
+        # Only the three most recent sentences are kept, and emptied articles are dropped
+        self.assertEqual([list(article) for article in reporter.articles], [["1.1"], ["2.0", "2.1"]])
+        self.assertEqual(reporter.get_last_sentence(), "2.1")
+
+        reporter = Reporter(print_sentences=False, max_sentences=0)
+        reporter.new_article()
+        reporter.add_sentence("not kept")
+        self.assertEqual(reporter.get_articles_as_string(), "\n")
+        self.assertFalse(reporter.is_empty())
+
+        self.assertRaises(ValueError, Reporter, max_sentences=-1)
+        self.assertRaises(ValueError, Reporter, batch_size=0)
+
+    def test_batches(self):
+        reporter = Reporter(batch_size=2)
+        reporter.new_article()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for i in range(3):
+                reporter.add_sentence(f"sentence {i}")
+            self.assertEqual(output.getvalue(), "sentence 0\nsentence 1\n")
+            reporter.flush()
+        self.assertEqual(output.getvalue(), "sentence 0\nsentence 1\nsentence 2\n")
+
+    def test_logger(self):
+        reporter = Reporter(logger=logging.getLogger("oc_ocdm.test"), batch_size=10, background=True)
+        reporter.new_article()
+        with self.assertLogs("oc_ocdm.test", logging.INFO) as logs:
+            reporter.add_sentence("info")
+            reporter.add_sentence("error", level=logging.ERROR)
+            reporter.flush()
+        self.assertEqual(logs.output, ["INFO:oc_ocdm.test:info", "ERROR:oc_ocdm.test:error"])
+        reporter.close()
+        reporter.close()
+
+    def test_background(self):
+        reporter = Reporter(background=True)
+        reporter.new_article()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for i in range(100):
+                reporter.add_sentence(f"sentence {i}")
+            reporter.flush()
+        self.assertEqual(output.getvalue(), "".join(f"sentence {i}\n" for i in range(100)))
+
+        copy = pickle.loads(pickle.dumps(reporter))
+        self.assertEqual(copy.get_last_sentence(), "sentence 99")
+        with redirect_stdout(output):
+            copy.add_sentence("from the copy")
+            copy.close()
+        self.assertTrue(output.getvalue().endswith("from the copy\n"))
+        reporter.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import threading
+import time
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+from triplelite import RDFTerm
+
+from oc_ocdm.constants import XSD_STRING
+from oc_ocdm.support.sparql import (
+    AsyncSPARQLClient,
+    SPARQLEndpointError,
+    iter_json_bindings,
+    sparql_query_iter,
+    sparql_update_async,
+)
+from oc_ocdm.support.support import build_graph_from_results
+
+
+class TestIterJsonBindings(unittest.TestCase):
+    def setUp(self):
+        self.bindings = [
+            {
+                "s": {"type": "uri", "value": f"https://w3id.org/oc/meta/br/060{i}"},
+                "p": {"type": "uri", "value": "http://purl.org/dc/terms/title"},
+                "o": {"type": "literal", "value": f'Title "{i}", with [brackets] and àccents  '},
+            }
+            for i in range(50)
+        ]
+        self.document = {"head": {"vars": ["s", "p", "bindings"]}, "results": {"bindings": self.bindings}}
+
+    def test_iter_json_bindings(self):
+        for indent in (None, 2):
+            payload = json.dumps(self.document, indent=indent, ensure_ascii=False).encode("utf-8")
+            # Small chunks split keys, bindings and multi-byte characters
+            for chunk_size in (1, 7, 65536):
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertEqual(list(iter_json_bindings(BytesIO(payload), chunk_size)), self.bindings)
+
+    def test_empty_and_malformed_results(self):
+        empty = json.dumps({"head": {"vars": ["s"]}, "results": {"bindings": []}}).encode("utf-8")
+        self.assertEqual(list(iter_json_bindings(BytesIO(empty), 3)), [])
+        self.assertEqual(list(iter_json_bindings(BytesIO(b'{"head": {}, "boolean": true}'))), [])
+
+        payload = json.dumps(self.document).encode("utf-8")
+        self.assertRaises(ValueError, list, iter_json_bindings(BytesIO(payload[:-40]), 16))
+        self.assertRaises(ValueError, list, iter_json_bindings(BytesIO(b'{"results": {"bindings": [{"s": }]}}')))
+
+    def test_sparql_query_iter(self):
+        payload = json.dumps(self.document).encode("utf-8")
+        response = BytesIO(payload)
+        with patch("oc_ocdm.support.sparql._open_with_retry", return_value=response) as open_with_retry:
+            results = sparql_query_iter("http://unused.test/sparql", "SELECT * WHERE { ?s ?p ?o }")
+            open_with_retry.assert_not_called()
+            graph = build_graph_from_results(results)
+        self.assertEqual(len(graph), len(self.bindings))
+        self.assertIn(
+            (
+                "https://w3id.org/oc/meta/br/0600",
+                "http://purl.org/dc/terms/title",
+                RDFTerm("literal", 'Title "0", with [brackets] and àccents  ', XSD_STRING),
+            ),
+            graph,
+        )
+        self.assertTrue(response.closed)
+
+
+class TestAsyncSPARQLClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = AsyncSPARQLClient(max_concurrency=2, max_retries=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+
+    async def test_retries_without_blocking(self):
+        errors = [SPARQLEndpointError("Server error: 503", status_code=503), SPARQLEndpointError("Connection error")]
+        payload = b'{"head": {"vars": []}, "results": {"bindings": []}}'
+        with patch("oc_ocdm.support.sparql._execute_with_retry", side_effect=[*errors, payload]) as execute:
+            result = await self.client.query("http://unused.test/sparql", "SELECT * WHERE { ?s ?p ?o }")
+        self.assertEqual(result, {"head": {"vars": []}, "results": {"bindings": []}})
+        self.assertEqual(execute.call_count, 3)
+        # Every attempt is a single request: retries are handled by the client
+        self.assertTrue(all(c.kwargs["max_retries"] == 0 for c in execute.call_args_list))
+
+        with patch("oc_ocdm.support.sparql._execute_with_retry", side_effect=SPARQLEndpointError("x", 400)) as execute:
+            with self.assertRaises(SPARQLEndpointError):
+                await sparql_update_async("http://unused.test/sparql", "INSERT DATA {}", client=self.client)
+        execute.assert_called_once()
+
+        with patch("oc_ocdm.support.sparql._execute_with_retry", side_effect=SPARQLEndpointError("x", 500)) as execute:
+            with self.assertRaises(SPARQLEndpointError):
+                await self.client.construct("http://unused.test/sparql", "CONSTRUCT WHERE { ?s ?p ?o }")
+        self.assertEqual(execute.call_count, 3)
+
+    async def test_concurrency_limit(self):
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def request():
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return True
+
+        results = await asyncio.gather(*(self.client.run(request) for _ in range(6)))
+        self.assertEqual(results, [True] * 6)
+        self.assertEqual(max_running, 2)
+        self.assertRaises(ValueError, AsyncSPARQLClient, max_concurrency=0)
+
+    async def test_close_without_waiting(self):
+        started = threading.Semaphore(0)
+        release = threading.Event()
+
+        def request():
+            started.release()
+            release.wait(5)
+            return True
+
+        tasks = [asyncio.ensure_future(self.client.run(request, max_retries=0)) for _ in range(3)]
+        try:
+            await asyncio.to_thread(started.acquire)
+            await asyncio.to_thread(started.acquire)
+            start = time.monotonic()
+            self.client.close(wait=False)
+            self.assertLess(time.monotonic() - start, 1)
+        finally:
+            release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # The request waiting for a free worker is cancelled, the running ones are completed
+        self.assertEqual(results[:2], [True, True])
+        self.assertIsInstance(results[2], asyncio.CancelledError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python
+
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+# -*- coding: utf-8 -*-
+import pickle
+import unittest
+
+from triplelite import RDFTerm
+
+from oc_ocdm.support.tracked_graph import TrackedGraph
+
+RES = "http://test/br/1"
+TITLE = "http://purl.org/dc/terms/title"
+TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+class TestTrackedGraph(unittest.TestCase):
+    def setUp(self):
+        self.type_triple = (RES, TYPE, RDFTerm("uri", "http://purl.org/spar/fabio/Expression"))
+        self.title_triple = (RES, TITLE, RDFTerm("literal", "Title"))
+        self.g = TrackedGraph(identifier="http://test/br/")
+
+    def test_add_and_remove(self):
+        self.assertFalse(self.g.is_dirty)
+        self.g.add(self.type_triple)
+        self.g.add(self.type_triple)
+        self.assertEqual(self.g.added_triples, {self.type_triple})
+        self.assertEqual(self.g.removed_triples, set())
+        self.assertTrue(self.g.is_dirty)
+
+        # Removing a triple added since the last reset cancels the addition
+        self.g.remove((RES, None, None))
+        self.assertEqual(len(self.g), 0)
+        self.assertFalse(self.g.is_dirty)
+
+        # Removing a triple that is not in the graph is not recorded
+        self.g.remove(self.title_triple)
+        self.assertFalse(self.g.is_dirty)
+
+    def test_reset_changes(self):
+        self.g.add_many([self.type_triple, self.title_triple])
+        baseline = frozenset(self.g)
+        self.g.reset_changes(baseline)
+        self.assertIs(self.g.baseline, baseline)
+        self.assertFalse(self.g.is_dirty)
+
+        self.g.remove((RES, TITLE, None))
+        self.assertEqual(self.g.removed_triples, {self.title_triple})
+        self.g.add(self.title_triple)
+        self.assertFalse(self.g.is_dirty)
+
+        new_title = (RES, TITLE, RDFTerm("literal", "New title"))
+        self.g.remove((RES, TITLE, None))
+        self.g.add(new_title)
+        self.assertEqual(self.g.added_triples, {new_title})
+        self.assertEqual(self.g.removed_triples, {self.title_triple})
+
+        # Triples that are not part of the baseline are recorded as added
+        self.g.reset_changes(frozenset([self.type_triple]))
+        self.assertEqual(self.g.added_triples, {new_title})
+        self.assertEqual(self.g.removed_triples, set())
+
+    def test_pickle(self):
+        self.g.add(self.type_triple)
+        baseline = frozenset(self.g)
+        self.g.reset_changes(baseline)
+        self.g.add(self.title_triple)
+
+        restored = pickle.loads(pickle.dumps(self.g))
+        self.assertIsInstance(restored, TrackedGraph)
+        self.assertEqual(restored.identifier, self.g.identifier)
+        self.assertEqual(set(restored), set(self.g))
+        self.assertEqual(restored.baseline, baseline)
+        self.assertEqual(restored.added_triples, {self.title_triple})
+        self.assertEqual(restored.removed_triples, set())
+
+
+if __name__ == "__main__":
+    unittest.main()